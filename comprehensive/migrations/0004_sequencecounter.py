@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comprehensive', '0003_department_department_email_department_leader_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=20, verbose_name='编号前缀')),
+                ('period', models.CharField(max_length=20, verbose_name='编号周期')),
+                ('value', models.BigIntegerField(default=0, verbose_name='当前序号')),
+            ],
+            options={
+                'verbose_name': '编号序列',
+                'verbose_name_plural': '编号序列',
+                'db_table': 'sequence_counter',
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'period'), name='unique_sequence_counter')],
+            },
+        ),
+    ]
@@ -29,3 +29,23 @@ class Department(models.Model):
     projects = models.CharField(max_length=255, verbose_name="负责项目")
     def __str__(self):
         return self.name
+
+class SequenceCounter(models.Model):
+    # 编号序列计数器，按 (前缀, 周期) 唯一，例如 ('DR', '202506')、('SBWX', '20250601')
+    prefix = models.CharField(max_length=20, verbose_name="编号前缀")
+    period = models.CharField(max_length=20, verbose_name="编号周期")
+    value = models.BigIntegerField(default=0, verbose_name="当前序号")
+
+    class Meta:
+        db_table = 'sequence_counter'
+        verbose_name = "编号序列"
+        verbose_name_plural = "编号序列"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['prefix', 'period'],
+                name='unique_sequence_counter'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}{self.period}: {self.value}"
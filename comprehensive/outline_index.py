@@ -0,0 +1,59 @@
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .models import Outlines
+
+# 项目代号 -> 大纲列表 的缓存索引
+# 通过版本号整体失效，避免逐个项目删除缓存
+OUTLINE_INDEX_VERSION_KEY = 'outline_index:version'
+OUTLINE_INDEX_TIMEOUT = 60 * 60
+
+
+def _get_index_version():
+    version = cache.get(OUTLINE_INDEX_VERSION_KEY)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(OUTLINE_INDEX_VERSION_KEY, int(time.time()), None)
+        version = cache.get(OUTLINE_INDEX_VERSION_KEY)
+    return version
+
+
+def _project_key(version, project):
+    return f'outline_index:{version}:{project}'
+
+
+def get_outlines_by_project(projects):
+    """批量获取多个项目代号对应的大纲，返回 {项目代号: [Outlines, ...]}"""
+    projects = {project for project in projects if project}
+    if not projects:
+        return {}
+
+    version = _get_index_version()
+    keys = {_project_key(version, project): project for project in projects}
+    cached = cache.get_many(list(keys))
+    outlines_map = {keys[key]: value for key, value in cached.items()}
+
+    # 未命中缓存的项目一次性查询
+    missing = projects - set(outlines_map)
+    if missing:
+        loaded = defaultdict(list)
+        for outline in Outlines.objects.filter(project__in=missing).order_by('outline_num'):
+            loaded[outline.project].append(outline)
+        fresh = {project: loaded.get(project, []) for project in missing}
+        cache.set_many(
+            {_project_key(version, project): value for project, value in fresh.items()},
+            OUTLINE_INDEX_TIMEOUT
+        )
+        outlines_map.update(fresh)
+
+    return outlines_map
+
+
+def invalidate_outline_index():
+    """大纲新增、修改或删除后调用，使所有项目的大纲缓存失效"""
+    try:
+        cache.incr(OUTLINE_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(OUTLINE_INDEX_VERSION_KEY, int(time.time()), None)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.cache import cache
+
+# 读多写少页面的表格片段缓存（模板中的 {% cache %}），键中包含页面版本号，
+# 页面数据对应的模型保存或删除时递增版本号，旧片段不再命中、自然过期
+PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+PAGE_CACHE_VERSION_KEY = 'page_cache:version:{page}'
+
+EQUIPMENT_INFO_PAGE = 'equipment_info'
+SUPPLIER_MANAGEMENT_PAGE = 'supplier_management'
+OUTLINE_REGISTER_PAGE = 'outline_register'
+CLIENT_EDIT_PAGE = 'client_edit'
+PERSONS_LIST_PAGE = 'persons_list'
+
+
+def page_cache_version(page):
+    key = PAGE_CACHE_VERSION_KEY.format(page=page)
+    version = cache.get(key)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key)
+    return version
+
+
+def page_cache_context(page):
+    """模板中 {% cache page_cache_timeout '<页面>' page_cache_version ... %} 使用的上下文"""
+    return {
+        'page_cache_timeout': PAGE_CACHE_TIMEOUT,
+        'page_cache_version': page_cache_version(page),
+    }
+
+
+def invalidate_page_cache(page):
+    """页面数据变化后调用，使该页面所有已缓存的片段失效"""
+    key = PAGE_CACHE_VERSION_KEY.format(page=page)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), None)
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+
+# 权限 -> 拥有该权限的用户 的缓存索引
+# 进程内保存一份，同时写入共享缓存供其他进程复用；用户、用户组或权限分配变化时通过版本号整体失效
+PERMISSION_INDEX_VERSION_KEY = 'permission_index:version'
+PERMISSION_INDEX_TIMEOUT = 60 * 60
+
+_local_index = {}
+_local_lock = threading.Lock()
+
+
+def _get_index_version():
+    version = cache.get(PERMISSION_INDEX_VERSION_KEY)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(PERMISSION_INDEX_VERSION_KEY, int(time.time()), None)
+        version = cache.get(PERMISSION_INDEX_VERSION_KEY)
+    return version
+
+
+def _load_users(permission):
+    """一次联表查询直接授予或通过用户组拥有该权限的用户"""
+    app_label, codename = permission.split('.', 1)
+    users = User.objects.filter(
+        Q(user_permissions__codename=codename, user_permissions__content_type__app_label=app_label)
+        | Q(groups__permissions__codename=codename, groups__permissions__content_type__app_label=app_label)
+    ).distinct().order_by('username')
+    return tuple(
+        {'name': user.get_full_name(), 'employee_id': user.username}
+        for user in users
+    )
+
+
+def users_with_permission(permission):
+    """
+    返回拥有权限 permission（"app_label.codename"）的用户 ({'name', 'employee_id'}, ...)。
+
+    依次查找进程内缓存、共享缓存，都未命中时才查询数据库。
+    """
+    version = _get_index_version()
+    entry = _local_index.get(permission)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    key = f'permission_index:{version}:{permission}'
+    users = cache.get(key)
+    if users is None:
+        users = _load_users(permission)
+        cache.set(key, users, PERMISSION_INDEX_TIMEOUT)
+    with _local_lock:
+        _local_index[permission] = (version, users)
+    return users
+
+
+def usernames_with_permission(permission):
+    return {user['employee_id'] for user in users_with_permission(permission)}
+
+
+def invalidate_permission_index():
+    """用户、用户组或权限分配变化后调用，使所有进程的权限索引失效"""
+    with _local_lock:
+        _local_index.clear()
+    try:
+        cache.incr(PERMISSION_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(PERMISSION_INDEX_VERSION_KEY, int(time.time()), None)
@@ -0,0 +1,80 @@
+from django.db import connection
+
+from .models import SequenceCounter
+
+
+def _counter_table():
+    return connection.ops.quote_name(SequenceCounter._meta.db_table)
+
+
+def allocate_sequence(prefix, period, count=1, seed=None):
+    """
+    原子地为 (prefix, period) 分配 count 个连续序号，返回分配到的序号区间 range。
+
+    计数器已存在时只执行一条 UPDATE ... RETURNING 语句；
+    不存在时调用 seed() 获取业务表中已有的最大序号作为起点，
+    再通过 INSERT ... ON CONFLICT 写入，并发首次写入时也不会产生重复序号。
+    """
+    if count < 1:
+        raise ValueError("count 必须大于零")
+
+    table = _counter_table()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET value = value + %s "
+            f"WHERE prefix = %s AND period = %s RETURNING value",
+            [count, prefix, period]
+        )
+        row = cursor.fetchone()
+        if row is None:
+            start = int(seed()) if seed else 0
+            cursor.execute(
+                f"INSERT INTO {table} (prefix, period, value) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (prefix, period) DO UPDATE SET value = {table}.value + %s "
+                f"RETURNING value",
+                [prefix, period, start + count, count]
+            )
+            row = cursor.fetchone()
+
+    last = row[0]
+    return range(last - count + 1, last + 1)
+
+
+def next_sequence(prefix, period, seed=None):
+    """分配 (prefix, period) 下的下一个序号"""
+    return allocate_sequence(prefix, period, 1, seed)[0]
+
+
+def latest_serial(numbers, separator=None, start=0):
+    """从已有编号中解析最大序号，用于计数器首次创建时的 seed"""
+    max_serial = 0
+    for number in numbers:
+        if not number:
+            continue
+        serial_part = number.split(separator)[-1] if separator else number[start:]
+        try:
+            max_serial = max(max_serial, int(serial_part))
+        except ValueError:
+            continue  # 忽略无法解析的编号
+    return max_serial
+
+
+def generate_record_ids(model, field, prefix, period, count=1, width=4):
+    """
+    按 前缀 + 期间 + 定长序号 批量生成记录ID，例如 DR2025060001。
+
+    一次性向计数器申请 count 个连续序号，批量导入时无需逐条扫描业务表。
+    """
+    id_prefix = f"{prefix}{period}"
+
+    def seed():
+        # 计数器首次创建时，以表中该期间下已有的最大序号为起点
+        latest_id = model.objects.filter(
+            **{f'{field}__startswith': id_prefix}
+        ).order_by(f'-{field}').values_list(field, flat=True).first()
+        return latest_serial([latest_id], start=len(id_prefix))
+
+    return [
+        f"{id_prefix}{number:0{width}d}"
+        for number in allocate_sequence(prefix, period, count, seed)
+    ]
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Department, Outlines
+from .outline_index import invalidate_outline_index
+from .page_cache import CLIENT_EDIT_PAGE, OUTLINE_REGISTER_PAGE, invalidate_page_cache
+from .permission_index import invalidate_permission_index
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def permission_assignment_changed(sender, action, **kwargs):
+    """用户加入或退出用户组、用户或用户组的权限增删后使权限索引失效"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permission_index()
+
+
+# 权限索引中保存的用户字段
+PERMISSION_INDEX_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permission_owner_changed(sender, update_fields=None, **kwargs):
+    # 索引中保存了用户姓名，用户信息修改或删除、用户组及权限删除时同样失效；
+    # 只更新其他字段的保存（例如每次登录时 update_last_login 只更新 last_login）不影响索引
+    if update_fields is not None and not PERMISSION_INDEX_USER_FIELDS & set(update_fields):
+        return
+    invalidate_permission_index()
+
+
+@receiver(post_save, sender=Outlines)
+@receiver(post_delete, sender=Outlines)
+def update_outline_index(sender, **kwargs):
+    """大纲保存或删除（包括后台管理、导入等途径）后使项目代号 -> 大纲缓存失效"""
+    invalidate_outline_index()
+
+
+@receiver(post_save, sender=Outlines)
+@receiver(post_delete, sender=Outlines)
+def update_outline_register_page(sender, **kwargs):
+    """大纲保存或删除后使大纲登记页面的表格缓存失效"""
+    invalidate_page_cache(OUTLINE_REGISTER_PAGE)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def update_client_edit_page(sender, **kwargs):
+    """委托部门保存或删除后使委托方编辑页面的表格缓存失效"""
+    invalidate_page_cache(CLIENT_EDIT_PAGE)
@@ -1,3 +1,186 @@
-from django.test import TestCase
+import threading
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from equipment.models import Equipment, Supplier
+from persons.models import Person
+
+from .models import Department, Outlines, SequenceCounter
+from .permission_index import usernames_with_permission
+from .sequences import allocate_sequence, generate_record_ids, next_sequence
+
+
+class AllocateSequenceTests(TestCase):
+    def test_ranges_are_consecutive(self):
+        self.assertEqual(list(allocate_sequence('DR', '202501', 3)), [1, 2, 3])
+        self.assertEqual(next_sequence('DR', '202501'), 4)
+        # 不同周期独立计数
+        self.assertEqual(next_sequence('DR', '202502'), 1)
+
+    def test_new_counter_is_seeded_from_existing_maximum(self):
+        self.assertEqual(next_sequence('EL', '202501', seed=lambda: 41), 42)
+        # 计数器已存在后不再调用 seed
+        self.assertEqual(next_sequence('EL', '202501', seed=lambda: 1000), 43)
+
+    def test_existing_counter_allocates_in_one_query(self):
+        next_sequence('DR', '202501')
+        SequenceCounter.objects.bulk_create(
+            SequenceCounter(prefix='DR', period=f'2024{index:04d}', value=index) for index in range(500)
+        )
+        with self.assertNumQueries(1):
+            next_sequence('DR', '202501')
+
+    def test_generate_record_ids_formats_serials(self):
+        self.assertEqual(
+            generate_record_ids(SequenceCounter, 'prefix', 'DR', '202501', count=2),
+            ['DR2025010001', 'DR2025010002'],
+        )
+
+    def test_invalid_count(self):
+        with self.assertRaises(ValueError):
+            allocate_sequence('DR', '202501', 0)
+
+
+class ParallelAllocationTests(TransactionTestCase):
+    THREADS = 8
+    PER_THREAD = 50
+
+    def test_parallel_allocations_are_unique(self):
+        results = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                ids = [next_sequence('DR', '202501') for _ in range(self.PER_THREAD)]
+                with lock:
+                    results.extend(ids)
+            except Exception as exc:  # 在主线程中断言
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), self.THREADS * self.PER_THREAD)
+        # 没有重复，也没有跳号
+        self.assertEqual(sorted(results), list(range(1, self.THREADS * self.PER_THREAD + 1)))
+
+
+class PermissionIndexTests(TestCase):
+    PERMISSION = 'equipment.can_approve_device_repairer'
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='维修员')
+        self.group.permissions.add(Permission.objects.get(codename='can_approve_device_repairer'))
+        self.user = User.objects.create_user('3001', password='password')
+
+    def test_adding_user_to_group_invalidates_index(self):
+        self.assertEqual(usernames_with_permission(self.PERMISSION), set())
+        self.user.groups.add(self.group)
+        self.assertEqual(usernames_with_permission(self.PERMISSION), {'3001'})
+        self.user.groups.remove(self.group)
+        self.assertEqual(usernames_with_permission(self.PERMISSION), set())
+
+    def test_login_does_not_invalidate_index(self):
+        self.user.groups.add(self.group)
+        usernames_with_permission(self.PERMISSION)
+        # 登录时 update_last_login 只保存 last_login
+        self.assertTrue(self.client.login(username='3001', password='password'))
+        with self.assertNumQueries(0):
+            self.assertEqual(usernames_with_permission(self.PERMISSION), {'3001'})
+
+    def test_renaming_user_invalidates_index(self):
+        self.user.groups.add(self.group)
+        usernames_with_permission(self.PERMISSION)
+        self.user.username = '3002'
+        self.user.save(update_fields=['username'])
+        self.assertEqual(usernames_with_permission(self.PERMISSION), {'3002'})
+
+
+def create_equipment(name):
+    return Equipment.objects.create(
+        equipment_id='A-01', name=name, type='耐久台架', equipment_status='运行', usage_frequency='高',
+        responsible_person='张三', waiting_cost=0, debugging_cost=0, operating_cost=0,
+    )
+
+
+def create_supplier(name):
+    return Supplier.objects.create(
+        name=name, address='地址', contact_person='李四', contact_phone='123', repair_scope='台架', repair_equipment='A-01',
+    )
+
+
+def create_outline(name):
+    return Outlines.objects.create(
+        sample_style='DCT', project='P1', outline_num='P1-1', outline_name=name, editor='李四',
+        save_date=date(2025, 1, 1), outline_status='有效',
+    )
+
+
+def create_department(name):
+    return Department.objects.create(
+        name=name, department_leader='王五', department_email='a@example.com', tech_center_leader='赵六',
+        leader_email='b@example.com', projects='P1',
+    )
+
+
+def create_person(name):
+    return Person.objects.create(
+        employee_id='1001', name=name, email='c@example.com', phone='123', birth_date=date(1990, 1, 1),
+        address='地址', entry_date=date(2020, 1, 1), department='试验部', role='试验员', potential='A', skill='A',
+    )
+
+
+class PageCacheTests(TestCase):
+    # 页面地址、写入一行页面数据的函数、页面中显示的名称字段
+    PAGES = (
+        ('/equipment_info/', create_equipment, 'name'),
+        ('/supplier_management/', create_supplier, 'name'),
+        ('/outline_register/', create_outline, 'outline_name'),
+        ('/client_edit/', create_department, 'name'),
+        ('/persons_list/', create_person, 'name'),
+    )
+    # 会话、用户；缓存未命中时再加一次页面数据查询
+    WARM_QUERIES = 2
+    COLD_QUERIES = 3
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def render(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_warm_render_runs_no_data_queries(self):
+        for url, create, _ in self.PAGES:
+            with self.subTest(url=url):
+                create('缓存测试')
+                self.assertIn('缓存测试', self.render(url, self.COLD_QUERIES))
+                self.assertIn('缓存测试', self.render(url, self.WARM_QUERIES))
+
+    def test_saving_and_deleting_invalidates_page(self):
+        for url, create, name_field in self.PAGES:
+            with self.subTest(url=url):
+                self.render(url, self.COLD_QUERIES)
+                row = create('新增数据')
+                self.assertIn('新增数据', self.render(url, self.COLD_QUERIES))
+                setattr(row, name_field, '修改数据')
+                row.save()
+                self.assertIn('修改数据', self.render(url, self.COLD_QUERIES))
+                row.delete()
+                self.assertNotIn('修改数据', self.render(url, self.COLD_QUERIES))
+                self.render(url, self.WARM_QUERIES)
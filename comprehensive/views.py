@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.core.exceptions import PermissionDenied
 from .models import *
+from .page_cache import CLIENT_EDIT_PAGE, OUTLINE_REGISTER_PAGE, page_cache_context
 from django.http import JsonResponse
 import json
 from django.utils.dateparse import parse_date
@@ -84,6 +85,7 @@ def outline_register(request):
             'outlines': outlines,
             'user_has_permission': user_has_permission,
             'projects': projects,  # 始终传递项目代号到模板
+            **page_cache_context(OUTLINE_REGISTER_PAGE),
         }
         return render(request, 'outline_register.html', context)
     except PermissionDenied:
@@ -182,11 +184,11 @@ def client_edit(request):
             raise PermissionDenied
         items = Department.objects.order_by('name')  # 获取部门名称
         user_has_permission = request.user.has_perm('comprehensive.change_department')
-        print(items)
         context = {
             'page_title': '委托方编辑',
             'items': items,
             'user_has_permission': user_has_permission,
+            **page_cache_context(CLIENT_EDIT_PAGE),
         }
         return render(request, 'client_edit.html', context)
     except PermissionDenied:
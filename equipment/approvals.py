@@ -0,0 +1,118 @@
+from django.db.models import Case, CharField, Q, Value, When
+
+from comprehensive.permission_index import usernames_with_permission
+
+# 审批状态文本
+PENDING_AREA_LEADER = '待区域主管审批'
+REJECTED_BY_AREA_LEADER = '区域主管已驳回'
+PENDING_LINE_LEADER = '待条线领导审批'
+REJECTED_BY_LINE_LEADER = '条线领导已驳回'
+PENDING_DEVICE_MANAGER = '待设备管理员审批'
+REJECTED_BY_DEVICE_MANAGER = '设备管理员已驳回'
+APPROVED = '审核通过'
+PENDING = '待审核'
+
+APPROVAL_STATUS_COLORS = {
+    PENDING_AREA_LEADER: 'orange',
+    REJECTED_BY_AREA_LEADER: 'red',
+    PENDING_LINE_LEADER: 'orange',
+    REJECTED_BY_LINE_LEADER: 'red',
+    PENDING_DEVICE_MANAGER: 'orange',
+    REJECTED_BY_DEVICE_MANAGER: 'red',
+    APPROVED: 'green',
+    PENDING: 'orange',
+}
+
+# 申请被驳回并指定了接收人，重新进入审批流程
+REJECTED_TO_SOMEONE = Q(rejected_to__isnull=False) & ~Q(rejected_to='')
+
+
+def _awaiting(role):
+    """该角色尚未审批，或申请被驳回后等待重新审批；已经审批过的申请不能再被批量同意或驳回"""
+    return Q(**{f'{role}_approval__isnull': True}) | REJECTED_TO_SOMEONE
+
+
+# 审批角色：(角色, 权限, 该角色可以审批的前置条件)，顺序即审批流程顺序
+APPROVAL_ROLES = (
+    ('area_leader', 'equipment.can_approve_area_leader', _awaiting('area_leader')),
+    ('line_leader', 'equipment.can_approve_line_leader', Q(area_leader_approval=True) & _awaiting('line_leader')),
+    ('device_manager', 'equipment.can_approve_device_manager',
+     Q(line_leader_approval=True) & _awaiting('device_manager')),
+)
+# 驳回时可以指定的接收人：设备维修员及前两级审批人
+REJECT_RECIPIENT_PERMISSIONS = (
+    'equipment.can_approve_device_repairer',
+    'equipment.can_approve_area_leader',
+    'equipment.can_approve_line_leader',
+)
+APPROVAL_ROLE_LABELS = {
+    'area_leader': '区域主管',
+    'line_leader': '条线领导',
+    'device_manager': '设备管理员',
+}
+
+def with_approval_status(queryset):
+    """
+    在数据库中计算审批状态，添加 approval_status 和 status_color 两个注解，
+    可以直接按状态筛选和排序。
+    """
+    approval_status = Case(
+        # 所有被驳回并指定了接收人的申请都显示为待区域主管审批
+        When(REJECTED_TO_SOMEONE, then=Value(PENDING_AREA_LEADER)),
+        When(area_leader_approval__isnull=True, then=Value(PENDING_AREA_LEADER)),
+        When(area_leader_approval=False, then=Value(REJECTED_BY_AREA_LEADER)),
+        When(line_leader_approval__isnull=True, then=Value(PENDING_LINE_LEADER)),
+        When(line_leader_approval=False, then=Value(REJECTED_BY_LINE_LEADER)),
+        When(device_manager_approval__isnull=True, then=Value(PENDING_DEVICE_MANAGER)),
+        When(device_manager_approval=False, then=Value(REJECTED_BY_DEVICE_MANAGER)),
+        When(device_manager_approval=True, then=Value(APPROVED)),
+        default=Value(PENDING),
+        output_field=CharField(),
+    )
+    status_color = Case(
+        *[When(approval_status=status, then=Value(color)) for status, color in APPROVAL_STATUS_COLORS.items()],
+        default=Value('orange'),
+        output_field=CharField(),
+    )
+    return queryset.annotate(approval_status=approval_status).annotate(status_color=status_color)
+
+
+def approver_role(user):
+    """按审批流程顺序返回用户的第一个审批角色及其前置条件，没有审批权限时返回 (None, None)"""
+    for role, permission, condition in APPROVAL_ROLES:
+        if user.has_perm(permission):
+            return role, condition
+    return None, None
+
+
+def is_reject_recipient(username):
+    """username 是否为可以接收驳回的用户"""
+    return any(username in usernames_with_permission(permission) for permission in REJECT_RECIPIENT_PERMISSIONS)
+
+
+def decision_updates(role, decision, reason='', rejected_to=None):
+    """
+    返回审批意见对应的字段更新 {字段: 值}。
+
+    驳回时按驳回接收人的角色重置后续审批状态：驳回给区域主管时整个流程重新开始，
+    驳回给条线领导时重置条线领导及之后的状态。
+    """
+    if decision == 'agree':
+        return {
+            f'{role}_approval': True,
+            f'{role}_rejection_reason': '',
+            'rejected_to': None,
+        }
+
+    updates = {
+        f'{role}_approval': False,
+        f'{role}_rejection_reason': reason,
+        'rejected_to': rejected_to,
+    }
+    if role == 'area_leader':
+        updates.update(line_leader_approval=None, device_manager_approval=None)
+    elif rejected_to in usernames_with_permission('equipment.can_approve_area_leader'):
+        updates.update(area_leader_approval=None, line_leader_approval=None, device_manager_approval=None)
+    elif role == 'device_manager' and rejected_to in usernames_with_permission('equipment.can_approve_line_leader'):
+        updates.update(line_leader_approval=None, device_manager_approval=None)
+    return updates
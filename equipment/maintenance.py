@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Equipment, MaintenanceRecord
+
+# 根据设备重要程度设置提前提醒天数
+ADVANCE_NOTICE_DAYS = {
+    'high': 30,    # 高重要度设备提前30天提醒
+    'medium': 15,  # 中等重要度设备提前15天提醒
+    'low': 7,      # 低重要度设备提前7天提醒
+}
+DEFAULT_ADVANCE_NOTICE_DAYS = 15
+
+
+def latest_next_maintenance_date():
+    """每台设备最新一条保养记录中填写的下次保养日期（子查询）"""
+    return Subquery(
+        MaintenanceRecord.objects.filter(equipment=OuterRef('pk'))
+        .order_by('-maintenance_date', '-id')
+        .values('next_maintenance_date')[:1]
+    )
+
+
+def compute_next_due_date(latest_next_date, last_maintenance_date, maintenance_cycle):
+    """
+    优先使用最新保养记录中设置的下次保养日期；
+    没有时使用设备的最后保养日期加保养周期；都没有时返回 None。
+    """
+    if latest_next_date:
+        return latest_next_date
+    if last_maintenance_date:
+        return last_maintenance_date + timedelta(days=maintenance_cycle)
+    return None
+
+
+def refresh_next_due_dates(equipment_ids=None, batch_size=500):
+    """
+    用一次查询重新计算设备的下次保养日期，只更新发生变化的设备。
+
+    equipment_ids 为 None 时刷新全部设备，返回更新的设备数。
+    """
+    equipments = Equipment.objects.annotate(latest_next_date=latest_next_maintenance_date())
+    if equipment_ids is not None:
+        equipments = equipments.filter(equipment_id__in=equipment_ids)
+
+    changed = []
+    for equipment in equipments.only(
+        'equipment_id', 'last_maintenance_date', 'maintenance_cycle', 'next_due_date'
+    ).iterator(chunk_size=batch_size):
+        next_due_date = compute_next_due_date(
+            equipment.latest_next_date, equipment.last_maintenance_date, equipment.maintenance_cycle
+        )
+        if next_due_date != equipment.next_due_date:
+            equipment.next_due_date = next_due_date
+            changed.append(equipment)
+
+    Equipment.objects.bulk_update(changed, ['next_due_date'], batch_size=batch_size)
+    return len(changed)
+
+
+def pending_maintenance(today=None):
+    """
+    待保养设备：下次保养日期在提前提醒天数以内（含已逾期），或尚无任何保养日期。
+
+    每种重要程度对应 next_due_date 上的一个范围条件，整体为一次索引范围查询。
+    """
+    today = today or timezone.localdate()
+    condition = Q(next_due_date__isnull=True) | Q(
+        ~Q(importance__in=ADVANCE_NOTICE_DAYS),
+        next_due_date__lte=today + timedelta(days=DEFAULT_ADVANCE_NOTICE_DAYS),
+    )
+    for importance, days in ADVANCE_NOTICE_DAYS.items():
+        condition |= Q(importance=importance, next_due_date__lte=today + timedelta(days=days))
+    return Equipment.objects.filter(condition).order_by(
+        F('next_due_date').asc(nulls_first=True), 'equipment_id'
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from equipment.maintenance import ADVANCE_NOTICE_DAYS, DEFAULT_ADVANCE_NOTICE_DAYS, pending_maintenance, refresh_next_due_dates
+
+
+class Command(BaseCommand):
+    help = '重新计算所有设备的下次保养日期并输出当天的待保养清单，建议每天定时执行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='按指定日期 YYYY-MM-DD 计算待保养清单，默认今天')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批更新的设备数')
+
+    def handle(self, *args, **options):
+        try:
+            today = datetime.strptime(options['date'], '%Y-%m-%d').date() if options['date'] else None
+        except ValueError:
+            raise CommandError('日期格式必须为 "YYYY-MM-DD"')
+
+        with transaction.atomic():
+            updated = refresh_next_due_dates(batch_size=options['batch_size'])
+
+        pending = list(pending_maintenance(today).only(
+            'equipment_id', 'name', 'importance', 'next_due_date'
+        ))
+        for equipment in pending:
+            days = ADVANCE_NOTICE_DAYS.get(equipment.importance, DEFAULT_ADVANCE_NOTICE_DAYS)
+            self.stdout.write(
+                f"{equipment.equipment_id} {equipment.name} 下次保养日期: {equipment.next_due_date or '未设置'}"
+                f"（提前 {days} 天提醒）"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'更新 {updated} 台设备的下次保养日期，待保养设备 {len(pending)} 台'))
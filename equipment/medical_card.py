@@ -0,0 +1,59 @@
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import EquipmentRepairApplication
+
+MEDICAL_CARD_PAGE_SIZE = 50
+
+# 查询参数 -> 筛选表达式
+MEDICAL_CARD_FILTERS = {
+    'device_name': 'equipment_id',
+    'fault_level': 'fault_level',
+    'fault_location': 'fault_locations',
+    'year': 'application_date__year',
+    'month': 'application_date__month',
+}
+INTEGER_FILTERS = ('year', 'month')
+
+
+def parse_filters(params):
+    """从查询参数中取出非空的筛选条件；年份、月份不是数字时返回 None（不会有匹配的记录）"""
+    selected = {name: params.get(name, '') for name in MEDICAL_CARD_FILTERS if params.get(name, '')}
+    for name in INTEGER_FILTERS:
+        if name in selected and not selected[name].isdigit():
+            return None
+    return selected
+
+
+def apply_filters(queryset, selected, exclude=None):
+    """应用除 exclude 以外的全部筛选条件"""
+    return queryset.filter(**{
+        MEDICAL_CARD_FILTERS[name]: int(value) if name in INTEGER_FILTERS else value
+        for name, value in selected.items() if name != exclude
+    })
+
+
+def _facet(queryset, name, expression, selected, text=True):
+    """
+    按某一筛选项分组计数，返回 [(取值, 记录数), ...]。
+
+    计数时应用其余筛选条件、不应用该项本身，这样切换该项时可以看到其他取值的记录数。
+    """
+    rows = apply_filters(queryset, selected, exclude=name).annotate(value=expression).exclude(value__isnull=True)
+    if text:
+        rows = rows.exclude(value='')
+    rows = rows.values('value').annotate(count=Count('id')).order_by('value')
+    return [(row['value'], row['count']) for row in rows]
+
+
+def medical_card_facets(selected):
+    queryset = EquipmentRepairApplication.objects.all()
+    years = _facet(queryset, 'year', ExtractYear('application_date'), selected, text=False)
+    month_counts = dict(_facet(queryset, 'month', ExtractMonth('application_date'), selected, text=False))
+    return {
+        'device_names': _facet(queryset, 'device_name', F('equipment_id'), selected),
+        'fault_levels': _facet(queryset, 'fault_level', F('fault_level'), selected),
+        'fault_locations': _facet(queryset, 'fault_location', F('fault_locations'), selected),
+        'years': sorted(years, reverse=True),
+        'months': [(month, month_counts.get(month, 0)) for month in range(1, 13)],
+    }
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:41
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_next_due_date(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    MaintenanceRecord = apps.get_model('equipment', 'MaintenanceRecord')
+    latest_next_date = models.Subquery(
+        MaintenanceRecord.objects.filter(equipment=models.OuterRef('pk'))
+        .order_by('-maintenance_date', '-id')
+        .values('next_maintenance_date')[:1]
+    )
+    equipments = list(Equipment.objects.annotate(latest_next_date=latest_next_date))
+    for equipment in equipments:
+        if equipment.latest_next_date:
+            equipment.next_due_date = equipment.latest_next_date
+        elif equipment.last_maintenance_date:
+            equipment.next_due_date = equipment.last_maintenance_date + timedelta(days=equipment.maintenance_cycle)
+    Equipment.objects.bulk_update(equipments, ['next_due_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_supplier_contact_person_supplier_contact_phone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='next_due_date',
+            field=models.DateField(blank=True, db_index=True, null=True, verbose_name='下次保养日期'),
+        ),
+        migrations.RunPython(backfill_next_due_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+def backfill_region(apps, schema_editor):
+    # 与 Equipment.region_for 规则一致：按 A、B、C、D 顺序第一个出现在设备编号中的字母
+    Equipment = apps.get_model('equipment', 'Equipment')
+    equipments = list(Equipment.objects.only('equipment_id'))
+    for equipment in equipments:
+        equipment_id = equipment.equipment_id.upper()
+        equipment.region = next(
+            (region for region in ('A区', 'B区', 'C区', 'D区') if region[0] in equipment_id), '其他'
+        )
+    Equipment.objects.bulk_update(equipments, ['region'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_equipment_next_due_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='region',
+            field=models.CharField(default='其他', editable=False, max_length=10, verbose_name='所在区域'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['region', 'equipment_id'], name='equipment_e_region_ca4931_idx'),
+        ),
+        migrations.RunPython(backfill_region, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:45
+
+from django.db import migrations, models
+
+
+def backfill_equipment_id(apps, schema_editor):
+    # 与 EquipmentRepairApplication.equipment_id_for 规则一致：第二个"-"之前的部分
+    EquipmentRepairApplication = apps.get_model('equipment', 'EquipmentRepairApplication')
+    applications = list(EquipmentRepairApplication.objects.only('id', 'device_name'))
+    for application in applications:
+        parts = application.device_name.split('-')
+        application.equipment_id = '-'.join(parts[:2]) if len(parts) >= 2 else application.device_name
+    EquipmentRepairApplication.objects.bulk_update(applications, ['equipment_id'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_equipment_region'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentrepairapplication',
+            name='equipment_id',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='设备编号'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentrepairapplication',
+            index=models.Index(fields=['equipment_id', 'application_date'], name='equipment_e_equipme_eaadf7_idx'),
+        ),
+        migrations.RunPython(backfill_equipment_id, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from comprehensive.sequences import next_sequence, latest_serial
+
 
 class Equipment(models.Model):
     IMPORTANCE_CHOICES = [
@@ -16,6 +18,10 @@ class Equipment(models.Model):
         (365, '每年'),
     ]
 
+    # 设备编号中按 A、B、C、D 顺序第一个出现的字母决定所在区域，都不含时为"其他"
+    REGIONS = ['A区', 'B区', 'C区', 'D区']
+    OTHER_REGION = '其他'
+
     equipment_id = models.CharField(
         max_length=50, 
         primary_key=True, 
@@ -24,10 +30,15 @@ class Equipment(models.Model):
         verbose_name="设备编号"
     )
     name = models.CharField(max_length=100, verbose_name="设备名称")
+    region = models.CharField(
+        max_length=10, editable=False, default=OTHER_REGION, verbose_name="所在区域")
     type = models.CharField(max_length=100, verbose_name="设备类型")
     equipment_status = models.CharField(max_length=50, verbose_name="设备状态")
     last_maintenance_date = models.DateField(
         "最新保养日期", null=True, blank=True)
+    # 冗余存储的下次保养日期，设备或保养记录变化时由 equipment.signals 重新计算
+    next_due_date = models.DateField(
+        "下次保养日期", null=True, blank=True, db_index=True)
     usage_frequency = models.CharField(
         max_length=50, verbose_name="使用频率")
     responsible_person = models.CharField(
@@ -52,9 +63,28 @@ class Equipment(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def region_for(cls, equipment_id):
+        equipment_id = (equipment_id or '').upper()
+        for region in cls.REGIONS:
+            if region[0] in equipment_id:
+                return region
+        return cls.OTHER_REGION
+
+    def save(self, *args, **kwargs):
+        self.region = self.region_for(self.equipment_id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'equipment_id' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'region'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "设备"
         verbose_name_plural = "设备"
+        indexes = [
+            # 按区域筛选、按区域和设备编号顺序分组
+            models.Index(fields=['region', 'equipment_id']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['equipment_id'], 
@@ -84,6 +114,9 @@ class EquipmentRepairApplication(models.Model):
     submitter_name = models.CharField(max_length=100, verbose_name="提交人姓名")
     application_date = models.DateField(verbose_name="申请日期")
     device_name = models.CharField(max_length=100, verbose_name="设备名称")
+    # 由设备名称派生（第二个"-"之前的部分），保存时自动更新，用于设备病历的筛选和排序
+    equipment_id = models.CharField(
+        max_length=100, blank=True, default='', editable=False, verbose_name="设备编号")
     fault_phenomenon = models.TextField(verbose_name="故障现象")
     fault_reason = models.TextField(
         null=True, blank=True, verbose_name="故障原因")
@@ -132,29 +165,32 @@ class EquipmentRepairApplication(models.Model):
     def __str__(self):
         return f"{self.application_number} - {self.submitter_name}"
 
+    @staticmethod
+    def equipment_id_for(device_name):
+        """取设备名称中第二个"-"之前的字符串作为设备编号"""
+        parts = (device_name or '').split('-')
+        return '-'.join(parts[:2]) if len(parts) >= 2 else (device_name or '')
+
     def save(self, *args, **kwargs):
+        self.equipment_id = self.equipment_id_for(self.device_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'device_name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'equipment_id'}
         if not self.application_number:
             # 生成申请编号
             date_str = self.application_date.strftime("%Y%m%d")
             prefix = f"SBWX-{date_str}-"
 
-            # 获取当天已有的最大序号
-            existing_numbers = EquipmentRepairApplication.objects.filter(
-                application_date=self.application_date
-            ).values_list("application_number", flat=True)
-
-            max_serial = 0
-            for number in existing_numbers:
-                # 提取编号中的序号部分
-                serial_part = number.split("-")[-1]
-                try:
-                    serial_number = int(serial_part)
-                    if serial_number > max_serial:
-                        max_serial = serial_number
-                except ValueError:
-                    continue  # 忽略无法解析的编号
-
-            new_serial = max_serial + 1
+            # 通过编号序列计数器原子地分配当天序号，计数器不存在时以当天已有的最大序号为起点
+            new_serial = next_sequence(
+                "SBWX", date_str,
+                seed=lambda: latest_serial(
+                    EquipmentRepairApplication.objects.filter(
+                        application_date=self.application_date
+                    ).values_list("application_number", flat=True),
+                    separator="-"
+                )
+            )
             serial_number = f"{new_serial:02d}"
             self.application_number = prefix + serial_number
 
@@ -163,6 +199,10 @@ class EquipmentRepairApplication(models.Model):
     class Meta:
         verbose_name = "设备维修申请"
         verbose_name_plural = "设备维修申请"
+        indexes = [
+            # 设备病历按设备编号、故障日期排序和筛选
+            models.Index(fields=['equipment_id', 'application_date']),
+        ]
         permissions = [
             ("can_approve_line_leader", "Can approve as line leader"),
             ("can_approve_department_leader", "Can approve as department leader"),
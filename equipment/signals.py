@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from comprehensive.page_cache import EQUIPMENT_INFO_PAGE, SUPPLIER_MANAGEMENT_PAGE, invalidate_page_cache
+
+from .maintenance import refresh_next_due_dates
+from .models import Equipment, MaintenanceRecord, Supplier
+from .status_board import invalidate_status_board
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def update_status_board(sender, **kwargs):
+    """设备保存或删除后使状态看板缓存失效"""
+    invalidate_status_board()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def update_equipment_info_page(sender, **kwargs):
+    """设备保存或删除后使设备信息页面的表格缓存失效"""
+    invalidate_page_cache(EQUIPMENT_INFO_PAGE)
+
+
+# 影响下次保养日期的设备字段；只更新其他字段时无需重新计算
+NEXT_DUE_FIELDS = {'last_maintenance_date', 'maintenance_cycle'}
+
+
+@receiver(post_save, sender=Equipment)
+def update_equipment_next_due_date(sender, instance, raw=False, update_fields=None, **kwargs):
+    """新增设备或修改最后保养日期、保养周期后重新计算下次保养日期"""
+    if raw or (update_fields is not None and not NEXT_DUE_FIELDS & set(update_fields)):
+        return
+    refresh_next_due_dates([instance.equipment_id])
+
+
+@receiver(post_save, sender=MaintenanceRecord)
+@receiver(post_delete, sender=MaintenanceRecord)
+def update_maintenance_next_due_date(sender, instance, raw=False, **kwargs):
+    """保养记录新增、修改或删除后重新计算所属设备的下次保养日期"""
+    if raw:
+        return
+    refresh_next_due_dates([instance.equipment_id])
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def update_supplier_management_page(sender, **kwargs):
+    """供应商保存或删除后使供应商管理页面的表格缓存失效"""
+    invalidate_page_cache(SUPPLIER_MANAGEMENT_PAGE)
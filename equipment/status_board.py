@@ -0,0 +1,83 @@
+import hashlib
+import json
+import time
+from itertools import groupby
+
+from django.core.cache import cache
+
+from .models import Equipment
+
+# 设备状态看板的缓存，设备新增、修改或删除时通过版本号整体失效
+STATUS_BOARD_VERSION_KEY = 'equipment_status:version'
+# 兜底过期时间，防止绕过信号的批量更新长期显示旧状态；ETag 由缓存内容计算，过期后随内容一同更新
+STATUS_BOARD_TIMEOUT = 60
+STATUS_BOARD_FIELDS = (
+    'equipment_id', 'name', 'type', 'region', 'equipment_status',
+    'responsible_person', 'usage_frequency', 'remark',
+)
+
+
+def filter_equipment(status='', region=''):
+    """按设备状态和区域筛选，结果按 (区域, 设备编号) 排序，可直接用于分组"""
+    equipments = Equipment.objects.all()
+    if status:
+        equipments = equipments.filter(equipment_status=status)
+    if region:
+        equipments = equipments.filter(region=region)
+    return equipments.order_by('region', 'equipment_id')
+
+
+def group_by_region(equipments):
+    """将已按区域排序的设备分组，返回 [(区域, [设备, ...]), ...]，包含没有设备的区域"""
+    groups = {
+        region: list(devices)
+        for region, devices in groupby(equipments, key=lambda device: _region_of(device))
+    }
+    return [(region, groups.get(region, [])) for region in Equipment.REGIONS + [Equipment.OTHER_REGION]]
+
+
+def _region_of(device):
+    return device['region'] if isinstance(device, dict) else device.region
+
+
+def get_status_board_version():
+    version = cache.get(STATUS_BOARD_VERSION_KEY)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(STATUS_BOARD_VERSION_KEY, int(time.time()), None)
+        version = cache.get(STATUS_BOARD_VERSION_KEY)
+    return version
+
+
+def get_status_board(status='', region=''):
+    """
+    返回 (JSON 文本, ETag)，同一版本、同一筛选条件只查询一次数据库。
+
+    ETag 是内容的哈希，与内容一起缓存，因此过期重新查询后内容变化时 ETag 也随之变化。
+    """
+    version = get_status_board_version()
+    key = f'equipment_status:{version}:{status}:{region}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = filter_equipment(status, region).values(*STATUS_BOARD_FIELDS)
+    body = json.dumps({
+        'status': 'success',
+        'version': version,
+        'regions': [
+            {'region': name, 'devices': devices}
+            for name, devices in group_by_region(rows)
+        ],
+    }, ensure_ascii=False)
+    etag = f'"equipment-status-{hashlib.md5(body.encode()).hexdigest()}"'
+    cache.set(key, (body, etag), STATUS_BOARD_TIMEOUT)
+    return body, etag
+
+
+def invalidate_status_board():
+    """设备信息变化后调用，使所有筛选条件下的看板缓存失效"""
+    try:
+        cache.incr(STATUS_BOARD_VERSION_KEY)
+    except ValueError:
+        cache.set(STATUS_BOARD_VERSION_KEY, int(time.time()), None)
@@ -1,3 +1,269 @@
+import json
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .maintenance import pending_maintenance
+from .models import Equipment, EquipmentRepairApplication, MaintenanceRecord
+
+
+def create_user(username, *permissions):
+    user = User.objects.create_user(username, password='password')
+    for codename in permissions:
+        user.user_permissions.add(Permission.objects.get(content_type__app_label='equipment', codename=codename))
+    return user
+
+
+def create_equipment(equipment_id, **fields):
+    return Equipment.objects.create(
+        equipment_id=equipment_id, name=f'台架{equipment_id}', type='耐久台架', equipment_status='正常',
+        usage_frequency='高', responsible_person='张三', waiting_cost=0, debugging_cost=0, operating_cost=0,
+        **fields,
+    )
+
+
+def create_application(**approvals):
+    return EquipmentRepairApplication.objects.create(
+        employee_id='1001', submitter_name='张三', application_date=date(2025, 1, 1),
+        device_name='DCT-01-耐久台架', fault_phenomenon='油温过高', **approvals,
+    )
+
+
+class BulkReviewRepairApplicationsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(create_user('2001', 'can_approve_area_leader'))
+        create_user('3001', 'can_approve_device_repairer')
+
+    def review(self, numbers, decision, **extra):
+        return self.client.post(
+            reverse('equipment:bulk_review_repair_applications'),
+            json.dumps({'application_numbers': numbers, 'decision': decision, **extra}),
+            content_type='application/json',
+        )
+
+    def test_reject_skips_applications_already_approved(self):
+        pending = create_application()
+        approved = create_application(area_leader_approval=True, line_leader_approval=True, device_manager_approval=True)
+
+        response = self.review([pending.application_number, approved.application_number], 'reject', reason='信息不全')
+
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(response.json()['skipped'], [approved.application_number])
+        pending.refresh_from_db()
+        approved.refresh_from_db()
+        self.assertIs(pending.area_leader_approval, False)
+        self.assertIs(approved.device_manager_approval, True)
+
+    def test_reapproval_after_rejection_to_someone(self):
+        application = create_application(area_leader_approval=False, rejected_to='1001')
+        response = self.review([application.application_number], 'agree')
+        self.assertEqual(response.json()['updated'], 1)
+        application.refresh_from_db()
+        self.assertIs(application.area_leader_approval, True)
+        self.assertIsNone(application.rejected_to)
+
+    def test_rejected_to_must_be_a_reject_recipient(self):
+        application = create_application()
+
+        response = self.review([application.application_number], 'reject', rejected_to='9999')
+        self.assertEqual(response.status_code, 400)
+        application.refresh_from_db()
+        self.assertIsNone(application.area_leader_approval)
+
+        response = self.review([application.application_number], 'reject', rejected_to='3001')
+        self.assertEqual(response.json()['updated'], 1)
+        application.refresh_from_db()
+        self.assertEqual(application.rejected_to, '3001')
+
+    def test_malformed_payloads_are_rejected(self):
+        application = create_application()
+        url = reverse('equipment:bulk_review_repair_applications')
+        payloads = [
+            json.dumps(['not', 'an', 'object']),
+            json.dumps({'application_numbers': application.application_number, 'decision': 'agree'}),
+            json.dumps({'application_numbers': [application.application_number, 1], 'decision': 'agree'}),
+            json.dumps({'application_numbers': [['nested']], 'decision': 'agree'}),
+            json.dumps({'application_numbers': ['x' * 51], 'decision': 'agree'}),
+            json.dumps({'application_numbers': [f'{index:020d}' for index in range(501)], 'decision': 'agree'}),
+            json.dumps({'application_numbers': [application.application_number], 'decision': 'agree',
+                        'reason': 'x' * 70000}),
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload[:60]):
+                response = self.client.post(url, payload, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        application.refresh_from_db()
+        self.assertIsNone(application.area_leader_approval)
+
+
+class RepairPagePermissionQueryTests(TestCase):
+    # 会话、用户、年份、用户权限（两次）、申请列表、拥有维修员权限的用户、设备列表
+    EXPECTED_QUERIES = 8
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def render(self):
+        response = self.client.get(reverse('equipment:equipment_repair'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_independent_of_approver_count(self):
+        create_user('3000', 'can_approve_device_repairer')
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            self.render()
+
+        for index in range(1, 10):
+            create_user(f'300{index}', 'can_approve_device_repairer')
+        cache.clear()
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.render()
+        self.assertEqual(len(response.context['related_persons']), 10)
+
+    def test_warm_render_skips_permission_query(self):
+        create_user('3000', 'can_approve_device_repairer')
+        self.render()
+        with self.assertNumQueries(self.EXPECTED_QUERIES - 1):
+            self.render()
+
+
+class MaintenanceDueDateTests(TestCase):
+    def test_record_changes_refresh_next_due_date(self):
+        equipment = create_equipment('A-01', last_maintenance_date=date(2025, 1, 1), maintenance_cycle=90)
+        equipment.refresh_from_db()
+        self.assertEqual(equipment.next_due_date, date(2025, 4, 1))
+
+        record = MaintenanceRecord.objects.create(
+            equipment=equipment, maintenance_date=date(2025, 2, 1), description='换油',
+            next_maintenance_date=date(2025, 8, 1),
+        )
+        equipment.refresh_from_db()
+        self.assertEqual(equipment.next_due_date, date(2025, 8, 1))
+
+        record.delete()
+        equipment.refresh_from_db()
+        self.assertEqual(equipment.next_due_date, date(2025, 4, 1))
+
+    def test_cycle_change_refreshes_next_due_date(self):
+        equipment = create_equipment('A-01', last_maintenance_date=date(2025, 1, 1), maintenance_cycle=90)
+        equipment.maintenance_cycle = 30
+        equipment.save(update_fields=['maintenance_cycle'])
+        equipment.refresh_from_db()
+        self.assertEqual(equipment.next_due_date, date(2025, 1, 31))
+
+    def test_pending_list_matches_per_device_computation(self):
+        rng = random.Random(13)
+        today = timezone.localdate()
+        for index in range(60):
+            last = today - timedelta(days=rng.randint(0, 400)) if rng.random() < 0.8 else None
+            equipment = create_equipment(
+                f'E-{index:02d}', last_maintenance_date=last,
+                importance=rng.choice(['high', 'medium', 'low']), maintenance_cycle=rng.choice([30, 90, 180, 365]),
+            )
+            for _ in range(rng.randint(0, 3)):
+                MaintenanceRecord.objects.create(
+                    equipment=equipment, description='保养',
+                    maintenance_date=today - timedelta(days=rng.randint(0, 400)),
+                    next_maintenance_date=today + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.7 else None,
+                )
+
+        with self.assertNumQueries(1):
+            pending = {equipment.equipment_id for equipment in pending_maintenance(today)}
+        self.assertTrue(0 < len(pending) < 60)
+        self.assertEqual(pending, self.pending_per_device(today))
+
+    @staticmethod
+    def pending_per_device(today):
+        """原来逐台设备查询最新保养记录的计算方式"""
+        pending = set()
+        for equipment in Equipment.objects.all():
+            latest_record = MaintenanceRecord.objects.filter(equipment=equipment).order_by('-maintenance_date', '-id').first()
+            advance_notice_days = {'high': 30, 'medium': 15, 'low': 7}.get(equipment.importance, 15)
+            if latest_record and latest_record.next_maintenance_date:
+                next_maintenance_date = latest_record.next_maintenance_date
+            elif equipment.last_maintenance_date:
+                next_maintenance_date = equipment.last_maintenance_date + timedelta(days=equipment.maintenance_cycle)
+            else:
+                pending.add(equipment.equipment_id)
+                continue
+            if (next_maintenance_date - today).days <= advance_notice_days:
+                pending.add(equipment.equipment_id)
+        return pending
+
+
+class EquipmentStatusDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.equipment = create_equipment('A-01')
+
+    def get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('equipment:equipment_status_data'), **headers)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_equipment_save_changes_etag(self):
+        etag = self.get()['ETag']
+        self.equipment.equipment_status = '维修'
+        self.equipment.save()
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['regions'][0]['devices'][0]['equipment_status'], '维修')
+
+    def test_etag_follows_content_after_cache_expiry(self):
+        etag = self.get()['ETag']
+        # 批量更新不触发信号，缓存过期后重新查询，ETag 随内容变化
+        Equipment.objects.update(equipment_status='维修')
+        cache.clear()
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class MedicalCardFacetTests(TestCase):
+    FACET_PARAMS = {
+        'device_names': 'device_name', 'fault_levels': 'fault_level',
+        'fault_locations': 'fault_location', 'years': 'year', 'months': 'month',
+    }
+
+    def setUp(self):
+        rng = random.Random(15)
+        for _ in range(80):
+            EquipmentRepairApplication.objects.create(
+                employee_id='1001', submitter_name='张三', fault_phenomenon='油温过高',
+                device_name=f'DCT-0{rng.randint(1, 4)}-耐久台架',
+                application_date=date(rng.choice([2024, 2025]), rng.randint(1, 12), rng.randint(1, 28)),
+                fault_level=rng.choice(['一级', '二级', '三级', '']),
+                fault_locations=rng.choice(['电气', '机械', '液压', None]),
+            )
+
+    def filtered_count(self, params):
+        response = self.client.get(
+            reverse('equipment:equipment_medical_card'), params, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        return response.context['repair_records'].paginator.count
+
+    def test_facet_counts_equal_filtered_counts(self):
+        for selected in ({}, {'device_name': 'DCT-01', 'year': '2025'}, {'fault_level': '二级', 'month': '3'}):
+            response = self.client.get(reverse('equipment:equipment_medical_card'), selected)
+            for facet, param in self.FACET_PARAMS.items():
+                for value, count in response.context[facet]:
+                    with self.subTest(selected=selected, facet=facet, value=value):
+                        self.assertEqual(count, self.filtered_count({**selected, param: value}))
 
-# Create your tests here.
+    def test_non_numeric_year_matches_nothing(self):
+        self.assertEqual(self.filtered_count({'year': '二〇二五'}), 0)
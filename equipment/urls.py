@@ -11,6 +11,7 @@ urlpatterns = [
     path('delete-equipment/', delete_equipment, name='delete_equipment'),
 
     path('equipment_status/', equipment_status, name='equipment_status'),
+    path('api/equipment-status/', equipment_status_data, name='equipment_status_data'),
 
     path('equipment_maintenance/', equipment_maintenance, name='equipment_maintenance'),
     path('add_maintenance_record/', add_maintenance_record, name='add_maintenance_record'),
@@ -20,6 +21,7 @@ urlpatterns = [
     path('save_device_repair_application/', save_device_repair_application, name='save_device_repair_application'),
     path('get_device_repair_application_data/', get_device_repair_application_data, name='get_device_repair_application_data'),
     path('delete_device_repair_application/', delete_device_repair_application, name='delete_device_repair_application'),
+    path('api/bulk-review-repair-applications/', bulk_review_repair_applications, name='bulk_review_repair_applications'),
 
     path('equipment_medical_card/', equipment_medical_card, name='equipment_medical_card'),
 
@@ -4,20 +4,30 @@ import logging
 from datetime import datetime, timedelta
 
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
 from django.contrib import messages
-from django.db.models import Max, Q
+from django.db.models import Max
 from django.db.models.functions import ExtractYear
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
+from django.utils.http import urlencode
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic import TemplateView
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
 
+from comprehensive.page_cache import EQUIPMENT_INFO_PAGE, SUPPLIER_MANAGEMENT_PAGE, page_cache_context
+from comprehensive.permission_index import users_with_permission
 from .models import Equipment, MaintenanceRecord, EquipmentRepairApplication, Supplier  # 添加 Supplier
 from .forms import MaintenanceRecordForm
+from .approvals import (
+    APPROVAL_ROLE_LABELS, APPROVAL_STATUS_COLORS, approver_role, decision_updates, is_reject_recipient,
+    with_approval_status,
+)
+from .maintenance import pending_maintenance
+from .medical_card import MEDICAL_CARD_PAGE_SIZE, apply_filters, medical_card_facets, parse_filters
+from .status_board import filter_equipment, get_status_board, group_by_region
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +39,10 @@ class EquipmentInformationView(TemplateView):
         context = super().get_context_data(**kwargs)
         context.update({
             'page_title': "设备信息",
+            # 查询集只在表格片段缓存未命中时才执行
             'equipment_list': Equipment.objects.all(),
             'user_has_permission': self.request.user.has_perm('equipment.change_equipment'),
+            **page_cache_context(EQUIPMENT_INFO_PAGE),
         })
         return context
 
@@ -141,43 +153,12 @@ def equipment_status(request):
     equipment_status_filter = request.GET.get('equipment_status', '')
     region_filter = request.GET.get('region', '')
 
-    # 获取所有设备
-    equipment_list = Equipment.objects.all()
-
-    # 根据设备状态筛选
-    if equipment_status_filter:
-        equipment_list = equipment_list.filter(equipment_status=equipment_status_filter)
-
-    # 根据区域筛选
-    if region_filter:
-        if region_filter in ['A区', 'B区', 'C区', 'D区']:
-            region_letter = region_filter[0]
-            equipment_list = equipment_list.filter(equipment_id__icontains=region_letter)
-        elif region_filter == '其他':
-            equipment_list = equipment_list.exclude(
-                Q(equipment_id__icontains='A') |
-                Q(equipment_id__icontains='B') |
-                Q(equipment_id__icontains='C') |
-                Q(equipment_id__icontains='D')
-            )
-
-    # 区域名称列表
-    region_names = ['A区', 'B区', 'C区', 'D区', '其他']
-    region_devices = {region: [] for region in region_names}
-
-    # 将设备按照区域分类
-    for device in equipment_list:
-        equipment_id = device.equipment_id.upper()
-        for region in region_names[:-1]:
-            if region[0] in equipment_id:
-                region_devices[region].append(device)
-                break
-        else:
-            region_devices['其他'].append(device)
+    # 区域已随设备编号保存在 region 字段中，按 (区域, 设备编号) 一次查询后分组
+    equipment_list = filter_equipment(equipment_status_filter, region_filter)
 
     context = {
         'equipment_list': equipment_list,
-        'region_device_items': [(name, region_devices[name]) for name in region_names],
+        'region_device_items': group_by_region(equipment_list),
         'page_title': '设备状态',
         'request': request,
     }
@@ -185,8 +166,25 @@ def equipment_status(request):
     return render(request, 'equipment_status.html', context)
 
 
+def equipment_status_data(request):
+    """
+    设备状态看板的 JSON 数据，供定时刷新的大屏使用。
+
+    结果按筛选条件缓存，设备变化时失效；内容未变化时对 If-None-Match 返回 304。
+    """
+    equipment_status_filter = request.GET.get('equipment_status', '')
+    region_filter = request.GET.get('region', '')
+
+    body, etag = get_status_board(equipment_status_filter, region_filter)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 def equipment_maintenance(request):
-    equipments = Equipment.objects.all()
     records = MaintenanceRecord.objects.select_related('equipment').all().order_by('equipment__equipment_id')
 
     # 获取年份筛选参数，如果为空则不进行年份过滤
@@ -204,46 +202,11 @@ def equipment_maintenance(request):
     if selected_equipment_id:
         records = records.filter(equipment__equipment_id=selected_equipment_id)
 
-    today = timezone.now().date()
-
-    # 获取所有设备及其最新保养记录
-    equipments_with_maintenance = Equipment.objects.all()
-    pending_equipments = []
-
-    for equipment in equipments_with_maintenance:
-        # 获取设备的最新保养记录
-        latest_record = MaintenanceRecord.objects.filter(
-            equipment=equipment
-        ).order_by('-maintenance_date').first()
-
-        # 根据设备重要程度设置提前提醒天数
-        advance_notice_days = {
-            'high': 30,    # 高重要度设备提前30天提醒
-            'medium': 15,  # 中等重要度设备提前15天提醒
-            'low': 7       # 低重要度设备提前7天提醒
-        }.get(equipment.importance, 15)  # 默认提前15天
-
-        # 获取下次保养日期
-        if latest_record and latest_record.next_maintenance_date:
-            # 优先使用保养记录中设置的下次保养日期
-            next_maintenance_date = latest_record.next_maintenance_date
-            equipment.next_maintenance_date = next_maintenance_date
-        elif equipment.last_maintenance_date:
-            # 如果没有保养记录或没有设置下次保养日期，使用设备的最后保养日期计算
-            next_maintenance_date = equipment.last_maintenance_date + timedelta(days=equipment.maintenance_cycle)
-            equipment.next_maintenance_date = next_maintenance_date
-        else:
-            # 如果没有任何保养记录和最后保养日期，将其添加到待保养列表
-            pending_equipments.append(equipment)
-            continue
-
-        # 检查是否需要保养
-        days_until_maintenance = (next_maintenance_date - today).days
-        if days_until_maintenance <= advance_notice_days:
-            pending_equipments.append(equipment)
+    # 待保养清单直接按冗余的下次保养日期做一次范围查询
+    pending_equipments = pending_maintenance()
 
     # 获取所有设备编号用于筛选下拉框
-    equipment_ids = equipments.values_list('equipment_id', flat=True).distinct()
+    equipment_ids = Equipment.objects.values_list('equipment_id', flat=True)
 
     # 获取所有保养年份列表用于年份筛选，包括全部选项
     maintenance_years = MaintenanceRecord.objects.dates('maintenance_date', 'year', order='DESC')
@@ -251,7 +214,6 @@ def equipment_maintenance(request):
     
     context = {
         'page_title': '设备保养',
-        'equipments': equipments,
         'records': records,
         'pending_equipments': pending_equipments,
         'equipment_ids': equipment_ids,
@@ -274,9 +236,10 @@ def add_maintenance_record(request):
             equipment = maintenance_record.equipment
             maintenance_record.maintenance_date = maintenance_record.maintenance_date or today
             maintenance_record.next_maintenance_date = maintenance_record.next_maintenance_date or next_year
-            maintenance_record.save()
-            equipment.last_maintenance_date = maintenance_record.maintenance_date
-            equipment.save()
+            with transaction.atomic():
+                maintenance_record.save()
+                equipment.last_maintenance_date = maintenance_record.maintenance_date
+                equipment.save(update_fields=['last_maintenance_date'])
             return redirect('equipment:equipment_maintenance')
     else:
         initial_data = {
@@ -326,9 +289,14 @@ def equipment_repair(request):
     else:
         applications = EquipmentRepairApplication.objects.filter(employee_id=user.username)
 
+    # 审批状态在数据库中计算，可按状态筛选
+    applications = with_approval_status(applications)
+    status_filter = request.GET.get('status', '')
+    if status_filter:
+        applications = applications.filter(approval_status=status_filter)
+
     applications_list = []
-    for app in applications:
-        approval_status, status_color = get_approval_status(app)
+    for app in applications.order_by('-application_date', '-id'):
         applications_list.append({
             'id': app.id,
             'application_number': app.application_number,
@@ -347,8 +315,8 @@ def equipment_repair(request):
             'area_leader_approval': app.area_leader_approval,
             'device_manager_approval': app.device_manager_approval,
             'device_repairer_approval': app.device_repairer_approval,
-            'approval_status': approval_status,
-            'status_color': status_color,
+            'approval_status': app.approval_status,
+            'status_color': app.status_color,
             'line_leader_rejection_reason': app.line_leader_rejection_reason or '',
             'department_leader_rejection_reason': app.department_leader_rejection_reason or '',
             'area_leader_rejection_reason': app.area_leader_rejection_reason or '',
@@ -356,7 +324,6 @@ def equipment_repair(request):
             'device_repairer_rejection_reason': app.device_repairer_rejection_reason or '',
         })
 
-    applications_list.sort(key=lambda x: x['application_date'], reverse=True)
     context['applications'] = applications_list
     context['equipments'] = Equipment.objects.all()
 
@@ -415,33 +382,13 @@ def equipment_repair(request):
     
     context['user_permissions'] = user_permissions
 
-    return render(request, 'equipment_repair.html', context)
-
+    # 可以批量审批的角色
+    bulk_review_role, _ = approver_role(user)
+    context['bulk_review_role'] = APPROVAL_ROLE_LABELS.get(bulk_review_role, '')
+    context['approval_status_choices'] = list(APPROVAL_STATUS_COLORS)
+    context['status_filter'] = status_filter
 
-def get_approval_status(app):
-    # 如果有被驳回并指定了接收人，按照新的逻辑处理
-    if app.rejected_to:
-        return '待区域主管审批', 'orange'  # 所有被驳回的申请都显示为待区域主管审批
-        
-    # 正常审批流程的状态判断
-    if app.area_leader_approval is None:
-        return '待区域主管审批', 'orange'
-    elif app.area_leader_approval is False:
-        return '区域主管已驳回', 'red'
-    elif app.line_leader_approval is None:
-        return '待条线领导审批', 'orange'
-    elif app.line_leader_approval is False:
-        return '条线领导已驳回', 'red'
-    elif app.device_manager_approval is False:
-        return '设备管理员已驳回', 'red'
-    elif all([
-        app.area_leader_approval is True,
-        app.line_leader_approval is True,
-        app.device_manager_approval is True,
-    ]):
-        return '审核通过', 'green'
-    else:
-        return '待审核', 'orange'
+    return render(request, 'equipment_repair.html', context)
 
 
 def get_related_persons(application):
@@ -450,27 +397,19 @@ def get_related_persons(application):
         related_persons.append({'name': application.submitter_name, 'employee_id': application.employee_id})
 
     approver_permissions = [
-        # 'can_approve_area_leader',
-        'can_approve_device_repairer',
-        # 'can_approve_line_leader',
-        # 'can_approve_department_leader',
-        # 'can_approve_device_manager',
+        # 'equipment.can_approve_area_leader',
+        'equipment.can_approve_device_repairer',
+        # 'equipment.can_approve_line_leader',
+        # 'equipment.can_approve_department_leader',
+        # 'equipment.can_approve_device_manager',
     ]
-    for perm_codename in approver_permissions:
-        users = get_users_with_permission(perm_codename)
-        for user in users:
-            person = {'name': user.get_full_name(), 'employee_id': user.username}
+    for permission in approver_permissions:
+        for person in users_with_permission(permission):
             if person not in related_persons:
                 related_persons.append(person)
     return related_persons
 
 
-def get_users_with_permission(permission_codename):
-    content_type = ContentType.objects.get_for_model(EquipmentRepairApplication)
-    permission = Permission.objects.get(codename=permission_codename, content_type=content_type)
-    return User.objects.filter(Q(user_permissions=permission) | Q(groups__permissions=permission)).distinct()
-
-
 @login_required
 def save_device_repair_application(request):
     if request.method == 'POST':
@@ -509,17 +448,13 @@ def save_device_repair_application(request):
                     area_leader_rejection_reason = request.POST.get('area_leader_rejection_reason')
                     area_leader_rejected_to = request.POST.get('area_leader_rejected_to')
 
-                    if area_leader_approval == 'agree':
-                        application.area_leader_approval = True
-                        application.area_leader_rejection_reason = ''
-                        application.rejected_to = None
-                    elif area_leader_approval == 'reject':
-                        application.area_leader_approval = False
-                        application.area_leader_rejection_reason = area_leader_rejection_reason
-                        application.rejected_to = area_leader_rejected_to
-                        # 重置所有后续审批状态
-                        application.line_leader_approval = None
-                        application.device_manager_approval = None
+                    if area_leader_approval in ('agree', 'reject'):
+                        # 驳回时重置所有后续审批状态
+                        for field, value in decision_updates(
+                            'area_leader', area_leader_approval,
+                            area_leader_rejection_reason, area_leader_rejected_to
+                        ).items():
+                            setattr(application, field, value)
 
                     # 保存区域领导可编辑的字段
                     application.application_date = datetime.strptime(application_date_str, '%Y-%m-%d').date()
@@ -536,21 +471,13 @@ def save_device_repair_application(request):
                     line_leader_rejection_reason = request.POST.get('line_leader_rejection_reason')
                     line_leader_rejected_to = request.POST.get('line_leader_rejected_to')
 
-                    if line_leader_approval == 'agree':
-                        application.line_leader_approval = True
-                        application.line_leader_rejection_reason = ''
-                        application.rejected_to = None
-                    elif line_leader_approval == 'reject':
-                        application.line_leader_approval = False
-                        application.line_leader_rejection_reason = line_leader_rejection_reason
-                        application.rejected_to = line_leader_rejected_to
-                        # 重置驳回接收人之后的所有审批状态
-                        # 根据驳回接收人的角色重置不同的审批状态
-                        users_with_perm = get_users_with_permission('can_approve_area_leader')
-                        if any(user.username == rejected_to for user in users_with_perm):
-                            application.area_leader_approval = None
-                            application.line_leader_approval = None
-                            application.device_manager_approval = None
+                    if line_leader_approval in ('agree', 'reject'):
+                        # 驳回时根据驳回接收人的角色重置不同的审批状态
+                        for field, value in decision_updates(
+                            'line_leader', line_leader_approval,
+                            line_leader_rejection_reason, line_leader_rejected_to
+                        ).items():
+                            setattr(application, field, value)
 
                     application.save()
                     messages.success(request, '条线领导审批意见已提交！')
@@ -562,28 +489,13 @@ def save_device_repair_application(request):
                     device_manager_rejection_reason = request.POST.get('device_manager_rejection_reason')
                     device_manager_rejected_to = request.POST.get('device_manager_rejected_to')
 
-                    if device_manager_approval == 'agree':
-                        application.device_manager_approval = True
-                        application.device_manager_rejection_reason = ''
-                        application.rejected_to = None
-                    elif device_manager_approval == 'reject':
-                        application.device_manager_approval = False
-                        application.device_manager_rejection_reason = device_manager_rejection_reason
-                        rejected_to = device_manager_rejected_to
-                        application.rejected_to = rejected_to
-                        # 根据驳回接收人的角色重置不同的审批状态
-                        users_with_area_leader_perm = get_users_with_permission('can_approve_area_leader')
-                        users_with_line_leader_perm = get_users_with_permission('can_approve_line_leader')
-                        
-                        if any(user.username == rejected_to for user in users_with_area_leader_perm):
-                            # 驳回给区域主管，重置所有状态
-                            application.area_leader_approval = None
-                            application.line_leader_approval = None
-                            application.device_manager_approval = None
-                        elif any(user.username == rejected_to for user in users_with_line_leader_perm):
-                            # 驳回给条线领导，重置条线领导及之后的状态
-                            application.line_leader_approval = None
-                            application.device_manager_approval = None
+                    if device_manager_approval in ('agree', 'reject'):
+                        # 驳回给区域主管时重置所有状态，驳回给条线领导时重置条线领导及之后的状态
+                        for field, value in decision_updates(
+                            'device_manager', device_manager_approval,
+                            device_manager_rejection_reason, device_manager_rejected_to
+                        ).items():
+                            setattr(application, field, value)
 
                     application.save()
                     messages.success(request, '设备管理员审批意见已提交！')
@@ -670,9 +582,8 @@ def get_device_repair_application_data(request):
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         application_id = request.POST.get('application_id')
         try:
-            application = EquipmentRepairApplication.objects.get(id=application_id)
-            # 添加审批状态
-            status_text, status_color = get_approval_status(application)
+            # 审批状态由数据库注解计算
+            application = with_approval_status(EquipmentRepairApplication.objects).get(id=application_id)
             
             data = {
                 'application_number': application.application_number,
@@ -693,8 +604,8 @@ def get_device_repair_application_data(request):
                 'line_leader_rejection_reason': application.line_leader_rejection_reason or '',
                 'area_leader_rejection_reason': application.area_leader_rejection_reason or '',
                 'device_manager_rejection_reason': application.device_manager_rejection_reason or '',
-                'approval_status': status_text,  # 添加审批状态文本
-                'status_color': status_color     # 添加审批状态颜色
+                'approval_status': application.approval_status,  # 添加审批状态文本
+                'status_color': application.status_color         # 添加审批状态颜色
             }
             return JsonResponse({'status': 'success', 'data': data})
         except EquipmentRepairApplication.DoesNotExist:
@@ -721,6 +632,105 @@ def delete_device_repair_application(request):
             messages.error(request, '未提供申请编号，无法删除。')
     return redirect('equipment:equipment_repair')
 
+
+# 单次批量审批的申请数量上限
+BULK_REVIEW_LIMIT = 500
+# 批量审批请求体的字节数上限，足以容纳 BULK_REVIEW_LIMIT 个申请编号和驳回原因
+BULK_REVIEW_MAX_BODY = 64 * 1024
+APPLICATION_NUMBER_MAX_LENGTH = EquipmentRepairApplication._meta.get_field('application_number').max_length
+
+
+@login_required
+def bulk_review_repair_applications(request):
+    """
+    批量同意或驳回维修申请。
+
+    请求体为 JSON：{"application_numbers": [...], "decision": "agree" | "reject",
+    "reason": 驳回原因, "rejected_to": 驳回接收人工号}。
+    按当前用户的审批角色处理，所有符合审批条件的申请在一个事务中用一条 UPDATE 更新；
+    尚未轮到该角色审批或不存在的申请编号在 skipped 中返回。
+    """
+    if request.method != 'POST':
+        return JsonResponse({
+            'status': 'error',
+            'message': '无效的请求方法'
+        }, status=405)
+
+    if len(request.body) > BULK_REVIEW_MAX_BODY:
+        return JsonResponse({
+            'status': 'error',
+            'message': '请求数据过大'
+        }, status=400)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({
+            'status': 'error',
+            'message': '无效的JSON数据'
+        }, status=400)
+
+    numbers = data.get('application_numbers') or []
+    if not isinstance(numbers, list) or not all(
+        isinstance(number, str) and len(number) <= APPLICATION_NUMBER_MAX_LENGTH for number in numbers
+    ):
+        return JsonResponse({
+            'status': 'error',
+            'message': '申请编号必须是字符串列表'
+        }, status=400)
+    numbers = list(dict.fromkeys(numbers))
+    decision = data.get('decision')
+    if not numbers:
+        return JsonResponse({
+            'status': 'error',
+            'message': '请选择要审批的申请'
+        }, status=400)
+    if len(numbers) > BULK_REVIEW_LIMIT:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'一次最多审批 {BULK_REVIEW_LIMIT} 条申请'
+        }, status=400)
+    if decision not in ('agree', 'reject'):
+        return JsonResponse({
+            'status': 'error',
+            'message': '审批意见必须为 agree 或 reject'
+        }, status=400)
+
+    role, condition = approver_role(request.user)
+    if role is None:
+        return JsonResponse({
+            'status': 'error',
+            'message': '您没有审批权限'
+        }, status=403)
+
+    rejected_to = str(data.get('rejected_to') or '').strip() or None
+    if decision == 'reject' and rejected_to is not None and not is_reject_recipient(rejected_to):
+        return JsonResponse({
+            'status': 'error',
+            'message': f'驳回接收人 {rejected_to} 无效'
+        }, status=400)
+
+    updates = decision_updates(role, decision, data.get('reason', ''), rejected_to)
+    with transaction.atomic():
+        eligible = list(
+            EquipmentRepairApplication.objects.select_for_update()
+            .filter(condition, application_number__in=numbers)
+            .values_list('application_number', flat=True)
+        )
+        updated = EquipmentRepairApplication.objects.filter(application_number__in=eligible).update(**updates)
+
+    eligible = set(eligible)
+    skipped = [number for number in numbers if number not in eligible]
+    logger.info(f"{request.user.username} 以{APPROVAL_ROLE_LABELS[role]}身份批量{'同意' if decision == 'agree' else '驳回'} {updated} 条维修申请")
+    return JsonResponse({
+        'status': 'success',
+        'message': f'已审批 {updated} 条申请' + (f'，{len(skipped)} 条未处理' if skipped else ''),
+        'updated': updated,
+        'skipped': skipped,
+    })
+
 #===================================================
 def reject_application(request):
     if request.method == 'POST':
@@ -744,68 +754,37 @@ def reject_application(request):
 
 def equipment_medical_card(request):
     """设备病历视图函数"""
-    # 获取所有维修申请记录，但先不排序
+    selected = parse_filters(request.GET)
     repair_records = EquipmentRepairApplication.objects.all()
+    if selected is None:
+        # 年份或月份不是数字，没有匹配的记录
+        selected = {}
+        repair_records = repair_records.none()
+    else:
+        repair_records = apply_filters(repair_records, selected)
 
-    # 处理设备编号：获取第二个"-"之前的字符串作为设备编号
-    for record in repair_records:
-        parts = record.device_name.split('-')
-        if len(parts) >= 2:
-            record.equipment_id = '-'.join(parts[:2])
-        else:
-            record.equipment_id = record.device_name
-
-    # 根据筛选条件过滤数据
-    selected_device = request.GET.get('device_name', '')
-    selected_fault_level = request.GET.get('fault_level', '')
-    selected_fault_location = request.GET.get('fault_location', '')
-    selected_year = request.GET.get('year', '')
-    selected_month = request.GET.get('month', '')
-    
-    # 将QuerySet转换为list以进行自定义排序
-    repair_records = list(repair_records)
-    
-    # 多重排序：先按设备编号升序，再按故障日期升序
-    repair_records.sort(key=lambda x: (x.equipment_id, x.application_date))
-    
-    # 应用其他筛选条件
-    if selected_device:
-        repair_records = [r for r in repair_records if r.equipment_id == selected_device]
-    if selected_fault_level:
-        repair_records = [r for r in repair_records if r.fault_level == selected_fault_level]
-    if selected_fault_location:
-        repair_records = [r for r in repair_records if r.fault_locations == selected_fault_location]
-    if selected_year:
-        repair_records = [r for r in repair_records if str(r.application_date.year) == selected_year]
-    if selected_month:
-        repair_records = [r for r in repair_records if str(r.application_date.month) == selected_month]
-
-    # 获取筛选选项的唯一值
-    device_ids = sorted(set(record.equipment_id for record in repair_records))
-    fault_levels = sorted(set(record.fault_level for record in repair_records if record.fault_level))
-    fault_locations = sorted(set(record.fault_locations for record in repair_records if record.fault_locations))
-    years = sorted(set(record.application_date.year for record in repair_records), reverse=True)
-    months = list(range(1, 13))
+    # 先按设备编号升序，再按故障日期升序，筛选、排序和分页都在数据库中完成
+    repair_records = repair_records.order_by('equipment_id', 'application_date', 'id')
+    page = Paginator(repair_records, MEDICAL_CARD_PAGE_SIZE).get_page(request.GET.get('page', 1))
 
     context = {
         'page_title': '设备病历',
-        'repair_records': repair_records,
-        'device_names': device_ids,
-        'fault_levels': fault_levels,
-        'fault_locations': fault_locations,
-        'years': years,
-        'months': months,
-        'selected_device': selected_device,
-        'selected_fault_level': selected_fault_level,
-        'selected_fault_location': selected_fault_location,
-        'selected_year': selected_year,
-        'selected_month': selected_month,
+        'repair_records': page,
+        'selected_device': request.GET.get('device_name', ''),
+        'selected_fault_level': request.GET.get('fault_level', ''),
+        'selected_fault_location': request.GET.get('fault_location', ''),
+        'selected_year': request.GET.get('year', ''),
+        'selected_month': request.GET.get('month', ''),
+        # 翻页链接中保留的筛选参数
+        'filter_query': f'{urlencode(selected)}&' if selected else '',
     }
 
-    # 如果是AJAX请求，只返回表格部分的HTML
+    # 如果是AJAX请求（翻页），只返回表格部分的HTML，不计算筛选项
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render(request, 'equipment_medical_card.html', context)
-    
+        return render(request, 'equipment_medical_card_table.html', context)
+
+    # 各筛选项的取值和记录数由 GROUP BY 查询得到
+    context.update(medical_card_facets(selected))
     return render(request, 'equipment_medical_card.html', context)
 
 
@@ -859,5 +838,6 @@ def supplier_management(request):
         'page_title': '供应商管理',
         'suppliers': suppliers,
         'can_manage': can_manage,
+        **page_cache_context(SUPPLIER_MANAGEMENT_PAGE),
     }
     return render(request, 'supplier_management.html', context)
\ No newline at end of file
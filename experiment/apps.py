@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExperimentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "experiment"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,344 @@
+import bisect
+import csv
+import io
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from comprehensive.sequences import generate_record_ids
+from .models import Device_run, DeviceDailyUsage
+
+logger = logging.getLogger(__name__)
+
+# 设备运行记录必填字段 -> 中文名称
+DEVICE_RUN_REQUIRED_FIELDS = {
+    'task_number': '任务单号',
+    'task_status': '任务状态',
+    'transmission_model': '样件型号',
+    'test_content': '试验内容',
+    'date': '日期',
+    'sample_number': '样品编号',
+    'device_number': '设备编号',
+    'bench_status': '台架状态'
+}
+
+# 台架状态 -> (对应时长字段, 时长名称)
+BENCH_STATUS_TIME_FIELDS = {
+    '试验调试': ('debugging', '调试时长'),
+    '试验运行': ('running', '运行时长'),
+    '样件故障': ('sample_fault', '样件故障时长'),
+    '设备故障': ('bench_fault', '台架故障时长'),
+}
+
+HOUR_FIELDS = ('debugging', 'running', 'sample_fault', 'bench_fault')
+
+IMPORT_FIELDS = (
+    'task_number', 'task_status', 'transmission_model', 'test_content', 'date',
+    'sample_number', 'device_number', 'bench_status', 'remarks',
+    'debugging', 'running', 'sample_fault', 'bench_fault',
+    'progress', 'dvp_plan', 'responsible_person',
+)
+
+
+def _build_header_aliases():
+    """导入文件表头既可以使用字段名，也可以使用模型或表单上的中文名称"""
+    aliases = {}
+    for name in IMPORT_FIELDS:
+        aliases[name] = name
+        verbose_name = str(Device_run._meta.get_field(name).verbose_name)
+        aliases.setdefault(verbose_name, name)
+    for name, label in DEVICE_RUN_REQUIRED_FIELDS.items():
+        aliases.setdefault(label, name)
+    aliases.update({'调试时长': 'debugging', '运行时长': 'running',
+                    '样件故障时长': 'sample_fault', '台架故障时长': 'bench_fault'})
+    return aliases
+
+
+HEADER_ALIASES = _build_header_aliases()
+
+
+class DeviceRunImportError(Exception):
+    """导入文件本身无法解析（格式不支持、缺少表头等）"""
+
+
+def validate_device_run_hours(bench_status, debugging, running, sample_fault, bench_fault, remarks):
+    """校验时长相关规则，返回错误信息，校验通过时返回 None"""
+    if debugging + running + sample_fault + bench_fault == 0:
+        return '四个时长（调试、运行、样件故障、台架故障）的总和不能为零'
+
+    hours = {
+        'debugging': debugging,
+        'running': running,
+        'sample_fault': sample_fault,
+        'bench_fault': bench_fault,
+    }
+    if bench_status in BENCH_STATUS_TIME_FIELDS:
+        field, label = BENCH_STATUS_TIME_FIELDS[bench_status]
+        if hours[field] <= 0:
+            return f'台架状态为"{bench_status}"时，{label}必须大于零'
+
+    if (sample_fault > 0 or bench_fault > 0) and not remarks:
+        return '当"样件故障时长"或"台架故障时长"大于零时，备注不能为空'
+
+    return None
+
+
+def parse_progress(value):
+    """将 "35"、"35%"、35 等进度写法统一转换为数值"""
+    if value is None or value == '':
+        return 0.0
+    return float(str(value).strip().replace('%', '') or 0)
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'日期格式无法识别: {text}')
+
+
+def _parse_hours(value, label):
+    if value is None or str(value).strip() == '':
+        return Decimal('0')
+    try:
+        hours = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'{label}不是有效的数字: {value}')
+    if hours < 0:
+        raise ValueError(f'{label}不能为负数')
+    return hours
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _map_header(header):
+    mapped = [HEADER_ALIASES.get(_text(name)) for name in header]
+    missing = [label for field, label in DEVICE_RUN_REQUIRED_FIELDS.items() if field not in mapped]
+    if missing:
+        raise DeviceRunImportError(f'导入文件缺少必需的列: {"、".join(missing)}')
+    return mapped
+
+
+def _iter_csv_rows(file):
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    header = next(reader, None)
+    if header is None:
+        raise DeviceRunImportError('导入文件为空')
+    mapped = _map_header(header)
+    for row_number, values in enumerate(reader, start=2):
+        if any(_text(value) for value in values):
+            yield row_number, {field: value for field, value in zip(mapped, values) if field}
+
+
+def _iter_xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise DeviceRunImportError('导入 Excel 文件需要安装 openpyxl，或将文件另存为 CSV 后导入')
+
+    # 只读模式逐行读取，不会把整个工作簿载入内存
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise DeviceRunImportError('导入文件为空')
+        mapped = _map_header(header)
+        for row_number, values in enumerate(rows, start=2):
+            if any(_text(value) for value in values):
+                yield row_number, {field: value for field, value in zip(mapped, values) if field}
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(file, filename):
+    """按文件扩展名逐行读取 CSV/XLSX，产出 (行号, {字段名: 值})，行号从表头下一行的 2 开始"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return _iter_csv_rows(file)
+    if extension in ('.xlsx', '.xlsm'):
+        return _iter_xlsx_rows(file)
+    raise DeviceRunImportError('仅支持导入 .csv 或 .xlsx 文件')
+
+
+def _clean_row(values, responsible_person):
+    """单行校验并转换为 Device_run 字段，不访问数据库"""
+    missing = [label for field, label in DEVICE_RUN_REQUIRED_FIELDS.items() if not _text(values.get(field))]
+    if missing:
+        raise ValueError(f'以下必填字段不能为空: {"、".join(missing)}')
+
+    hours = {field: _parse_hours(values.get(field), str(Device_run._meta.get_field(field).verbose_name))
+             for field in HOUR_FIELDS}
+    total = sum(hours.values())
+    if total > 24:
+        raise ValueError('四个时长的总和不能超过24小时')
+
+    data = {field: _text(values.get(field)) for field in (
+        'task_number', 'task_status', 'transmission_model', 'test_content',
+        'sample_number', 'device_number', 'bench_status', 'remarks',
+    )}
+    message = validate_device_run_hours(data['bench_status'], remarks=data['remarks'], **hours)
+    if message:
+        raise ValueError(message)
+
+    try:
+        progress = parse_progress(values.get('progress'))
+    except ValueError:
+        raise ValueError(f'试验进度不是有效的数字: {values.get("progress")}')
+
+    day = _parse_date(values.get('date'))
+    data.update(hours)
+    data.update({
+        'day': day,
+        # 与单条保存一致，日期设置为当天中午12点，避免时区转换导致日期变化
+        'date': timezone.make_aware(datetime.combine(day, time(12))),
+        'idle': Decimal('24') - total,
+        'progress_value': progress,
+        'progress': f"{progress:g}%",
+        'dvp_plan': _text(values.get('dvp_plan')) or '是',
+        'responsible_person': _text(values.get('responsible_person')) or responsible_person,
+    })
+    return data
+
+
+class _ProgressHistory:
+    """
+    按 (任务单号, 设备编号) 记录已有的 (日期, 进度)，用于批量校验重复记录与进度递增。
+
+    每个分块只对首次出现的组合查询一次数据库，已通过校验的导入行也会加入历史，
+    因此同一文件中前后行之间同样会互相校验。
+    """
+
+    def __init__(self):
+        self._history = {}
+
+    def load(self, keys):
+        missing = {key for key in keys if key not in self._history}
+        if not missing:
+            return
+        for key in missing:
+            self._history[key] = []
+        runs = Device_run.objects.filter(
+            task_number__in={task for task, _ in missing},
+            device_number__in={device for _, device in missing},
+        ).values_list('task_number', 'device_number', 'date', 'progress')
+        for task_number, device_number, run_date, progress in runs.iterator():
+            key = (task_number, device_number)
+            if key not in missing:
+                continue
+            try:
+                value = parse_progress(progress)
+            except ValueError:
+                value = 0.0
+            self._history[key].append((timezone.localtime(run_date).date(), value))
+        for key in missing:
+            self._history[key].sort()
+
+    def check(self, key, day, running, progress):
+        entries = self._history[key]
+        index = bisect.bisect_left(entries, (day,))
+        if index < len(entries) and entries[index][0] == day:
+            return f'设备 {key[1]} 在 {day} 已存在任务 {key[0]} 的运行记录'
+        if running > 0 and index > 0:
+            previous = entries[index - 1][1]
+            if progress <= previous:
+                return f'运行时长大于零时，试验进度应该比原来的进度({previous:g}%)有所增加'
+        return None
+
+    def add(self, key, day, progress):
+        bisect.insort(self._history[key], (day, progress))
+
+
+def _save_chunk(rows):
+    """为一个分块按年月成批分配ID，并在同一事务中写入记录和更新日利用率汇总"""
+    by_period = defaultdict(list)
+    for row in rows:
+        by_period[row['day'].strftime('%Y%m')].append(row)
+
+    with transaction.atomic():
+        runs = []
+        for year_month, period_rows in by_period.items():
+            record_ids = generate_record_ids(Device_run, 'id', 'DR', year_month, count=len(period_rows))
+            for record_id, row in zip(record_ids, period_rows):
+                runs.append(Device_run(
+                    id=record_id,
+                    **{field: row[field] for field in IMPORT_FIELDS},
+                    idle=row['idle'],
+                ))
+        Device_run.objects.bulk_create(runs)
+        DeviceDailyUsage.rebuild(
+            start=min(row['day'] for row in rows),
+            end=max(row['day'] for row in rows),
+            device_numbers={row['device_number'] for row in rows},
+        )
+    return len(runs)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_device_runs(rows, responsible_person='', batch_size=500):
+    """
+    批量导入设备运行记录。
+
+    rows 为 iter_import_rows 产出的 (行号, 数据) 迭代器，按 batch_size 分块处理：
+    先逐行校验，再对整个分块做一次重复与进度查询，最后在一个事务内 bulk_create。
+    返回 {'created': 成功条数, 'errors': [{'row': 行号, 'message': 原因}, ...]}。
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size 必须大于零')
+
+    history = _ProgressHistory()
+    created = 0
+    errors = []
+    for chunk in _chunks(rows, batch_size):
+        cleaned = []
+        for row_number, values in chunk:
+            try:
+                cleaned.append((row_number, _clean_row(values, responsible_person)))
+            except ValueError as e:
+                errors.append({'row': row_number, 'message': str(e)})
+
+        history.load({(row['task_number'], row['device_number']) for _, row in cleaned})
+        accepted = []
+        for row_number, row in cleaned:
+            key = (row['task_number'], row['device_number'])
+            message = history.check(key, row['day'], row['running'], row['progress_value'])
+            if message:
+                errors.append({'row': row_number, 'message': message})
+                continue
+            history.add(key, row['day'], row['progress_value'])
+            accepted.append(row)
+
+        if accepted:
+            created += _save_chunk(accepted)
+            logger.info(f"设备运行记录导入：已写入 {created} 条")
+
+    errors.sort(key=lambda error: error['row'])
+    return {'created': created, 'errors': errors}
@@ -0,0 +1,187 @@
+import csv
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Device_run, ExperimentLog, TaskApplication
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportError(Exception):
+    """导出参数无效（未知的导出类型、格式或日期）"""
+
+
+def _fields(model, names, labels=None):
+    labels = labels or {}
+    return [(name, labels.get(name) or str(model._meta.get_field(name).verbose_name)) for name in names]
+
+
+# 导出类型 -> (模型, [(字段, 表头)], 日期字段, 设备字段, 查看权限)
+EXPORTS = {
+    'device-runs': (
+        Device_run,
+        _fields(Device_run, (
+            'id', 'task_number', 'task_status', 'transmission_model', 'test_content', 'date',
+            'sample_number', 'device_number', 'bench_status', 'debugging', 'running',
+            'sample_fault', 'bench_fault', 'idle', 'progress', 'dvp_plan', 'responsible_person', 'remarks',
+        ), {'date': '日期'}),
+        'date', 'device_number', 'experiment.view_device_run',
+    ),
+    'experiment-logs': (
+        ExperimentLog,
+        _fields(ExperimentLog, (
+            'log_id', 'task_number', 'project_code', 'sample_number', 'test_content', 'equipment_id',
+            'stop_duration', 'log_date', 'alarm_phenomenon', 'alarm_reason', 'solution', 'solver',
+            'data_path', 'analysis_report', 'remarks',
+        )),
+        'log_date', 'equipment_id', 'experiment.view_experimentlog',
+    ),
+    'task-applications': (
+        TaskApplication,
+        _fields(TaskApplication, (
+            'task_number', 'department', 'entrusted_person', 'project_type', 'project_code',
+            'sample_name', 'sample_stage', 'sample_quantity', 'sample_code', 'is_outsourced',
+            'requires_report', 'storage_period', 'oil_storage', 'oil_amount', 'needs_judgment',
+            'test_content', 'test_contentExtra', 'test_basis', 'test_specs', 'debug_time',
+            'test_time', 'estimated_cost', 'task_source', 'business_type', 'created_at',
+        ), {
+            'task_number': '任务单号', 'department': '委托部门', 'entrusted_person': '委托人',
+            'project_type': '项目类型', 'project_code': '项目代号', 'sample_name': '样品名称',
+            'sample_stage': '样品阶段', 'sample_quantity': '样品数量', 'sample_code': '样品编号',
+            'is_outsourced': '是否分包', 'requires_report': '是否要报告', 'storage_period': '样品保存期',
+            'oil_storage': '试后油品', 'oil_amount': '油量', 'needs_judgment': '是否判定',
+            'test_content': '试验内容', 'test_contentExtra': '试验目的和要求', 'test_basis': '试验依据',
+            'test_specs': '试验大纲或技术要求', 'debug_time': '预估调试时长', 'test_time': '预估试验时长',
+            'estimated_cost': '预估试验费用', 'task_source': '任务来源', 'business_type': '业务类型',
+            'created_at': '提交时间',
+        }),
+        'created_at', None, 'experiment.view_taskapplication',
+    ),
+}
+
+
+def export_permission(kind):
+    if kind not in EXPORTS:
+        raise ExportError(f'未知的导出类型: {kind}')
+    return EXPORTS[kind][4]
+
+
+def _parse_day(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f'{name}格式必须为 "YYYY-MM-DD"')
+
+
+def build_export_queryset(kind, params):
+    """按页面上相同的筛选条件（设备、日期区间、任务单号）构造导出查询"""
+    if kind not in EXPORTS:
+        raise ExportError(f'未知的导出类型: {kind}')
+    model, columns, date_field, device_field, _ = EXPORTS[kind]
+    queryset = model.objects.all()
+
+    if params.get('start'):
+        start = _parse_day(params['start'], '开始日期')
+        queryset = queryset.filter(**{f'{date_field}__gte': timezone.make_aware(datetime.combine(start, time.min))})
+    if params.get('end'):
+        end = _parse_day(params['end'], '结束日期')
+        queryset = queryset.filter(**{
+            f'{date_field}__lt': timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        })
+    if device_field and params.get('device'):
+        queryset = queryset.filter(**{device_field: params['device']})
+    if params.get('task_number'):
+        queryset = queryset.filter(task_number__icontains=params['task_number'])
+
+    return queryset.order_by(date_field, model._meta.pk.name), columns
+
+
+def _rows(queryset, columns):
+    """逐块从数据库读取，每次只在内存中保留一个块"""
+    names = [name for name, _ in columns]
+    for row in queryset.values_list(*names).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [_cell(value) for value in row]
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        # Excel 不支持带时区的时间，统一转换为本地时间
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class _Echo:
+    """csv.writer 写入时直接返回该行文本，不做缓冲"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(queryset, columns):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM，Excel 打开时正确识别 UTF-8 中文
+    yield writer.writerow([label for _, label in columns])
+    for row in _rows(queryset, columns):
+        yield writer.writerow([
+            value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+            for value in row
+        ])
+
+
+def csv_response(queryset, columns, filename):
+    response = StreamingHttpResponse(_csv_chunks(queryset, columns), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(queryset, columns, filename):
+    """
+    以 openpyxl 只写模式生成 XLSX。
+
+    只写模式逐行写入临时文件，内存占用与行数无关；xlsx 是 zip 格式，
+    需要完整生成后才能发送，因此先写入临时文件再以 FileResponse 分块传输。
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(filename[:31])
+    sheet.append([label for _, label in columns])
+    date_columns = {index for index, (name, _) in enumerate(columns)
+                    if queryset.model._meta.get_field(name).get_internal_type() in ('DateTimeField', 'DateField')}
+    for row in _rows(queryset, columns):
+        cells = []
+        for index, value in enumerate(row):
+            if index in date_columns and value is not None:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.number_format = 'yyyy-mm-dd hh:mm:ss'
+                cells.append(cell)
+            else:
+                cells.append(value)
+        sheet.append(cells)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def export_response(kind, params, export_format='csv'):
+    queryset, columns = build_export_queryset(kind, params)
+    filename = f'{kind}-{date.today():%Y%m%d}'
+    if export_format == 'csv':
+        return csv_response(queryset, columns, filename)
+    if export_format == 'xlsx':
+        return xlsx_response(queryset, columns, filename)
+    raise ExportError('导出格式只支持 csv 或 xlsx')
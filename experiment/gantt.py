@@ -0,0 +1,262 @@
+import json
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from comprehensive.models import SequenceCounter
+from comprehensive.sequences import next_sequence
+from .models import GanttProject
+
+logger = logging.getLogger(__name__)
+
+# 甘特图整体版本号保存在编号序列计数器中，每次有变更的保存加一
+GANTT_VERSION_PREFIX = 'GANTT'
+GANTT_VERSION_PERIOD = ''
+
+# 按版本号缓存序列化后的甘特图文档，版本号变化即自然失效
+GANTT_DOCUMENT_TIMEOUT = 60 * 60 * 24
+GANTT_MODIFIED_TIMEOUT = None
+
+# 参与比较和写入的任务字段（不含主键、行顺序和版本号）
+GANTT_TASK_FIELDS = (
+    'name', 'progress', 'progress_by_worklog', 'relevance', 'type', 'type_id',
+    'description', 'code', 'level', 'status', 'depends', 'can_write', 'start',
+    'duration', 'end', 'start_is_milestone', 'end_is_milestone', 'collapsed',
+    'assigs', 'has_child',
+)
+
+
+class GanttVersionConflict(Exception):
+    """保存时携带的版本号与服务器当前版本不一致（甘特图已被他人修改）"""
+
+    def __init__(self, current_version):
+        super().__init__(f'甘特图已被其他用户修改（当前版本 {current_version}），请刷新后重试')
+        self.current_version = current_version
+
+
+def _from_timestamp(value):
+    # jQueryGantt 使用毫秒时间戳，按 UTC 转换后与 get_gantt_data 的 timestamp() 互为逆运算
+    return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+
+
+def generate_task_defaults(task):
+    return {
+        'name': task.get('name', ''),
+        'progress': task.get('progress', 0),
+        'progress_by_worklog': task.get('progressByWorklog', False),
+        'relevance': task.get('relevance', 0),
+        'type': task.get('type', ''),
+        'type_id': task.get('typeId', ''),
+        'description': task.get('description', ''),
+        'code': task.get('code', ''),
+        'level': task.get('level', 0),
+        'status': task.get('status', 'STATUS_ACTIVE'),
+        'depends': task.get('depends', ''),
+        'can_write': task.get('canWrite', True),
+        'start': _from_timestamp(task.get('start')),  # 转换时间戳为日期时间
+        'duration': task.get('duration', 0),
+        'end': _from_timestamp(task.get('end')),  # 转换时间戳为日期时间
+        'start_is_milestone': task.get('startIsMilestone', False),
+        'end_is_milestone': task.get('endIsMilestone', False),
+        'collapsed': task.get('collapsed', False),
+        'assigs': task.get('assigs', []),
+        'has_child': task.get('hasChild', False),
+    }
+
+
+GANTT_PROJECT_OPTIONS = {
+    "resources": [
+        {"id": "tmp_1", "name": "Resource 1"},
+        {"id": "tmp_2", "name": "Resource 2"},
+        {"id": "tmp_3", "name": "Resource 3"},
+        {"id": "tmp_4", "name": "Resource 4"}
+    ],
+    "roles": [
+        {"id": "tmp_1", "name": "Project Manager"},
+        {"id": "tmp_2", "name": "Worker"},
+        {"id": "tmp_3", "name": "Stakeholder"},
+        {"id": "tmp_4", "name": "Customer"}
+    ],
+    "canWrite": True,
+    "canDelete": True,
+    "canWriteOnParent": True,
+    "canAdd": True,
+}
+
+
+def serialize_task(task):
+    """将 GanttProject.values() 的一行转换为 jQueryGantt 的任务格式"""
+    return {
+        'id': task['project_id'],
+        'name': task['name'],
+        'progress': task['progress'],
+        'progressByWorklog': task['progress_by_worklog'],
+        'relevance': task['relevance'],
+        'type': task['type'],
+        'typeId': task['type_id'],
+        'description': task['description'],
+        'code': task['code'],
+        'level': task['level'],
+        'status': task['status'],
+        'depends': task['depends'],
+        'canWrite': task['can_write'],
+        'start': int(task['start'].timestamp() * 1000),
+        'duration': task['duration'],
+        'end': int(task['end'].timestamp() * 1000),
+        'startIsMilestone': task['start_is_milestone'],
+        'endIsMilestone': task['end_is_milestone'],
+        'collapsed': task['collapsed'],
+        'assigs': task['assigs'],
+        'hasChild': task['has_child']
+    }
+
+
+def get_gantt_version():
+    """返回甘特图当前版本号，从未保存过时为 0"""
+    return SequenceCounter.objects.filter(
+        prefix=GANTT_VERSION_PREFIX, period=GANTT_VERSION_PERIOD
+    ).values_list('value', flat=True).first() or 0
+
+
+def _document_key(version):
+    return f'gantt_document:{version}'
+
+
+def _modified_key(version):
+    return f'gantt_modified:{version}'
+
+
+def get_gantt_last_modified(version):
+    """返回该版本的保存时间；缓存丢失（如服务重启）时以当前时间代替"""
+    modified = cache.get(_modified_key(version))
+    if modified is None:
+        modified = timezone.now().replace(microsecond=0)
+        cache.add(_modified_key(version), modified, GANTT_MODIFIED_TIMEOUT)
+        modified = cache.get(_modified_key(version), modified)
+    return modified
+
+
+def get_gantt_document(version):
+    """
+    返回指定版本甘特图完整响应的 JSON 文本。
+
+    同一版本只序列化一次；若序列化期间又有新的保存，则本次结果不写入缓存。
+    """
+    body = cache.get(_document_key(version))
+    if body is not None:
+        return body
+
+    data = dict(GANTT_PROJECT_OPTIONS)
+    data['tasks'] = [serialize_task(task) for task in GanttProject.objects.all().values()]
+    data['version'] = version
+    body = json.dumps({'status': 'success', 'data': data}, cls=DjangoJSONEncoder)
+    if get_gantt_version() == version:
+        cache.set(_document_key(version), body, GANTT_DOCUMENT_TIMEOUT)
+    return body
+
+
+def get_gantt_delta(since, version):
+    """
+    返回 since 版本之后变化的任务。
+
+    tasks 为新增或修改过的任务，ids 为当前全部任务ID（按行顺序），
+    客户端据此删除已不存在的任务并调整顺序；since 已是最新版本时不查询任务表，也不返回 ids。
+    """
+    data = {'version': version, 'since': since, 'tasks': []}
+    if since >= version:
+        return data
+
+    data['tasks'] = [
+        serialize_task(task)
+        for task in GanttProject.objects.filter(version__gt=since).values()
+    ]
+    data['ids'] = list(GanttProject.objects.values_list('project_id', flat=True))
+    return data
+
+
+def _stored_id(task_id, existing):
+    """jQueryGantt 中新建任务的ID为 "tmp_xxx"，已保存任务沿用数据库中的ID"""
+    try:
+        task_id = int(task_id)
+    except (TypeError, ValueError):
+        return None
+    return task_id if task_id in existing else None
+
+
+def save_gantt_tasks(tasks, expected_version=None):
+    """
+    将 jQueryGantt 提交的完整任务列表与数据库中的任务做差异比较，只写入变化部分。
+
+    - 已存在的任务按ID匹配，字段或行顺序有变化时 bulk_update；
+    - 新任务 bulk_create，沿用负数ID的约定分配新ID；
+    - 提交列表中不再出现的任务删除。
+
+    expected_version 不为 None 时做乐观并发校验，版本不一致抛出 GanttVersionConflict。
+    返回 {'version', 'created', 'updated', 'deleted', 'id_map'}，
+    id_map 为新任务的 客户端临时ID -> 数据库ID 映射。
+    """
+    with transaction.atomic():
+        existing = GanttProject.objects.in_bulk()
+        next_id = min(min(existing, default=0), 0) - 1
+
+        to_create, to_update, id_map, seen = [], [], {}, set()
+        for sort_order, task in enumerate(tasks):
+            values = generate_task_defaults(task)
+            values['sort_order'] = sort_order
+            project_id = _stored_id(task.get('id'), existing)
+
+            if project_id is None or project_id in seen:
+                obj = GanttProject(project_id=next_id, **values)
+                id_map[str(task.get('id'))] = next_id
+                next_id -= 1
+                to_create.append(obj)
+                seen.add(obj.project_id)
+                continue
+
+            seen.add(project_id)
+            obj = existing[project_id]
+            changed = False
+            for field, value in values.items():
+                if getattr(obj, field) != value:
+                    setattr(obj, field, value)
+                    changed = True
+            if changed:
+                to_update.append(obj)
+
+        to_delete = [project_id for project_id in existing if project_id not in seen]
+
+        if not (to_create or to_update or to_delete):
+            version = get_gantt_version()
+            if expected_version is not None and version != expected_version:
+                raise GanttVersionConflict(version)
+            return {'version': version, 'created': 0, 'updated': 0, 'deleted': 0, 'id_map': {}}
+
+        # 原子地递增版本号，并发保存时后提交的一方拿到的版本号会跳号，从而检测到冲突
+        version = next_sequence(GANTT_VERSION_PREFIX, GANTT_VERSION_PERIOD)
+        if expected_version is not None and version != expected_version + 1:
+            raise GanttVersionConflict(version - 1)
+
+        for obj in to_create + to_update:
+            obj.version = version
+        if to_create:
+            GanttProject.objects.bulk_create(to_create)
+        if to_update:
+            GanttProject.objects.bulk_update(
+                to_update, GANTT_TASK_FIELDS + ('sort_order', 'version'), batch_size=500
+            )
+        if to_delete:
+            GanttProject.objects.filter(project_id__in=to_delete).delete()
+
+    cache.set(_modified_key(version), timezone.now().replace(microsecond=0), GANTT_MODIFIED_TIMEOUT)
+    logger.info(f"甘特图已保存为版本 {version}：新增 {len(to_create)}，修改 {len(to_update)}，删除 {len(to_delete)}")
+    return {
+        'version': version,
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(to_delete),
+        'id_map': id_map,
+    }
@@ -0,0 +1,108 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.db.models.functions import Substr
+
+# 履历记录对外返回的全部字段
+EXPERIMENT_LOG_FIELDS = (
+    'log_id', 'task_number', 'project_code', 'sample_number', 'test_content',
+    'equipment_id', 'stop_duration', 'log_date', 'alarm_phenomenon', 'alarm_reason',
+    'solution', 'solver', 'data_path', 'analysis_report', 'remarks',
+)
+# 列表页只需要的摘要字段，长文本字段只取前若干字作为预览，详情点击后再单独加载
+EXPERIMENT_LOG_SUMMARY_FIELDS = (
+    'log_id', 'task_number', 'project_code', 'sample_number', 'test_content',
+    'equipment_id', 'log_date', 'alarm_phenomenon', 'solution', 'data_path', 'analysis_report',
+)
+LONG_TEXT_FIELDS = ('alarm_phenomenon', 'alarm_reason', 'solution', 'remarks')
+PREVIEW_LENGTH = 80
+
+
+def parse_fields(value):
+    """
+    解析 fields 参数：空或 "summary" 为摘要字段，"all" 为全部字段，
+    否则为逗号分隔的字段列表；包含未知字段时抛出 ValueError。
+    """
+    if not value or value == 'summary':
+        return EXPERIMENT_LOG_SUMMARY_FIELDS, True
+    if value == 'all':
+        return EXPERIMENT_LOG_FIELDS, False
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in EXPERIMENT_LOG_FIELDS]
+    if unknown:
+        raise ValueError(f'未知字段: {", ".join(unknown)}')
+    if 'log_id' not in fields:
+        fields = ('log_id',) + fields
+    return fields, False
+
+
+def _values(queryset, fields, preview):
+    columns = []
+    annotations = {}
+    for field in fields:
+        if preview and field in LONG_TEXT_FIELDS:
+            annotations[f'{field}_preview'] = Substr(field, 1, PREVIEW_LENGTH)
+        else:
+            columns.append(field)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset.values(*columns, *annotations)
+
+
+def _format_row(row):
+    for name in [key for key in row if key.endswith('_preview')]:
+        row[name[:-len('_preview')]] = row.pop(name)
+    if 'stop_duration' in row:
+        row['stop_duration'] = float(row['stop_duration'])
+    if 'log_date' in row:
+        row['log_date'] = row['log_date'].strftime('%Y-%m-%dT%H:%M:%S')
+    return row
+
+
+def serialize_logs(queryset, fields=EXPERIMENT_LOG_FIELDS, preview=False):
+    """
+    用 .values() 只查询需要的列并转换为前端使用的JSON格式。
+
+    preview=True 时长文本字段在数据库中截断，不传输完整内容。
+    """
+    return [_format_row(row) for row in _values(queryset, fields, preview)]
+
+
+def encode_cursor(log_date, log_id):
+    raw = f'{log_date.isoformat()}|{log_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        log_date, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(log_date), log_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('无效的分页游标')
+
+
+def keyset_page(queryset, fields=EXPERIMENT_LOG_SUMMARY_FIELDS, preview=True, cursor=None, limit=50):
+    """
+    按 (log_date, log_id) 倒序做游标分页，返回 (当前页记录, 下一页游标或 None)。
+
+    与 OFFSET 分页不同，翻到后面的页时不需要扫描并跳过前面的记录。
+    """
+    queryset = queryset.order_by('-log_date', '-log_id')
+    if cursor:
+        log_date, log_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(log_date__lt=log_date) | Q(log_date=log_date, log_id__lt=log_id)
+        )
+
+    # 游标需要 log_date 原值，未请求该字段时查询后再去掉
+    query_fields = tuple(dict.fromkeys(fields + ('log_date',)))
+    rows = list(_values(queryset, query_fields, preview)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['log_date'], rows[-1]['log_id'])
+    if 'log_date' not in fields:
+        for row in rows:
+            row.pop('log_date')
+    return [_format_row(row) for row in rows], next_cursor
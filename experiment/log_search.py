@@ -0,0 +1,195 @@
+import html
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import ExperimentLog
+
+logger = logging.getLogger(__name__)
+
+# 试验履历表全文索引（SQLite FTS5）
+# 中文没有分词边界，写入和查询前都在 Python 中切分为重叠的二元组（bigram），
+# 英文、数字按整词保留，再交给 unicode61 分词器按空格切分
+FTS_TABLE = 'experiment_log_fts'
+# 参与全文检索的字段，顺序与虚拟表的列一致
+FTS_FIELDS = ('alarm_phenomenon', 'alarm_reason', 'solution', 'remarks', 'identifiers')
+# bm25 各列权重：log_id 不参与检索，报警现象权重最高
+FTS_WEIGHTS = (0.0, 3.0, 2.0, 2.0, 0.5, 1.0)
+SNIPPET_CONTEXT = 30
+
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[0-9A-Za-z]+')
+
+
+def _is_cjk(chunk):
+    return re.match(rf'[{_CJK}]', chunk) is not None
+
+
+def ngram_tokens(text):
+    """将文本切分为检索词：连续汉字切为二元组，英文数字按整词小写"""
+    tokens = []
+    for chunk in _TOKEN_RE.findall(text or ''):
+        if not _is_cjk(chunk):
+            tokens.append(chunk.lower())
+        elif len(chunk) == 1:
+            tokens.append(chunk)
+        else:
+            tokens.extend(chunk[i:i + 2] for i in range(len(chunk) - 1))
+            # 末字单独再写一次，使单字查询（按前缀匹配）也能命中位于词尾的字
+            tokens.append(chunk[-1])
+    return tokens
+
+
+def _index_text(text):
+    return ' '.join(ngram_tokens(text))
+
+
+_fts_ready = False
+
+
+def fts_available():
+    """当前数据库为 SQLite 且全文索引表已创建时返回 True"""
+    global _fts_ready
+    if connection.vendor != 'sqlite':
+        return False
+    if not _fts_ready:
+        _fts_ready = FTS_TABLE in connection.introspection.table_names()
+    return _fts_ready
+
+
+def _document(log):
+    identifiers = ' '.join([log.task_number, log.project_code, log.sample_number, log.equipment_id, log.solver])
+    return [
+        _index_text(log.alarm_phenomenon),
+        _index_text(log.alarm_reason),
+        _index_text(log.solution),
+        _index_text(log.remarks),
+        _index_text(identifiers),
+    ]
+
+
+def index_experiment_logs(logs):
+    """写入或更新多条履历记录的全文索引"""
+    if not fts_available():
+        return
+    logs = list(logs)
+    if not logs:
+        return
+    columns = ', '.join(('log_id',) + FTS_FIELDS)
+    placeholders = ', '.join(['%s'] * (len(FTS_FIELDS) + 1))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE log_id = %s', [[log.log_id] for log in logs]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} ({columns}) VALUES ({placeholders})',
+            [[log.log_id] + _document(log) for log in logs]
+        )
+
+
+def remove_experiment_log(log_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE log_id = %s', [log_id])
+
+
+def rebuild_experiment_log_index(batch_size=500):
+    """清空并重建全文索引，返回索引的记录数"""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    total = 0
+    batch = []
+    for log in ExperimentLog.objects.order_by().iterator(chunk_size=batch_size):
+        batch.append(log)
+        if len(batch) >= batch_size:
+            index_experiment_logs(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        index_experiment_logs(batch)
+        total += len(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _match_expression(query):
+    """
+    将查询转换为 FTS5 表达式，各片段之间为 AND。
+
+    连续汉字转换为相邻二元组组成的短语（等价于子串匹配）；
+    单个汉字和英文数字按前缀匹配。
+    """
+    phrases = []
+    for chunk in _TOKEN_RE.findall(query or ''):
+        if _is_cjk(chunk) and len(chunk) > 1:
+            phrases.append('"' + ' '.join(chunk[i:i + 2] for i in range(len(chunk) - 1)) + '"')
+        else:
+            phrases.append(f'"{chunk.lower()}" *')
+    return ' '.join(phrases)
+
+
+def search_log_ids(query, offset=0, limit=20):
+    """按相关度返回 (命中总数, [log_id, ...])"""
+    expression = _match_expression(query)
+    if not expression:
+        return 0, []
+
+    if not fts_available():
+        # 非 SQLite 数据库退化为 icontains 查询
+        condition = Q()
+        for word in _TOKEN_RE.findall(query):
+            word_condition = Q()
+            for field in ('alarm_phenomenon', 'alarm_reason', 'solution', 'remarks',
+                          'task_number', 'project_code', 'sample_number', 'equipment_id', 'solver'):
+                word_condition |= Q(**{f'{field}__icontains': word})
+            condition &= word_condition
+        logs = ExperimentLog.objects.filter(condition)
+        return logs.count(), list(logs.values_list('log_id', flat=True)[offset:offset + limit])
+
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]
+        )
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT log_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s',
+            [expression, limit, offset]
+        )
+        return total, [row[0] for row in cursor.fetchall()]
+
+
+def highlight(text, query, context=SNIPPET_CONTEXT):
+    """
+    返回转义后的 HTML 片段，查询词用 <mark> 标出。
+
+    文本较长时只截取第一个命中位置前后 context 个字符；没有命中时返回空字符串。
+    """
+    if not text:
+        return ''
+    words = sorted(set(_TOKEN_RE.findall(query or '')), key=len, reverse=True)
+    if not words:
+        return ''
+    pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+    first = pattern.search(text)
+    if not first:
+        return ''
+
+    start = max(first.start() - context, 0)
+    end = min(first.end() + context * 2, len(text))
+    fragment = text[start:end]
+    parts = []
+    position = 0
+    for match in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[position:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(html.escape(fragment[position:]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
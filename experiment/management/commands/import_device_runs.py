@@ -0,0 +1,37 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from experiment.device_run_import import DeviceRunImportError, import_device_runs, iter_import_rows
+
+
+class Command(BaseCommand):
+    help = '从 CSV/XLSX 文件批量导入设备运行记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='导入文件路径（.csv 或 .xlsx）')
+        parser.add_argument('--batch-size', type=int, default=500, help='每个事务写入的行数')
+        parser.add_argument('--responsible', default='', help='文件中未填写责任人时使用的默认责任人')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'文件不存在: {path}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size 必须大于零')
+
+        try:
+            with open(path, 'rb') as file:
+                result = import_device_runs(
+                    iter_import_rows(file, path),
+                    responsible_person=options['responsible'],
+                    batch_size=options['batch_size'],
+                )
+        except DeviceRunImportError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f"第 {error['row']} 行: {error['message']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"成功导入 {result['created']} 条设备运行记录，失败 {len(result['errors'])} 行"
+        ))
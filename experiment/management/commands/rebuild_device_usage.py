@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from experiment.models import DeviceDailyUsage
+
+
+class Command(BaseCommand):
+    help = '根据设备运行记录批量重建设备日利用率汇总表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='起始日期 YYYY-MM-DD，不填则重建全部')
+        parser.add_argument('--end', help='结束日期 YYYY-MM-DD（包含）')
+        parser.add_argument('--device', help='只重建指定设备编号')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的行数')
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['start'], '%Y-%m-%d').date() if options['start'] else None
+            end = datetime.strptime(options['end'], '%Y-%m-%d').date() if options['end'] else None
+        except ValueError:
+            raise CommandError('日期格式必须为 "YYYY-MM-DD"')
+
+        with transaction.atomic():
+            deleted, created = DeviceDailyUsage.rebuild(
+                start=start,
+                end=end,
+                device_numbers=[options['device']] if options['device'] else None,
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'已删除 {deleted} 条旧汇总，重建 {created} 条设备日利用率汇总'))
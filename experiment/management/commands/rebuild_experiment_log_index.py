@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from experiment.log_search import fts_available, rebuild_experiment_log_index
+
+
+class Command(BaseCommand):
+    help = '重建试验履历表全文索引（批量导入或直接修改数据库后使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批写入的记录数')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('全文索引仅支持 SQLite，请先执行 migrate 创建索引表')
+        with transaction.atomic():
+            total = rebuild_experiment_log_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已重建 {total} 条试验履历的全文索引'))
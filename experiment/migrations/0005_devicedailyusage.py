@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiment', '0004_experimentlog_alter_device_run_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_number', models.CharField(max_length=50, verbose_name='设备编号')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('debugging', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='调试')),
+                ('running', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='运行')),
+                ('sample_fault', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='样件故障')),
+                ('bench_fault', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='台架故障')),
+                ('idle', models.DecimalField(decimal_places=2, default=0, max_digits=8, verbose_name='闲置')),
+                ('records_count', models.IntegerField(default=0, verbose_name='记录数')),
+            ],
+            options={
+                'verbose_name': '设备日利用率',
+                'verbose_name_plural': '设备日利用率',
+                'db_table': 'device_daily_usage',
+                'ordering': ['-day', 'device_number'],
+                'indexes': [models.Index(fields=['day', 'device_number'], name='device_dail_day_aa0d90_idx')],
+                'constraints': [models.UniqueConstraint(fields=('device_number', 'day'), name='unique_device_daily_usage')],
+            },
+        ),
+    ]
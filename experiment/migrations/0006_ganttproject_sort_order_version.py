@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+def backfill_sort_order(apps, schema_editor):
+    # 旧版保存时按行顺序依次分配 -1、-2、-3... 的ID，据此还原行顺序
+    GanttProject = apps.get_model('experiment', 'GanttProject')
+    tasks = list(GanttProject.objects.order_by('-project_id'))
+    for index, task in enumerate(tasks):
+        task.sort_order = index
+    GanttProject.objects.bulk_update(tasks, ['sort_order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiment', '0005_devicedailyusage'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ganttproject',
+            options={'ordering': ['sort_order', 'project_id']},
+        ),
+        migrations.AddField(
+            model_name='ganttproject',
+            name='sort_order',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='ganttproject',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_sort_order, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+import re
+
+from django.db import migrations
+
+# 以下分词与索引文档的生成复制自 experiment.log_search 中写入本迁移时的版本，
+# 迁移不引用应用代码，以后修改 log_search 不会影响已有的迁移；索引格式变化时执行 rebuild_experiment_log_index
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[0-9A-Za-z]+')
+
+
+def _is_cjk(chunk):
+    return re.match(rf'[{_CJK}]', chunk) is not None
+
+
+def ngram_tokens(text):
+    tokens = []
+    for chunk in _TOKEN_RE.findall(text or ''):
+        if not _is_cjk(chunk):
+            tokens.append(chunk.lower())
+        elif len(chunk) == 1:
+            tokens.append(chunk)
+        else:
+            tokens.extend(chunk[i:i + 2] for i in range(len(chunk) - 1))
+            tokens.append(chunk[-1])
+    return tokens
+
+
+def _index_text(text):
+    return ' '.join(ngram_tokens(text))
+
+
+def _document(log):
+    identifiers = ' '.join([log.task_number, log.project_code, log.sample_number, log.equipment_id, log.solver])
+    return [
+        _index_text(log.alarm_phenomenon),
+        _index_text(log.alarm_reason),
+        _index_text(log.solution),
+        _index_text(log.remarks),
+        _index_text(identifiers),
+    ]
+
+
+def create_fts_table(apps, schema_editor):
+    # 全文索引依赖 SQLite FTS5，其他数据库跳过，搜索时退化为 icontains 查询
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS experiment_log_fts USING fts5("
+        "log_id UNINDEXED, alarm_phenomenon, alarm_reason, solution, remarks, identifiers, "
+        "tokenize = 'unicode61')"
+    )
+
+    ExperimentLog = apps.get_model('experiment', 'ExperimentLog')
+    rows = [[log.log_id] + _document(log) for log in ExperimentLog.objects.all()]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO experiment_log_fts "
+                "(log_id, alarm_phenomenon, alarm_reason, solution, remarks, identifiers) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                rows
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS experiment_log_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiment', '0006_ganttproject_sort_order_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
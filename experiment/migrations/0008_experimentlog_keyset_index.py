@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiment', '0007_experimentlog_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experimentlog',
+            index=models.Index(fields=['log_date', 'log_id'], name='experiment__log_dat_62000b_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:54
+
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def backfill_year_month(apps, schema_editor):
+    # 与 TaskApplication.year_month_for 规则一致：任务单号前6位
+    TaskApplication = apps.get_model('experiment', 'TaskApplication')
+    TaskApplication.objects.update(year_month=Substr('task_number', 1, 6))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiment', '0008_experimentlog_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskapplication',
+            name='year_month',
+            field=models.CharField(default='', editable=False, max_length=6, verbose_name='年月'),
+        ),
+        migrations.AddIndex(
+            model_name='taskapplication',
+            index=models.Index(fields=['year_month', 'task_number'], name='experiment__year_mo_78f1af_idx'),
+        ),
+        migrations.RunPython(backfill_year_month, migrations.RunPython.noop),
+    ]
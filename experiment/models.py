@@ -1,4 +1,9 @@
+from datetime import datetime, time, timedelta
+
 from django.db import models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 
 # Create your models here.
 class Tasks(models.Model):
@@ -48,12 +53,14 @@ class GanttProject(models.Model):
     collapsed = models.BooleanField(default=False)  # 是否折叠
     assigs = models.JSONField(default=list)  # 任务分配
     has_child = models.BooleanField(default=False)  # 是否有子任务
+    sort_order = models.IntegerField(default=0, db_index=True)  # 任务在甘特图中的行顺序
+    version = models.BigIntegerField(default=0, db_index=True)  # 最后一次修改该任务的甘特图版本号
 
     def __str__(self):
         return self.name
 
     class Meta:
-        ordering = ['project_id']
+        ordering = ['sort_order', 'project_id']
 
 class Device_run(models.Model):
     # 文本类型字段，允许设置字符集和排序规则
@@ -115,6 +122,9 @@ class ExperimentLog(models.Model):
         verbose_name = '试验履历表'
         verbose_name_plural = '试验履历表'
         ordering = ['-log_date', '-log_id']
+        indexes = [
+            models.Index(fields=['log_date', 'log_id']),  # 列表游标分页
+        ]
         
     def __str__(self):
         return self.log_id
@@ -145,13 +155,140 @@ class TaskApplication(models.Model):
     task_source = models.CharField(max_length=20)  # 试验任务来源
     business_type = models.CharField(max_length=20)  # 试验业务类型
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # 任务单号前6位（YYYYMM），保存时自动生成，用于按年月分组的任务树
+    year_month = models.CharField('年月', max_length=6, editable=False, default='')
 
     def __str__(self):
         return self.task_number
+
+    @staticmethod
+    def year_month_for(task_number):
+        return (task_number or '')[:6]
+
+    def save(self, *args, **kwargs):
+        self.year_month = self.year_month_for(self.task_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'task_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'year_month'}
+        super().save(*args, **kwargs)
         
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['task_source', 'business_type']),
+            # 按年月统计数量、按年月列出任务单
+            models.Index(fields=['year_month', 'task_number']),
+        ]
+
+
+# 设备每日利用率汇总表，由 Device_run 按 (设备编号, 日期) 汇总得到
+class DeviceDailyUsage(models.Model):
+    device_number = models.CharField('设备编号', max_length=50)
+    day = models.DateField('日期')
+    debugging = models.DecimalField('调试', max_digits=8, decimal_places=2, default=0)
+    running = models.DecimalField('运行', max_digits=8, decimal_places=2, default=0)
+    sample_fault = models.DecimalField('样件故障', max_digits=8, decimal_places=2, default=0)
+    bench_fault = models.DecimalField('台架故障', max_digits=8, decimal_places=2, default=0)
+    idle = models.DecimalField('闲置', max_digits=8, decimal_places=2, default=0)
+    records_count = models.IntegerField('记录数', default=0)
+
+    class Meta:
+        db_table = 'device_daily_usage'
+        verbose_name = '设备日利用率'
+        verbose_name_plural = '设备日利用率'
+        constraints = [
+            models.UniqueConstraint(fields=['device_number', 'day'], name='unique_device_daily_usage'),
         ]
+        indexes = [
+            models.Index(fields=['day', 'device_number']),
+        ]
+        ordering = ['-day', 'device_number']
+
+    def __str__(self):
+        return f"{self.device_number} {self.day}"
+
+    @staticmethod
+    def aggregate_runs(queryset):
+        """将 Device_run 查询集按 (设备编号, 日期) 汇总"""
+        return queryset.annotate(
+            day=TruncDate('date')
+        ).values('device_number', 'day').annotate(
+            debugging_sum=Sum('debugging'),
+            running_sum=Sum('running'),
+            sample_fault_sum=Sum('sample_fault'),
+            bench_fault_sum=Sum('bench_fault'),
+            idle_sum=Sum('idle'),
+            records=Count('id'),
+        ).order_by('device_number', 'day')
+
+    @classmethod
+    def from_aggregate(cls, row):
+        return cls(
+            device_number=row['device_number'],
+            day=row['day'],
+            debugging=row['debugging_sum'] or 0,
+            running=row['running_sum'] or 0,
+            sample_fault=row['sample_fault_sum'] or 0,
+            bench_fault=row['bench_fault_sum'] or 0,
+            idle=row['idle_sum'] or 0,
+            records_count=row['records'],
+        )
+
+    @classmethod
+    def refresh(cls, device_number, day):
+        """重新汇总某台设备某一天的运行记录，在 Device_run 新增、修改或删除后调用"""
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        runs = Device_run.objects.filter(
+            device_number=device_number,
+            date__gte=day_start,
+            date__lt=day_start + timedelta(days=1),
+        )
+        rows = list(cls.aggregate_runs(runs))
+        if not rows:
+            cls.objects.filter(device_number=device_number, day=day).delete()
+            return None
+
+        usage = cls.from_aggregate(rows[0])
+        usage.day = day
+        cls.objects.update_or_create(
+            device_number=device_number,
+            day=day,
+            defaults={
+                'debugging': usage.debugging,
+                'running': usage.running,
+                'sample_fault': usage.sample_fault,
+                'bench_fault': usage.bench_fault,
+                'idle': usage.idle,
+                'records_count': usage.records_count,
+            }
+        )
+        return usage
+
+    @classmethod
+    def rebuild(cls, start=None, end=None, device_numbers=None, batch_size=1000):
+        """按日期区间（包含两端）和设备批量重建汇总，返回 (删除条数, 新建条数)，需在事务中调用"""
+        runs = Device_run.objects.all()
+        usages = cls.objects.all()
+        if start:
+            runs = runs.filter(date__gte=timezone.make_aware(datetime.combine(start, time.min)))
+            usages = usages.filter(day__gte=start)
+        if end:
+            runs = runs.filter(date__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+            usages = usages.filter(day__lte=end)
+        if device_numbers is not None:
+            runs = runs.filter(device_number__in=device_numbers)
+            usages = usages.filter(device_number__in=device_numbers)
 
+        deleted, _ = usages.delete()
+        created = 0
+        batch = []
+        for row in cls.aggregate_runs(runs).iterator(chunk_size=batch_size):
+            batch.append(cls.from_aggregate(row))
+            if len(batch) >= batch_size:
+                cls.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            cls.objects.bulk_create(batch)
+            created += len(batch)
+        return deleted, created
@@ -0,0 +1,276 @@
+import hashlib
+import io
+import logging
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+from pdfplumber.utils import extract_text
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# 任务单解析结果按文件内容的 SHA-256 缓存，重复上传同一文件直接返回
+# 轮询请求可能落在其他进程上，解析结果和进行中的状态都保存在缓存中，多进程部署时需要共享缓存（CACHE_BACKEND=file 或 redis）
+PDF_RESULT_TIMEOUT = 60 * 60 * 24 * 7
+PDF_ERROR_TIMEOUT = 60 * 10
+# 进行中状态的过期时间，解析进程异常退出、未能清除时兜底
+PDF_PENDING_TIMEOUT = 60 * 10
+# 任务单表格只用到前 15 行
+TASK_TABLE_ROWS = 15
+
+
+def parse_chinese_duration(time_str):
+    pattern = r'(\d+(?:\.\d+)?)\s*([天小时分钟]+)'
+    matches = re.findall(pattern, time_str)
+
+    total_hours = 0
+    unit_map = {
+        '月': 24 * 30,
+        '天': 24,
+        '小时': 1,
+        '分钟': 1 / 60
+    }
+
+    for value, unit in matches:
+        value = float(value)
+        for chinese_unit, factor in unit_map.items():
+            if chinese_unit in unit:
+                total_hours += value * factor
+                break
+        else:
+            raise ValueError(f"无法识别的时间单位: {unit}")
+
+    return total_hours
+
+
+def _char_in_bbox(char, bbox):
+    # 与 pdfplumber 的 Table.extract 相同：字符中心点落在区域内
+    v_mid = (char['top'] + char['bottom']) / 2
+    h_mid = (char['x0'] + char['x1']) / 2
+    x0, top, x1, bottom = bbox
+    return x0 <= h_mid < x1 and top <= v_mid < bottom
+
+
+def extract_table_rows(table, limit):
+    """
+    与 pdfplumber 的 Table.extract 相同，但只提取表格的前 limit 行。
+
+    先筛出这些行所在区域内的字符，之后的逐行、逐单元格匹配不再遍历整页字符，
+    也不会为后面用不到的行提取文字。
+    """
+    rows = table.rows[:limit]
+    if not rows:
+        return []
+    region = (
+        min(row.bbox[0] for row in rows), rows[0].bbox[1],
+        max(row.bbox[2] for row in rows), rows[-1].bbox[3],
+    )
+    chars = [char for char in table.page.chars if _char_in_bbox(char, region)]
+
+    result = []
+    for row in rows:
+        row_chars = [char for char in chars if _char_in_bbox(char, row.bbox)]
+        result.append([
+            None if cell is None else extract_text([char for char in row_chars if _char_in_bbox(char, cell)])
+            for cell in row.cells
+        ])
+    return result
+
+
+def extract_table_from_pdf(pdf_path):
+    """只读取第一页的第一个表格，且只提取任务单需要的行"""
+    with pdfplumber.open(pdf_path, pages=[1]) as pdf:
+        if not pdf.pages:
+            return None
+        tables = pdf.pages[0].find_tables()
+        if not tables:
+            return None
+        return extract_table_rows(tables[0], TASK_TABLE_ROWS)
+
+
+def parse_task_table(table):
+    """将任务单表格转换为前端表单字段"""
+    result_dict = {}
+    # 提取委托单位/部门、样品状态/阶段、试验时长、试后件保存期
+    result_dict['编号'] = table[1][5]
+    result_dict['委托单位/部门'] = table[2][1]
+    result_dict['委托人'] = table[2][5]
+    result_dict['项目名称'] = table[3][1]
+
+    # 确保样品数量是数字
+    sample_quantity = table[4][3]
+    try:
+        # 尝试提取数字部分
+        sample_quantity = ''.join(filter(str.isdigit, sample_quantity))
+        sample_quantity = int(sample_quantity) if sample_quantity else 1
+    except ValueError:
+        sample_quantity = 1  # 如果转换失败，设置默认值为1
+
+    result_dict['样品数量'] = str(sample_quantity)
+    result_dict['样品状态/阶段'] = table[4][5]
+    result_dict['样品编号'] = table[5][1]
+    result_dict['是否需要报告'] = table[6][1]
+    result_dict['是否分包'] = table[7][1]
+    result_dict['试后件保存期'] = table[8][1]
+    result_dict['任务来源'] = table[9][1]
+    result_dict['业务类型'] = table[10][1]
+
+    test_contents = table[11][0].strip().replace('\n', '').replace('试验目的和要求：','*').replace('任务内容、目的与要求试验内容：','')
+    result_dict['试验内容'] = test_contents.split('*')[0]
+    result_dict['试验目的和要求'] = test_contents.split('*')[1]
+
+    result_dict['费用：'] = table[12][1]
+    result_dict['试验时长'] = parse_chinese_duration(table[12][5])
+    result_dict['试验依据：'] = table[13][1]
+    result_dict['试验依据内容：'] = table[14][1]
+
+    # 按照字段映射关系返回数据
+    return {
+        'status': 'success',
+        'taskNumber': result_dict.get('编号', ''),
+        'department': result_dict.get('委托单位/部门', ''),
+        'entrustedPerson': result_dict.get('委托人', ''),
+        'projectCode': result_dict.get('项目名称', ''),
+        'sampleStage': result_dict.get('样品状态/阶段', ''),
+        'sampleNumber': str(sample_quantity),
+        'sampleCode': result_dict.get('样品编号', ''),
+        'isSeparated': result_dict.get('是否分包', '否'),
+        'isRequiredReport': result_dict.get('是否需要报告', '是'),
+        'savePeriod': result_dict.get('试后件保存期', ''),
+        'testContent': result_dict.get('试验内容', ''),
+        'testContentExtra': result_dict.get('试验目的和要求', ''),
+        'testSpecs': result_dict.get('试验依据内容：', ''),
+        'run': result_dict.get('试验时长', ''),
+        'cost': result_dict.get('费用：', ''),
+        'confirmation': result_dict.get('任务来源', ''),
+        'testtype': result_dict.get('业务类型', '')
+    }
+
+
+def parse_task_pdf_content(content):
+    """解析任务单 PDF 的二进制内容，在进程池的工作进程中执行，不访问数据库"""
+    try:
+        table = extract_table_from_pdf(io.BytesIO(content))
+        if not table:
+            return {'status': 'error', 'message': '未找到表格数据'}
+        return parse_task_table(table)
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
+# 进程池与当前进程提交的解析任务，用于合并同一文件的重复提交；其他进程通过缓存中的进行中标记判断
+_executor = None
+_executor_lock = threading.Lock()
+_pending = {}
+
+
+def pdf_parse_workers():
+    """进程池的解析进程数"""
+    return getattr(settings, 'PDF_PARSE_WORKERS', 2)
+
+
+def get_pdf_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=pdf_parse_workers())
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _result_key(digest):
+    return f'pdf_parse:{digest}'
+
+
+def _pending_key(digest):
+    return f'pdf_parse:pending:{digest}'
+
+
+def pdf_digest(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_parse_result(digest):
+    """返回已完成的解析结果，尚未完成或不存在时返回 None"""
+    return cache.get(_result_key(digest))
+
+
+def is_parse_pending(digest):
+    """解析任务是否仍在进行，任一进程提交的任务都能查到"""
+    return digest in _pending or cache.get(_pending_key(digest)) is not None
+
+
+def _store_result(digest, future):
+    _pending.pop(digest, None)
+    try:
+        result = future.result()
+    except BrokenProcessPool:
+        logger.error("PDF解析进程池异常退出，将在下次提交时重建")
+        _reset_executor()
+        result = {'status': 'error', 'message': 'PDF解析进程异常退出，请重新上传'}
+    except Exception as e:
+        result = {'status': 'error', 'message': str(e)}
+    store_parse_result(digest, result)
+    # 先写结果再清除进行中标记，轮询不会在两者之间看到"不存在"
+    cache.delete(_pending_key(digest))
+
+
+def store_parse_result(digest, result):
+    """缓存解析结果，失败结果只保留较短时间"""
+    if result.get('status') == 'success':
+        cache.set(_result_key(digest), result, PDF_RESULT_TIMEOUT)
+    else:
+        logger.error(f"解析PDF失败: {result.get('message')}")
+        cache.set(_result_key(digest), result, PDF_ERROR_TIMEOUT)
+
+
+def submit_pdf_parse(content, wait=None):
+    """
+    提交任务单 PDF 解析，返回 (digest, result)。
+
+    相同内容已有结果时直接返回；否则交给进程池解析，最多等待 wait 秒，
+    超时仍未完成时 result 为 None，调用方凭 digest 轮询 get_parse_result。
+    """
+    digest = pdf_digest(content)
+    result = get_parse_result(digest)
+    if result is not None:
+        return digest, result
+
+    future = _pending.get(digest)
+    if future is None:
+        # 提交前写入进行中标记，避免解析很快完成时标记在结果之后才写入
+        cache.set(_pending_key(digest), True, PDF_PENDING_TIMEOUT)
+        try:
+            future = get_pdf_executor().submit(parse_task_pdf_content, content)
+        except BrokenProcessPool:
+            _reset_executor()
+            future = get_pdf_executor().submit(parse_task_pdf_content, content)
+        _pending[digest] = future
+        future.add_done_callback(lambda done: _store_result(digest, done))
+
+    if wait is None:
+        wait = getattr(settings, 'PDF_PARSE_WAIT', 3)
+    try:
+        future.result(timeout=wait)
+    except FutureTimeoutError:
+        return digest, None
+    except Exception:
+        pass  # 异常结果同样由 _store_result 写入缓存
+
+    # 完成回调可能尚未执行完，此时直接写入结果（重复写入无副作用）
+    result = get_parse_result(digest)
+    if result is None:
+        _store_result(digest, future)
+        result = get_parse_result(digest)
+    return digest, result
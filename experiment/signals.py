@@ -0,0 +1,31 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .log_search import index_experiment_logs, remove_experiment_log
+from .models import ExperimentLog, TaskApplication
+from .task_index import record_task_change, task_index_row
+
+
+@receiver(post_save, sender=ExperimentLog)
+def update_experiment_log_index(sender, instance, **kwargs):
+    """履历记录保存后同步全文索引"""
+    index_experiment_logs([instance])
+
+
+@receiver(post_delete, sender=ExperimentLog)
+def delete_experiment_log_index(sender, instance, **kwargs):
+    remove_experiment_log(instance.log_id)
+
+
+@receiver(post_save, sender=TaskApplication)
+def update_task_index(sender, instance, **kwargs):
+    """任务委托新增或修改后，提交时把这条记录同步到各进程的任务单号联想索引"""
+    transaction.on_commit(partial(record_task_change, instance.pk, task_index_row(instance)))
+
+
+@receiver(post_delete, sender=TaskApplication)
+def delete_task_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(record_task_change, instance.pk))
@@ -0,0 +1,180 @@
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .models import TaskApplication
+
+# 任务单号、项目代号的进程内检索索引，供任务单号输入联想使用
+# 每个进程首次查询时从数据库构建；任务委托保存或删除时递增共享版本号，并在共享缓存中按版本号记录修改的记录，
+# 各进程下次查询时只把这些修改应用到自己的索引上；修改记录不完整（过期、落后太多或批量导入）时才整体重建
+TASK_INDEX_VERSION_KEY = 'task_index:version'
+TASK_INDEX_CHANGE_KEY = 'task_index:change:{version}'
+TASK_INDEX_CHANGE_TIMEOUT = 60 * 60
+# 落后超过该版本数的进程直接重建
+TASK_INDEX_JOURNAL_SIZE = 500
+# 增量记录超过该数量时重建，查询时逐条校验的部分保持足够小
+TASK_INDEX_MAX_ADDED = 1000
+TASK_INDEX_FIELDS = ('task_number', 'project_code', 'test_content', 'sample_code', 'sample_name')
+SUGGESTION_LIMIT = 10
+MAX_SUGGESTION_LIMIT = 50
+
+
+def _get_index_version():
+    version = cache.get(TASK_INDEX_VERSION_KEY)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(TASK_INDEX_VERSION_KEY, int(time.time()), None)
+        version = cache.get(TASK_INDEX_VERSION_KEY)
+    return version
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _haystack(row):
+    return f"{row['task_number']}\n{row['project_code']}".lower()
+
+
+class TaskIndex:
+    """
+    任务委托的检索索引，记录以 id 标识。
+
+    构建时记录按任务单号降序编号，倒排表中的编号也按升序保存，因此按编号顺序遍历即为结果顺序。
+    与原来的 icontains 查询一样按任务单号、项目代号子串匹配：少于3个字符的查询按编号顺序扫描，
+    短查询匹配的记录通常很多，很快就能凑够数量；3个字符及以上按三元组（trigram）倒排表
+    找到候选记录后再做子串校验，凑够数量即停止。
+
+    构建后新增或修改的记录放在增量表中逐条校验，原位置标记为删除，查询结果与主索引的结果合并。
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: row['task_number'], reverse=True)
+        self.haystacks = [_haystack(row) for row in self.rows]
+
+        postings = defaultdict(lambda: array('i'))
+        for i, haystack in enumerate(self.haystacks):
+            for gram in _trigrams(haystack):
+                postings[gram].append(i)
+        self.postings = dict(postings)
+
+        self.positions = {row['id']: i for i, row in enumerate(self.rows)}
+        self.removed = set()
+        self.added = {}
+
+    def __len__(self):
+        return len(self.positions) + len(self.added)
+
+    def upsert(self, row):
+        """新增或修改一条记录（包括修改任务单号）"""
+        self.remove(row['id'])
+        self.added[row['id']] = row
+
+    def remove(self, row_id):
+        position = self.positions.pop(row_id, None)
+        if position is not None:
+            self.removed.add(position)
+        self.added.pop(row_id, None)
+
+    def _search_positions(self, query, limit):
+        if len(query) < 3:
+            candidates = range(len(self.rows))
+        else:
+            lists = []
+            for gram in _trigrams(query):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    return []
+                lists.append(posting)
+            # 只遍历最短的倒排表
+            candidates = min(lists, key=len)
+
+        # 候选再做子串校验
+        result = []
+        for i in candidates:
+            if query in self.haystacks[i] and i not in self.removed:
+                result.append(i)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def search(self, query, limit=SUGGESTION_LIMIT):
+        query = query.strip().lower()
+        rows = [self.rows[i] for i in self._search_positions(query, limit)]
+        # 其他线程可能同时应用修改，先复制增量表
+        added = [row for row in list(self.added.values()) if query in _haystack(row)]
+        if added:
+            rows = sorted(rows + added, key=lambda row: row['task_number'], reverse=True)[:limit]
+        return rows
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def _apply_changes(version):
+    """把共享缓存中记录的修改应用到当前进程的索引，修改记录不完整或增量过多时返回 False"""
+    if _index is None or _index_version is None or not 0 < version - _index_version <= TASK_INDEX_JOURNAL_SIZE:
+        return False
+    keys = [TASK_INDEX_CHANGE_KEY.format(version=v) for v in range(_index_version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        return False
+    for key in keys:
+        row_id, row = changes[key]
+        if row is None:
+            _index.remove(row_id)
+        else:
+            _index.upsert(row)
+    return len(_index.added) <= TASK_INDEX_MAX_ADDED
+
+
+def get_task_index():
+    """返回当前进程的任务索引，版本变化后应用修改记录，无法增量更新时重建"""
+    global _index, _index_version
+    version = _get_index_version()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            version = _get_index_version()
+            if _index is None or _index_version != version:
+                if not _apply_changes(version):
+                    rows = TaskApplication.objects.order_by().values('id', *TASK_INDEX_FIELDS)
+                    _index = TaskIndex(list(rows))
+                _index_version = version
+    return _index
+
+
+def suggest_tasks(query, limit=SUGGESTION_LIMIT):
+    """任务单号或项目代号匹配 query 的任务委托，按任务单号降序"""
+    return get_task_index().search(query, min(max(limit, 1), MAX_SUGGESTION_LIMIT))
+
+
+def search_task_numbers(query, limit):
+    return [row['task_number'] for row in get_task_index().search(query, limit)]
+
+
+def task_index_row(task):
+    return {'id': task.pk, **{field: getattr(task, field) for field in TASK_INDEX_FIELDS}}
+
+
+def record_task_change(task_id, row=None):
+    """任务委托保存（row 为 task_index_row 的结果）或删除（row 为 None）后调用，各进程下次查询时增量更新"""
+    try:
+        version = cache.incr(TASK_INDEX_VERSION_KEY)
+    except ValueError:
+        # 版本号丢失，各进程都会重建索引，不需要记录修改
+        cache.set(TASK_INDEX_VERSION_KEY, int(time.time()), None)
+        return
+    cache.set(TASK_INDEX_CHANGE_KEY.format(version=version), (task_id, row), TASK_INDEX_CHANGE_TIMEOUT)
+
+
+def invalidate_task_index():
+    """批量写入任务委托（不发送信号）后调用，使所有进程的任务索引重建"""
+    try:
+        cache.incr(TASK_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(TASK_INDEX_VERSION_KEY, int(time.time()), None)
@@ -0,0 +1,246 @@
+import logging
+import math
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.db import IntegrityError, transaction
+
+from .models import TaskApplication
+from .pdf_parsing import get_parse_result, parse_task_pdf_content, pdf_digest, store_parse_result
+from .task_index import invalidate_task_index
+
+logger = logging.getLogger(__name__)
+
+
+# 网页上传一次最多导入的 PDF 数量，解析在请求中同步完成；更多文件使用 import_task_pdfs 命令导入
+MAX_UPLOAD_FILES = 100
+
+
+class TaskPdfImportError(Exception):
+    """导入来源无法读取（路径不存在、压缩包损坏等）"""
+
+
+def _timed_parse(content):
+    """在工作进程中解析并计时，返回 (解析结果, 耗时秒)"""
+    started = time.perf_counter()
+    result = parse_task_pdf_content(content)
+    return result, time.perf_counter() - started
+
+
+def iter_pdf_sources(path):
+    """逐个产出目录（含子目录）或 zip 压缩包中的 PDF：(文件名, 二进制内容)"""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    full_path = os.path.join(root, name)
+                    with open(full_path, 'rb') as f:
+                        yield os.path.relpath(full_path, path), f.read()
+    elif zipfile.is_zipfile(path):
+        yield from iter_zip_sources(path)
+    elif path.lower().endswith('.pdf') and os.path.isfile(path):
+        with open(path, 'rb') as f:
+            yield os.path.basename(path), f.read()
+    else:
+        raise TaskPdfImportError(f'无法读取导入来源（需要目录、zip 压缩包或 PDF 文件）: {path}')
+
+
+def count_zip_pdfs(file):
+    """zip 压缩包中的 PDF 数量，只读取目录，不解压"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise TaskPdfImportError('压缩包已损坏或不是 zip 格式')
+    with archive:
+        count = sum(1 for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith('.pdf'))
+    file.seek(0)
+    return count
+
+
+def iter_zip_sources(file):
+    """逐个产出 zip 压缩包中的 PDF，file 可以是路径或已打开的文件对象"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise TaskPdfImportError('压缩包已损坏或不是 zip 格式')
+    with archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith('.pdf'):
+                yield info.filename, archive.read(info)
+
+
+def _to_int(value, default=0):
+    digits = ''.join(filter(str.isdigit, str(value or '')))
+    return int(digits) if digits else default
+
+
+def _to_cost(value):
+    text = ''.join(ch for ch in str(value or '') if ch.isdigit() or ch == '.')
+    try:
+        return float(text) if text else 0
+    except ValueError:
+        return 0
+
+
+def task_application_from_result(result):
+    """将 parse_task_pdf 的解析结果转换为 TaskApplication，PDF 中没有的字段留空"""
+    task_number = result.get('taskNumber', '').strip()
+    return TaskApplication(
+        task_number=task_number,
+        # bulk_create 不调用 save()，年月在这里直接生成
+        year_month=TaskApplication.year_month_for(task_number),
+        department=result.get('department', ''),
+        entrusted_person=result.get('entrustedPerson', ''),
+        project_type='',
+        project_code=result.get('projectCode', ''),
+        sample_name='',
+        sample_stage=result.get('sampleStage', ''),
+        sample_quantity=_to_int(result.get('sampleNumber'), 1),
+        sample_code=result.get('sampleCode', ''),
+        is_outsourced=result.get('isSeparated', '否'),
+        requires_report=result.get('isRequiredReport', '是'),
+        storage_period=result.get('savePeriod', ''),
+        oil_storage='',
+        oil_amount='',
+        needs_judgment='',
+        test_content=result.get('testContent', ''),
+        test_contentExtra=result.get('testContentExtra', ''),
+        test_basis='',
+        test_specs=result.get('testSpecs', ''),
+        debug_time=0,
+        test_time=int(result.get('run') or 0),
+        estimated_cost=_to_cost(result.get('cost')),
+        task_source=result.get('confirmation', ''),
+        business_type=result.get('testtype', ''),
+    )
+
+
+def _parse_all(sources, executor, max_pending):
+    """
+    并行解析所有 PDF，按完成顺序产出 (文件名, 解析结果, 耗时秒, 是否命中缓存)。
+
+    同时在途的文件数不超过 max_pending，避免整个压缩包一次性载入内存。
+    """
+    in_flight = {}
+    sources = iter(sources)
+    exhausted = False
+    while True:
+        while not exhausted and len(in_flight) < max_pending:
+            try:
+                name, content = next(sources)
+            except StopIteration:
+                exhausted = True
+                break
+            digest = pdf_digest(content)
+            cached = get_parse_result(digest)
+            if cached is not None:
+                yield name, cached, 0.0, True
+                continue
+            in_flight[executor.submit(_timed_parse, content)] = (name, digest)
+
+        if not in_flight:
+            return
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, digest = in_flight.pop(future)
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                result, elapsed = {'status': 'error', 'message': str(e)}, 0.0
+            store_parse_result(digest, result)
+            yield name, result, elapsed, False
+
+
+def _percentile(values, percent):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def ingest_task_pdfs(sources, executor, workers, batch_size=200):
+    """
+    批量解析任务单 PDF 并写入 TaskApplication。
+
+    workers 为 executor 的解析进程数，同时在途的文件数为其两倍。
+    按任务单号去重（文件之间、以及与数据库中已有记录之间），通过校验的记录分批 bulk_create。
+    返回 {'files': [每个文件的处理结果], 'summary': 统计与吞吐指标}。
+    """
+    started = time.perf_counter()
+    reports = []
+    parse_times = []
+    pending = deque()
+    seen = set()
+
+    def flush():
+        batch = [pending.popleft() for _ in range(len(pending))]
+        numbers = {task.task_number for task, _ in batch}
+        existing = set(TaskApplication.objects.filter(
+            task_number__in=numbers
+        ).values_list('task_number', flat=True))
+        to_create = []
+        for task, report in batch:
+            if task.task_number in existing:
+                report.update(status='duplicate', message='任务单号已存在')
+            else:
+                report['status'] = 'created'
+                to_create.append((task, report))
+        if not to_create:
+            return
+        try:
+            with transaction.atomic():
+                TaskApplication.objects.bulk_create([task for task, _ in to_create])
+        except IntegrityError:
+            # 去重查询之后有其他请求写入了相同的任务单号，整批回滚后逐条写入，只把冲突的文件记为重复
+            for task, report in to_create:
+                task.pk = None
+                try:
+                    with transaction.atomic():
+                        TaskApplication.objects.bulk_create([task])
+                except IntegrityError:
+                    report.update(status='duplicate', message='任务单号已存在')
+        # bulk_create 不发送 post_save 信号，需要手动使联想索引失效
+        invalidate_task_index()
+
+    for name, result, elapsed, cached in _parse_all(sources, executor, workers * 2):
+        report = {'file': name, 'parse_time': round(elapsed, 3), 'cached': cached}
+        reports.append(report)
+        if not cached:
+            parse_times.append(elapsed)
+
+        if result.get('status') != 'success':
+            report.update(status='error', message=result.get('message', '解析失败'))
+            continue
+        task = task_application_from_result(result)
+        report['task_number'] = task.task_number
+        if not task.task_number:
+            report.update(status='error', message='未解析到任务单号')
+            continue
+        if task.task_number in seen:
+            report.update(status='duplicate', message='与本批次其他文件的任务单号重复')
+            continue
+        seen.add(task.task_number)
+        pending.append((task, report))
+        if len(pending) >= batch_size:
+            flush()
+
+    if pending:
+        flush()
+
+    elapsed_total = time.perf_counter() - started
+    summary = {
+        'files': len(reports),
+        'created': sum(1 for report in reports if report['status'] == 'created'),
+        'duplicates': sum(1 for report in reports if report['status'] == 'duplicate'),
+        'errors': sum(1 for report in reports if report['status'] == 'error'),
+        'elapsed': round(elapsed_total, 3),
+        'files_per_second': round(len(reports) / elapsed_total, 2) if elapsed_total else 0,
+        'p95_parse_time': round(_percentile(parse_times, 95), 3),
+    }
+    logger.info(f"任务单PDF批量导入完成: {summary}")
+    return {'files': reports, 'summary': summary}
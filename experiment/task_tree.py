@@ -0,0 +1,44 @@
+import re
+
+from django.db.models import Count
+
+from .models import TaskApplication
+
+# 展开一个月份时每次返回的任务单数量
+TASK_TREE_PAGE_SIZE = 200
+YEAR_MONTH_RE = re.compile(r'^\d{6}$')
+
+
+def _filter(project_code=''):
+    tasks = TaskApplication.objects.all()
+    if project_code:
+        tasks = tasks.filter(project_code__icontains=project_code)
+    return tasks
+
+
+def task_tree_counts(project_code=''):
+    """
+    按年月统计任务单数量，返回 [{'year', 'count', 'months': [{'month', 'year_month', 'count'}]}]，年月均为降序。
+
+    只在 year_month 索引上做一次 GROUP BY，不加载任务单本身。
+    """
+    rows = _filter(project_code).order_by().values('year_month').annotate(count=Count('id')).order_by('-year_month')
+    years = []
+    for row in rows:
+        year, month = row['year_month'][:4], row['year_month'][4:6]
+        if not years or years[-1]['year'] != year:
+            years.append({'year': year, 'count': 0, 'months': []})
+        years[-1]['count'] += row['count']
+        years[-1]['months'].append({'month': month, 'year_month': row['year_month'], 'count': row['count']})
+    return years
+
+
+def month_tasks(year_month, project_code='', offset=0, limit=TASK_TREE_PAGE_SIZE):
+    """返回某个月份的任务单 (列表, 是否还有更多)，按任务单号降序"""
+    if not YEAR_MONTH_RE.match(year_month):
+        raise ValueError('年月格式必须为 "YYYYMM"')
+    tasks = list(
+        _filter(project_code).filter(year_month=year_month).order_by('-task_number')
+        .values('task_number', 'project_code', 'test_content')[offset:offset + limit + 1]
+    )
+    return tasks[:limit], len(tasks) > limit
@@ -1,3 +1,728 @@
+import csv
+import importlib
+import io
+import random
+import timeit
+import tracemalloc
+import zipfile
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
+
+from django.utils import timezone
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from comprehensive.models import Outlines
+from comprehensive.outline_index import get_outlines_by_project
+
+from .device_run_import import import_device_runs, iter_import_rows
+from .gantt import save_gantt_tasks, serialize_task
+from .log_search import fts_available, search_log_ids
+from .models import Device_run, DeviceDailyUsage, ExperimentLog, GanttProject, TaskApplication, Tasks
+from . import pdf_parsing
+from .pdf_parsing import (
+    TASK_TABLE_ROWS, _pending_key, _store_result, extract_table_from_pdf, get_parse_result, is_parse_pending,
+    pdf_digest, store_parse_result,
+)
+from .task_index import (
+    SUGGESTION_LIMIT, TASK_INDEX_CHANGE_KEY, TASK_INDEX_VERSION_KEY, TaskIndex, get_task_index, suggest_tasks,
+)
+from .task_pdf_import import MAX_UPLOAD_FILES, ingest_task_pdfs, task_application_from_result
+from .task_tree import TASK_TREE_PAGE_SIZE
+
+
+def create_task(index, project):
+    return Tasks.objects.create(
+        task_id=f'T{index}', task_status='样件运行', project=project, sample_id='S1', test_content='耐久',
+        outline='', equipment_id='E1', task_date=date(2025, 1, 1), client='委托方', experimenter='张三',
+        schedule='50%',
+    )
+
+
+def create_outline(project, number):
+    return Outlines.objects.create(
+        sample_style='DCT', project=project, outline_num=f'{project}-{number}', outline_name='耐久大纲',
+        editor='李四', save_date=date(2025, 1, 1), outline_status='有效',
+    )
+
+
+def table_pdf(rows, columns=2, row_height=20, column_width=120):
+    """生成一页只有一个带框线表格的 PDF，单元格文字为 R<行>C<列>"""
+    top = 800
+    commands = []
+    for i in range(rows + 1):
+        y = top - i * row_height
+        commands.append(f'50 {y} m {50 + columns * column_width} {y} l S')
+    for j in range(columns + 1):
+        x = 50 + j * column_width
+        commands.append(f'{x} {top} m {x} {top - rows * row_height} l S')
+    for i in range(rows):
+        for j in range(columns):
+            x, y = 55 + j * column_width, top - (i + 1) * row_height + 6
+            commands.append(f'BT /F1 10 Tf {x} {y} Td (R{i}C{j}) Tj ET')
+    stream = '\n'.join(commands).encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return pdf
+
+
+class ExperimentTasksDayQueryTests(TestCase):
+    # 会话、用户、任务、大纲各一次查询，与任务数量无关
+    EXPECTED_QUERIES = 4
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def assert_page_queries(self):
+        # 清空缓存，统计大纲索引未命中时的查询数
+        cache.clear()
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(reverse('experiment:experiment_tasks_day'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_independent_of_task_count(self):
+        create_task(0, 'P0')
+        create_outline('P0', 1)
+        self.assert_page_queries()
+
+        for index in range(1, 30):
+            create_task(index, f'P{index}')
+            create_outline(f'P{index}', 1)
+        response = self.assert_page_queries()
+        self.assertEqual(len(response.context['tasks']), 30)
+        self.assertTrue(all(len(task.outlines) == 1 for task in response.context['tasks']))
+
+
+class OutlineIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_lookup_runs_no_queries(self):
+        create_outline('P1', 1)
+        get_outlines_by_project(['P1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_outlines_by_project(['P1'])['P1']), 1)
+
+    def test_saving_outline_outside_views_invalidates_index(self):
+        self.assertEqual(get_outlines_by_project(['P1'])['P1'], [])
+        outline = create_outline('P1', 1)
+        self.assertEqual(get_outlines_by_project(['P1'])['P1'], [outline])
+        outline.delete()
+        self.assertEqual(get_outlines_by_project(['P1'])['P1'], [])
+
+
+class DeviceHistoryRecordsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        for day in range(1, 4):
+            Device_run.objects.create(
+                id=f'DR2025010{day:03d}', task_number='T1', task_status='样件运行', transmission_model='M1',
+                test_content='耐久', date=timezone.make_aware(datetime(2025, 1, day, 12)), sample_number='S1',
+                device_number='E1', bench_status='试验运行', running=8, progress='10', dvp_plan='是',
+                responsible_person='张三',
+            )
+
+    def get_records(self, page_size):
+        return self.client.get(reverse('experiment:get_device_history_records'), {
+            'device_number': 'E1', 'month': '2025-01', 'page_size': page_size,
+        })
+
+    def test_page_size_is_clamped(self):
+        for page_size, expected in (('0', 1), ('-5', 1), ('2', 2), ('1000', 3), ('abc', 3)):
+            response = self.get_records(page_size)
+            self.assertEqual(response.status_code, 200, page_size)
+            self.assertEqual(len(response.json()['data']), expected, page_size)
+
+
+
+class DeviceHistoryQueryCountTests(TestCase):
+    """查询次数与记录数无关；不依赖 SQLite，可以在 DB_ENGINE=postgresql 下运行"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        self.month = timezone.localdate().replace(day=1)
+
+    def create_runs(self, progresses, month_offset=0):
+        month = (self.month - timedelta(days=31 * month_offset)).replace(day=1)
+        start = Device_run.objects.count()
+        Device_run.objects.bulk_create([
+            Device_run(
+                id=f'DR{start + index:08d}', task_number='T1', task_status='样件运行', transmission_model='M1',
+                test_content='耐久', date=timezone.make_aware(datetime(month.year, month.month, 1, 12)),
+                sample_number='S1', device_number='E1', bench_status='试验运行', running=8, progress=progress,
+                dvp_plan='是', responsible_person='张三',
+            )
+            for index, progress in enumerate(progresses)
+        ])
+
+    def history(self):
+        response = self.client.get(reverse('experiment:get_device_history'), {'device_number': 'E1'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_progress_average_treats_non_numeric_text_as_zero(self):
+        self.create_runs(['40%', '60', ' 20.5 % ', 'abc', '', '30abc'])
+        self.assertEqual(self.history()[0]['progress_avg'], round(120.5 / 6))
+
+    def test_query_counts_do_not_grow_with_records(self):
+        # 会话、用户、按月汇总
+        self.create_runs(['10%'] * 3)
+        with self.assertNumQueries(3):
+            self.history()
+        for offset in range(1, 6):
+            self.create_runs(['10%'] * 20, month_offset=offset)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.history()), 6)
+
+        # 会话、用户、总数、当前页
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('experiment:get_device_history_records'), {
+                'device_number': 'E1', 'month': self.month.strftime('%Y-%m'), 'page_size': 2,
+            })
+        self.assertEqual(response.json()['total'], 3)
+
+class PdfParsePendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def test_job_submitted_by_another_process_is_pending(self):
+        # 其他进程提交的任务只在缓存中留有进行中标记
+        cache.set(_pending_key('abc'), True)
+        self.assertTrue(is_parse_pending('abc'))
+        response = self.client.get(reverse('experiment:get_pdf_parse_result', args=['abc']))
+        self.assertEqual(response.status_code, 202)
+
+    def test_completion_stores_result_and_clears_pending(self):
+        cache.set(_pending_key('abc'), True)
+        future = Future()
+        future.set_result({'status': 'success', 'task_number': '20250101-01'})
+        _store_result('abc', future)
+        self.assertFalse(is_parse_pending('abc'))
+        self.assertEqual(get_parse_result('abc')['task_number'], '20250101-01')
+
+    def test_unknown_job_is_not_found(self):
+        response = self.client.get(reverse('experiment:get_pdf_parse_result', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+
+class IngestTaskPdfsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def cached_source(self, task_number):
+        # 解析结果预先写入缓存，导入时不需要真正解析 PDF
+        content = f'pdf {task_number}'.encode()
+        store_parse_result(pdf_digest(content), {'status': 'success', 'taskNumber': task_number})
+        return f'{task_number}.pdf', content
+
+    def test_concurrent_insert_is_reported_per_file(self):
+        sources = [self.cached_source(number) for number in ('20250101-01', '20250101-02', '20250101-03')]
+        real_filter = TaskApplication.objects.filter
+
+        def insert_after_dedup_check(**kwargs):
+            # 去重查询之后、批量写入之前，另一个请求写入了相同的任务单号
+            existing = list(real_filter(**kwargs).values_list('task_number', flat=True))
+            task_application_from_result({'taskNumber': '20250101-02'}).save()
+            return mock.Mock(values_list=lambda *args, **kwargs: existing)
+
+        with mock.patch.object(TaskApplication.objects, 'filter', side_effect=insert_after_dedup_check):
+            result = ingest_task_pdfs(sources, executor=None, workers=1)
+
+        statuses = {report['task_number']: report['status'] for report in result['files']}
+        self.assertEqual(statuses, {
+            '20250101-01': 'created', '20250101-02': 'duplicate', '20250101-03': 'created',
+        })
+        self.assertEqual(result['summary']['created'], 2)
+        self.assertEqual(TaskApplication.objects.count(), 3)
+
+    def test_upload_over_file_limit_is_rejected_before_parsing(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            for index in range(MAX_UPLOAD_FILES):
+                zip_file.writestr(f'{index}.pdf', b'pdf')
+        files = [
+            SimpleUploadedFile('tasks.zip', archive.getvalue()),
+            SimpleUploadedFile('extra.pdf', b'pdf'),
+        ]
+        with mock.patch('experiment.views.ingest_task_pdfs') as ingest:
+            response = self.client.post(reverse('experiment:import_task_pdfs'), {'files': files})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(MAX_UPLOAD_FILES + 1), response.json()['message'])
+        ingest.assert_not_called()
+
+
+class ExperimentLogsEquipmentFilterTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        # 两台设备的记录交替写入，E1 的记录分散在不筛选时的多页中
+        ExperimentLog.objects.bulk_create([
+            ExperimentLog(
+                log_id=f'L{index:03d}', task_number='T1', project_code='P1', sample_number='S1', test_content='耐久',
+                equipment_id=f'E{index % 2 + 1}', log_date=timezone.make_aware(datetime(2025, 1, 1, index % 24)),
+                solver='张三',
+            )
+            for index in range(10)
+        ])
+
+    def get_logs(self, **params):
+        return self.client.get(reverse('experiment:get_experiment_logs'), {'limit': 2, **params}).json()
+
+    def test_filter_is_applied_before_paging(self):
+        log_ids = []
+        data = self.get_logs(equipment_id='E1')
+        while True:
+            self.assertTrue(all(log['equipment_id'] == 'E1' for log in data['logs']))
+            log_ids.extend(log['log_id'] for log in data['logs'])
+            if not data['has_more']:
+                break
+            data = self.get_logs(equipment_id='E1', cursor=data['next_cursor'])
+        self.assertEqual(sorted(log_ids), [f'L{index:03d}' for index in range(0, 10, 2)])
+
+
+class TaskIndexSearchTests(TestCase):
+    def setUp(self):
+        rows = [
+            {'id': day * 10 + serial, 'task_number': f'202502{day:02d}-0{serial}',
+             'project_code': 'ABC' if day == 6 else 'XYZ'}
+            for day in range(1, 10) for serial in (1, 2)
+        ]
+        self.index = TaskIndex(rows)
+
+    def search(self, query, limit=50):
+        return [row['task_number'] for row in self.index.search(query, limit)]
+
+    def test_short_query_matches_substring(self):
+        # 与 icontains 一样匹配任意位置，而不只是前缀
+        self.assertEqual(self.search('9-'), ['20250209-02', '20250209-01'])
+        self.assertIn('20250206-01', self.search('01'))
+        self.assertEqual(self.search('bc'), ['20250206-02', '20250206-01'])
+
+    def test_results_are_limited_and_ordered(self):
+        self.assertEqual(self.search('-0', limit=3), ['20250209-02', '20250209-01', '20250208-02'])
+        self.assertEqual(self.search('0206-0'), ['20250206-02', '20250206-01'])
+        self.assertEqual(self.search('nomatch'), [])
+
+    def test_upsert_and_remove_merge_with_built_rows(self):
+        self.index.upsert({'id': 100, 'task_number': '20250206-03', 'project_code': 'ABC'})
+        self.index.upsert({'id': 61, 'task_number': '20250301-01', 'project_code': 'ABC'})  # 修改任务单号
+        self.index.remove(62)
+        self.assertEqual(self.search('bc'), ['20250301-01', '20250206-03'])
+        self.assertEqual(self.search('', limit=2), ['20250301-01', '20250209-02'])
+        self.assertEqual(len(self.index), 18)
+
+    def test_search_time_on_realistic_table(self):
+        rng = random.Random(22)
+        days = [date(2021, 1, 1) + timedelta(days=offset) for offset in range(5 * 365)]
+        rows = [
+            {'id': index, 'task_number': f'{rng.choice(days):%Y%m%d}-{index % 100:02d}',
+             'project_code': ''.join(rng.choices('ABCDEFGHJKMNPQRSTUVWXYZ', k=3)) + str(rng.randint(1, 99))}
+            for index in range(50000)
+        ]
+        index = TaskIndex(rows)
+        for index_id in range(200):
+            index.upsert({**rows[index_id], 'task_number': f'20260101-{index_id:03d}'})
+        for query in ('2', '05', '2024', '202403', '20240315-1', 'abc', 'q7', 'nomatch'):
+            with self.subTest(query=query):
+                elapsed = min(timeit.repeat(lambda: index.search(query, SUGGESTION_LIMIT), number=1, repeat=5))
+                self.assertLess(elapsed, 0.005)
+
+
+
+class TaskIndexUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.task = self.create('20250101-01')
+        self.index = get_task_index()
+
+    def create(self, task_number):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = task_application_from_result({'taskNumber': task_number, 'projectCode': 'ABC'})
+            task.save()
+        return task
+
+    def suggest(self, query):
+        # 只应用修改记录，不重建索引、不查询数据库
+        with self.assertNumQueries(0):
+            numbers = [row['task_number'] for row in suggest_tasks(query)]
+        self.assertIs(get_task_index(), self.index)
+        return numbers
+
+    def test_saves_are_applied_without_rebuilding(self):
+        self.create('20250102-01')
+        self.assertEqual(self.suggest('2025'), ['20250102-01', '20250101-01'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.task_number = '20250103-01'
+            self.task.save()
+        self.assertEqual(self.suggest('2025'), ['20250103-01', '20250102-01'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        self.assertEqual(self.suggest('2025'), ['20250102-01'])
+
+    def test_rolled_back_save_is_not_applied(self):
+        try:
+            with transaction.atomic():
+                task_application_from_result({'taskNumber': '20250102-01'}).save()
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertEqual(self.suggest('2025'), ['20250101-01'])
+
+    def test_missing_change_record_rebuilds(self):
+        self.create('20250102-01')
+        cache.delete(TASK_INDEX_CHANGE_KEY.format(version=cache.get(TASK_INDEX_VERSION_KEY)))
+        self.assertEqual([row['task_number'] for row in suggest_tasks('2025')], ['20250102-01', '20250101-01'])
+        self.assertIsNot(get_task_index(), self.index)
+
+class SaveGanttTasksTests(TestCase):
+    def create_tasks(self, count):
+        start = int(datetime(2025, 1, 1, tzinfo=dt_timezone.utc).timestamp() * 1000)
+        save_gantt_tasks([
+            {'id': f'tmp_{index}', 'name': f'任务{index}', 'start': start, 'end': start + 86400000, 'duration': 1}
+            for index in range(count)
+        ])
+        return [serialize_task(task) for task in GanttProject.objects.order_by('sort_order').values()]
+
+    def save_with_one_change(self, tasks):
+        tasks[0]['name'] = '修改后的任务'
+        with CaptureQueriesContext(connection) as queries:
+            result = save_gantt_tasks(tasks)
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 1, 0))
+        return len(queries)
+
+    def test_query_count_scales_with_changed_tasks_not_total(self):
+        small = self.save_with_one_change(self.create_tasks(5))
+        GanttProject.objects.all().delete()
+        large = self.save_with_one_change(self.create_tasks(300))
+        self.assertEqual(small, large)
+
+    def test_unchanged_save_writes_nothing(self):
+        tasks = self.create_tasks(20)
+        version = save_gantt_tasks(tasks)['version']
+        # atomic 的保存点及释放、读取全部任务、读取版本号，不执行任何写入
+        with self.assertNumQueries(4):
+            result = save_gantt_tasks(tasks)
+        self.assertEqual(result['version'], version)
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 0, 0))
+
+
+class DeviceDailyUsageTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def save_run(self, task_number, running, sample_fault=0):
+        response = self.client.post(reverse('experiment:save_device_run'), {
+            'task_number': task_number, 'task_status': '样件运行', 'transmission_model': 'M1', 'test_content': '耐久',
+            'date': '2025-01-02', 'sample_number': 'S1', 'device_number': 'E1', 'bench_status': '试验运行',
+            'debugging': 1, 'running': running, 'sample_fault': sample_fault, 'bench_fault': 0, 'progress': 10,
+            'remarks': '样件漏油' if sample_fault else '',
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['record_id']
+
+    def assert_rollup_matches_runs(self):
+        expected = Device_run.objects.filter(device_number='E1').aggregate(
+            running=Sum('running'), debugging=Sum('debugging'), sample_fault=Sum('sample_fault'),
+            idle=Sum('idle'), records=Count('id'),
+        )
+        usage = DeviceDailyUsage.objects.get(device_number='E1', day=date(2025, 1, 2))
+        self.assertEqual(
+            (usage.running, usage.debugging, usage.sample_fault, usage.idle, usage.records_count),
+            (expected['running'], expected['debugging'], expected['sample_fault'], expected['idle'],
+             expected['records']),
+        )
+
+    def test_rollup_follows_saves_and_deletes(self):
+        self.save_run('T1', 8)
+        self.assert_rollup_matches_runs()
+        record_id = self.save_run('T2', 6, sample_fault=2)
+        self.assert_rollup_matches_runs()
+
+        response = self.client.post(reverse('experiment:delete_device_run'), {'record_id': record_id})
+        self.assertEqual(response.status_code, 200)
+        self.assert_rollup_matches_runs()
+
+        Device_run.objects.all().delete()
+        DeviceDailyUsage.refresh('E1', date(2025, 1, 2))
+        self.assertFalse(DeviceDailyUsage.objects.exists())
+
+
+class ImportDeviceRunsTests(TestCase):
+    HEADER = '任务单号,任务状态,样件型号,试验内容,日期,样品编号,设备编号,台架状态,调试时长,运行时长,试验进度\n'
+
+    def rows(self, *lines):
+        return iter_import_rows(io.BytesIO((self.HEADER + ''.join(lines)).encode('utf-8-sig')), 'runs.csv')
+
+    def test_bad_rows_are_reported_and_good_rows_imported(self):
+        result = import_device_runs(self.rows(
+            'T1,样件运行,M1,耐久,2025-01-02,S1,E1,试验运行,1,8,10\n',
+            'T1,样件运行,M1,耐久,2025-01-03,S1,E1,试验运行,0,0,20\n',
+            'T1,样件运行,M1,耐久,2025-01-04,S1,E1,试验运行,1,8,5\n',
+            ',样件运行,M1,耐久,2025-01-05,S1,E1,试验运行,1,8,30\n',
+            'T1,样件运行,M1,耐久,2025-01-02,S1,E1,试验运行,1,8,40\n',
+            'T1,样件运行,M1,耐久,2025-01-06,S1,E1,试验运行,1,8,50\n',
+        ), responsible_person='admin', batch_size=2)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['row'] for error in result['errors']], [3, 4, 5, 6])
+        self.assertIn('总和不能为零', result['errors'][0]['message'])
+        self.assertIn('有所增加', result['errors'][1]['message'])
+        self.assertIn('任务单号', result['errors'][2]['message'])
+        self.assertIn('已存在', result['errors'][3]['message'])
+        self.assertEqual(DeviceDailyUsage.objects.count(), 2)
+
+    def test_failed_chunk_is_rolled_back(self):
+        rows = self.rows(
+            'T1,样件运行,M1,耐久,2025-01-02,S1,E1,试验运行,1,8,10\n',
+            'T2,样件运行,M1,耐久,2025-01-02,S1,E1,试验运行,1,8,10\n',
+        )
+        with mock.patch.object(DeviceDailyUsage, 'rebuild', side_effect=RuntimeError('汇总失败')):
+            with self.assertRaises(RuntimeError):
+                import_device_runs(rows, responsible_person='admin')
+        # 记录与汇总在同一事务中写入，汇总失败时记录也不会留下
+        self.assertFalse(Device_run.objects.exists())
+
+
+class GanttConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        start = int(datetime(2025, 1, 1, tzinfo=dt_timezone.utc).timestamp() * 1000)
+        self.task = {'id': 'tmp_1', 'name': '任务', 'start': start, 'end': start + 86400000, 'duration': 1}
+        save_gantt_tasks([self.task])
+
+    def get(self, **headers):
+        return self.client.get(reverse('experiment:get-gantt-data'), headers=headers)
+
+    def test_matching_etag_returns_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        # 只查询版本号，不读取任务表
+        with self.assertNumQueries(1):
+            response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_save_changes_etag_and_document(self):
+        etag = self.get()['ETag']
+        tasks = [serialize_task(task) for task in GanttProject.objects.values()]
+        tasks[0]['name'] = '修改后的任务'
+        save_gantt_tasks(tasks)
+
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['data']['tasks'][0]['name'], '修改后的任务')
+
+
+class ExtractTableTests(TestCase):
+    def test_only_needed_rows_are_extracted(self):
+        content = table_pdf(rows=40)
+        with mock.patch.object(pdf_parsing, 'extract_text', wraps=pdf_parsing.extract_text) as extract_text:
+            table = extract_table_from_pdf(io.BytesIO(content))
+        self.assertEqual(table, [[f'R{i}C0', f'R{i}C1'] for i in range(TASK_TABLE_ROWS)])
+        # 只为需要的行提取单元格文字
+        self.assertEqual(extract_text.call_count, TASK_TABLE_ROWS * 2)
+
+
+class ExperimentLogSearchTests(TestCase):
+    def setUp(self):
+        for log_id, phenomenon, equipment_id in (
+            ('L1', '油温过高，自动停机', 'E1'),
+            ('L2', '油温正常，转速波动', 'E2'),
+            ('L3', '温度传感器断线', 'E3'),
+        ):
+            ExperimentLog.objects.create(
+                log_id=log_id, task_number='T1', project_code='P1', sample_number='S1', test_content='耐久',
+                equipment_id=equipment_id, log_date=timezone.make_aware(datetime(2025, 1, 1)),
+                alarm_phenomenon=phenomenon, solver='张三',
+            )
+
+    def search(self, query):
+        total, log_ids = search_log_ids(query)
+        self.assertEqual(total, len(log_ids))
+        return sorted(log_ids)
+
+    def assert_search_results(self):
+        # 连续汉字按二元组短语匹配，等价于子串匹配
+        self.assertEqual(self.search('温过高'), ['L1'])
+        self.assertEqual(self.search('油温'), ['L1', 'L2'])
+        self.assertEqual(self.search('温'), ['L1', 'L2', 'L3'])
+        self.assertEqual(self.search('油温 停机'), ['L1'])
+        self.assertEqual(self.search('e3'), ['L3'])
+        self.assertEqual(self.search('漏油'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', '全文索引只用于 SQLite')
+    def test_full_text_search(self):
+        self.assertTrue(fts_available())
+        self.assert_search_results()
+        ExperimentLog.objects.get(log_id='L1').delete()
+        self.assertEqual(self.search('油温'), ['L2'])
+
+    def test_icontains_fallback_matches_full_text_search(self):
+        with mock.patch('experiment.log_search.fts_available', return_value=False):
+            self.assert_search_results()
+
+
+class ExportRecordsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+
+    def create_runs(self, count, start=0):
+        Device_run.objects.bulk_create([
+            Device_run(
+                id=f'DR{index:08d}', task_number=f'T{index}', task_status='样件运行', transmission_model='M1',
+                test_content='耐久', date=timezone.make_aware(datetime(2025, 1, 1 + index % 28, 12)),
+                sample_number='S1', device_number='E1', bench_status='试验运行', running=8, progress='10%',
+                dvp_plan='是', responsible_person='张三', remarks='备注，含逗号',
+            )
+            for index in range(start, start + count)
+        ], batch_size=1000)
+
+    def export(self, export_format):
+        # 构造响应时不查询数据库，行在发送时才逐块读取
+        response = self.client.get(
+            reverse('experiment:export_records', args=['device-runs']), {'format': export_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response
+
+    def peak_memory(self, export_format):
+        # xlsx 在构造响应时生成，csv 在发送时生成，两者都计入
+        tracemalloc.start()
+        try:
+            response = self.export(export_format)
+            for _ in response.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_csv_export(self):
+        self.create_runs(3)
+        response = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('.csv"', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(io.StringIO(content[1:])))
+        self.assertEqual(rows[0][:3], ['序号', '任务单号', '任务状态'])
+        self.assertEqual([row[0] for row in rows[1:]], ['DR00000000', 'DR00000001', 'DR00000002'])
+        self.assertEqual(rows[1][5], '2025-01-01 12:00:00')
+        self.assertEqual(rows[1][-1], '备注，含逗号')
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        self.create_runs(3)
+        response = self.export('xlsx')
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:2], ('序号', '任务单号'))
+        self.assertEqual([row[0] for row in rows[1:]], ['DR00000000', 'DR00000001', 'DR00000002'])
+        self.assertEqual(rows[1][5], datetime(2025, 1, 1, 12))
+
+    @mock.patch('experiment.exports.EXPORT_CHUNK_SIZE', 200)
+    def test_memory_does_not_grow_with_row_count(self):
+        rows = 400  # 两个读取块
+        self.create_runs(rows)
+        for export_format in ('csv', 'xlsx'):
+            self.peak_memory(export_format)  # 预热：首次导入 openpyxl 等模块的内存不计入
+        small = {export_format: self.peak_memory(export_format) for export_format in ('csv', 'xlsx')}
+        self.create_runs(rows * 3, start=rows)
+        for export_format, peak in small.items():
+            with self.subTest(format=export_format):
+                # 行数增加到 4 倍，峰值内存基本不变（一次只保留一个读取块）
+                self.assertLess(self.peak_memory(export_format), peak * 1.5)
+
+
+class TaskTreeTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        numbers = ['20241203-01', '20250105-01', '20250105-02', '20250120-01', '20250211-01']
+        TaskApplication.objects.bulk_create([
+            task_application_from_result({'taskNumber': number, 'projectCode': 'ABC' if number < '202502' else 'XYZ'})
+            for number in numbers
+        ])
+
+    def test_counts_by_year_and_month(self):
+        data = self.client.get(reverse('experiment:get_task_tree')).json()
+        self.assertEqual(data['years'], [
+            {'year': '2025', 'count': 4, 'months': [
+                {'month': '02', 'year_month': '202502', 'count': 1},
+                {'month': '01', 'year_month': '202501', 'count': 3},
+            ]},
+            {'year': '2024', 'count': 1, 'months': [{'month': '12', 'year_month': '202412', 'count': 1}]},
+        ])
+        data = self.client.get(reverse('experiment:get_task_tree'), {'project_code': 'xyz'}).json()
+        self.assertEqual([year['count'] for year in data['years']], [1])
+
+    def test_month_endpoint_loads_one_page_at_a_time(self):
+        TaskApplication.objects.bulk_create([
+            task_application_from_result({'taskNumber': f'20250301-{index:03d}'})
+            for index in range(TASK_TREE_PAGE_SIZE + 1)
+        ])
+        url = reverse('experiment:get_task_tree_month', args=['202503'])
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['tasks']), TASK_TREE_PAGE_SIZE)
+        self.assertEqual(first['tasks'][0]['task_number'], f'20250301-{TASK_TREE_PAGE_SIZE:03d}')
+        self.assertTrue(first['has_more'])
+
+        rest = self.client.get(url, {'offset': first['next_offset']}).json()
+        self.assertEqual([task['task_number'] for task in rest['tasks']], ['20250301-000'])
+        self.assertFalse(rest['has_more'])
+
+        month = self.client.get(reverse('experiment:get_task_tree_month', args=['202501'])).json()
+        self.assertEqual(
+            [task['task_number'] for task in month['tasks']], ['20250120-01', '20250105-02', '20250105-01']
+        )
+        self.assertEqual(self.client.get(reverse('experiment:get_task_tree_month', args=['2025-1'])).status_code, 400)
+
+    def test_year_month_follows_task_number_on_save(self):
+        task = TaskApplication.objects.get(task_number='20250211-01')
+        task.task_number = '20250401-01'
+        task.save(update_fields=['task_number'])
+        self.assertEqual(TaskApplication.objects.get(pk=task.pk).year_month, '202504')
 
-# Create your tests here.
+    def test_migration_backfills_year_month(self):
+        TaskApplication.objects.update(year_month='')
+        migration = importlib.import_module('experiment.migrations.0009_taskapplication_year_month')
+        migration.backfill_year_month(apps, None)
+        self.assertEqual(
+            dict(TaskApplication.objects.values_list('task_number', 'year_month')),
+            {'20241203-01': '202412', '20250105-01': '202501', '20250105-02': '202501',
+             '20250120-01': '202501', '20250211-01': '202502'},
+        )
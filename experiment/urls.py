@@ -2,13 +2,13 @@ from django.urls import path
 from .views import (
     experiment_tasks_day, get_outlines, save_task, delete_task, 
     experiment_tasks_long, save_gantt_data, get_gantt_data,
-    experiment_tasks_apply, experiment_progress, get_task_details, 
-    parse_task_pdf, delete_task_application, update_task_application,
-    search_task_applications, experiment_tasks_run, save_device_run,
-    get_device_run, delete_device_run, experiment_tasks_log,
-    experiment_statistics_device, experiment_statistics_project,
-    get_device_history, get_experiment_logs, get_experiment_log,
-    save_experiment_log, delete_experiment_log, search_experiment_logs
+    experiment_tasks_apply, experiment_progress, get_task_tree, get_task_tree_month, get_task_details, 
+    parse_task_pdf, get_pdf_parse_result, import_task_pdfs, delete_task_application, update_task_application,
+    search_task_applications, task_suggestions, experiment_tasks_run, save_device_run,
+    get_device_run, delete_device_run, import_device_runs, export_records, experiment_tasks_log,
+    experiment_statistics_device, experiment_statistics_project, get_device_utilization,
+    get_device_history, get_device_history_records, get_experiment_logs, get_experiment_log,
+    save_experiment_log, delete_experiment_log, search_experiment_logs, fulltext_search_experiment_logs
 )
 
 app_name = 'experiment'
@@ -33,11 +33,16 @@ urlpatterns = [
 
     
     # 获取任务详情的 API 路由
+    path('api/task-tree/', get_task_tree, name='get_task_tree'),
+    path('api/task-tree/<str:year_month>/', get_task_tree_month, name='get_task_tree_month'),
     path('api/task-details/<str:task_number>/', get_task_details, name='get_task_details'),
     path('api/parse-task-pdf/', parse_task_pdf, name='parse_task_pdf'),
+    path('api/pdf-parse-result/<str:job_id>/', get_pdf_parse_result, name='get_pdf_parse_result'),
+    path('api/import-task-pdfs/', import_task_pdfs, name='import_task_pdfs'),
     path('api/delete-task-application/', delete_task_application, name='delete_task_application'),
     path('api/update-task-application/', update_task_application, name='update_task_application'),
     path('api/search-task-applications/', search_task_applications, name='search_task_applications'),
+    path('api/task-suggestions/', task_suggestions, name='task_suggestions'),
 
     ## 设置试验统计路由
     # 设置试验运行统计路由
@@ -45,7 +50,9 @@ urlpatterns = [
     path('api/save-device-run/', save_device_run, name='save_device_run'),
     path('api/get-device-run/<str:record_id>/', get_device_run, name='get_device_run'),
     path('api/delete-device-run/', delete_device_run, name='delete_device_run'),
+    path('api/import-device-runs/', import_device_runs, name='import_device_runs'),
     path('api/get-device-history/', get_device_history, name='get_device_history'),
+    path('api/get-device-history-records/', get_device_history_records, name='get_device_history_records'),
     # 设置试验履历表路由
     path('experiment_tasks_log/', experiment_tasks_log, name='experiment_tasks_log'),
     path('api/get-experiment-logs/', get_experiment_logs, name='get_experiment_logs'),
@@ -53,8 +60,12 @@ urlpatterns = [
     path('api/save-experiment-log/', save_experiment_log, name='save_experiment_log'),
     path('api/delete-experiment-log/', delete_experiment_log, name='delete_experiment_log'),
     path('api/search-experiment-logs/', search_experiment_logs, name='search_experiment_logs'),
+    path('api/fulltext-search-experiment-logs/', fulltext_search_experiment_logs, name='fulltext_search_experiment_logs'),
+    # 设置数据导出路由
+    path('api/export/<str:kind>/', export_records, name='export_records'),
     # 设置按照设备统计路由
     path('experiment_statistics_device/', experiment_statistics_device, name='experiment_statistics_device'),
+    path('api/get-device-utilization/', get_device_utilization, name='get_device_utilization'),
     # 设置按照项目统计路由
     path('experiment_statistics_project/', experiment_statistics_project, name='experiment_statistics_project'),
 ]
@@ -1,6 +1,4 @@
 import logging
-import pdfplumber
-import re
 from django.views.decorators.csrf import csrf_exempt
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -8,8 +6,32 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.core.exceptions import PermissionDenied
 from .models import *
 from comprehensive.models import *
+from comprehensive.outline_index import get_outlines_by_project
+from comprehensive.sequences import generate_record_ids
+from .gantt import (
+    GanttVersionConflict, get_gantt_delta, get_gantt_document, get_gantt_last_modified,
+    get_gantt_version, save_gantt_tasks
+)
+from .pdf_parsing import (
+    get_parse_result, get_pdf_executor, is_parse_pending, parse_chinese_duration, pdf_parse_workers,
+    submit_pdf_parse,
+)
+from .log_search import highlight, search_log_ids
+from .log_listing import keyset_page, parse_fields, serialize_logs
+from .exports import ExportError, export_permission, export_response
+from .task_pdf_import import (
+    MAX_UPLOAD_FILES, TaskPdfImportError, count_zip_pdfs, ingest_task_pdfs, iter_zip_sources,
+)
+from .task_tree import month_tasks, task_tree_counts
+from .task_index import MAX_SUGGESTION_LIMIT, SUGGESTION_LIMIT, search_task_numbers, suggest_tasks
+from .device_run_import import (
+    DEVICE_RUN_REQUIRED_FIELDS, DeviceRunImportError, import_device_runs as run_device_run_import,
+    iter_import_rows, validate_device_run_hours
+)
 from django.utils.dateparse import parse_date
 from django.http import JsonResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from .models import GanttProject
 import json
@@ -18,7 +40,8 @@ from equipment.models import Equipment
 from django.db import models
 from django.contrib import messages
 import traceback  # 添加traceback模块
-from django.db.models import Q, Sum, Count, Avg
+from django.db.models import Q, F, Sum, Count, Avg, Value, Case, When
+from django.db.models.functions import Cast, Replace, TruncMonth
 from django.utils import timezone
 from django.urls import reverse
 from django.core.files.storage import FileSystemStorage
@@ -31,8 +54,11 @@ import os
 @login_required
 def get_outlines(request, project_code):
     try:
-        outlines = Outlines.objects.filter(project=project_code).values('outline_num', 'outline_name')
-        return JsonResponse({'outlines': list(outlines)})
+        outlines = get_outlines_by_project([project_code]).get(project_code, [])
+        return JsonResponse({'outlines': [
+            {'outline_num': outline.outline_num, 'outline_name': outline.outline_name}
+            for outline in outlines
+        ]})
     except Exception as e:
         logger.error(f"Error in get_outlines: {str(e)}")
         return JsonResponse({'outlines': [], 'error': str(e)}, status=500)
@@ -42,15 +68,16 @@ def experiment_tasks_day(request):
     try:
         if not request.user.has_perm('experiment.view_tasks'):
             raise PermissionDenied
-        tasks = Tasks.objects.exclude(task_status="已完成").order_by('task_date')
+        tasks = list(Tasks.objects.exclude(task_status="已完成").order_by('task_date'))
         user_has_permission = request.user.has_perm('experiment.change_tasks')
 
         # 获取所有设备编号
         equipment_list = Equipment.objects.values('equipment_id')
 
-        # 为每个任务根据项目代号获取对应的 outlines
+        # 一次性批量获取所有任务涉及项目的 outlines，避免逐个任务查询
+        outlines_map = get_outlines_by_project(task.project for task in tasks)
         for task in tasks:
-            task.outlines = Outlines.objects.filter(project=task.project)
+            task.outlines = outlines_map.get(task.project, [])
 
         context = {
             'page_title': '每日任务',
@@ -149,99 +176,65 @@ def save_gantt_data(request):
             logger.warning(f"User: {request.user.username} does not have the required permission.")
             raise PermissionDenied
 
-        data = json.loads(request.POST.get('data'))
-        current_id = -1  # 从-1开始编号
-
-        # 删除所有现有任务
-        GanttProject.objects.all().delete()
+        try:
+            data = json.loads(request.POST.get('data'))
+            version = request.POST.get('version')
+            expected_version = int(version) if version not in (None, '') else None
+        except (TypeError, ValueError):
+            return JsonResponse({'status': 'fail', 'message': 'Invalid Gantt data.'}, status=400)
 
-        # 重新编号并保存任务
-        for task in data['tasks']:
-            task['id'] = current_id  # 为任务分配新的负数ID
-            GanttProject.objects.update_or_create(
-                project_id=current_id,
-                defaults=generate_task_defaults(task)
-            )
-            current_id -= 1  # 递减ID
+        # 与数据库中的任务做差异比较，只写入新增、修改和删除的任务
+        try:
+            result = save_gantt_tasks(data.get('tasks', []), expected_version)
+        except GanttVersionConflict as e:
+            return JsonResponse({
+                'status': 'conflict',
+                'message': str(e),
+                'version': e.current_version
+            }, status=409)
 
-        return JsonResponse({'status': 'success', 'message': 'Gantt data saved successfully.'})
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Gantt data saved successfully.',
+            'version': result['version'],
+            'created': result['created'],
+            'updated': result['updated'],
+            'deleted': result['deleted'],
+            'id_map': result['id_map']
+        })
     return JsonResponse({'status': 'fail', 'message': 'Invalid request method.'})
 
-def generate_task_defaults(task):
-    return {
-        'name': task.get('name', ''),
-        'progress': task.get('progress', 0),
-        'progress_by_worklog': task.get('progressByWorklog', False),
-        'relevance': task.get('relevance', 0),
-        'type': task.get('type', ''),
-        'type_id': task.get('typeId', ''),
-        'description': task.get('description', ''),
-        'code': task.get('code', ''),
-        'level': task.get('level', 0),
-        'status': task.get('status', 'STATUS_ACTIVE'),
-        'depends': task.get('depends', ''),
-        'can_write': task.get('canWrite', True),
-        'start': datetime.fromtimestamp(task.get('start') / 1000),  # 转换时间戳为日期时间
-        'duration': task.get('duration', 0),
-        'end': datetime.fromtimestamp(task.get('end') / 1000),  # 转换时间戳为日期时间
-        'start_is_milestone': task.get('startIsMilestone', False),
-        'end_is_milestone': task.get('endIsMilestone', False),
-        'collapsed': task.get('collapsed', False),
-        'assigs': task.get('assigs', []),
-        'has_child': task.get('hasChild', False),
-    }
-
 def get_gantt_data(request):
-    tasks = GanttProject.objects.all().values()
-    task_list = []
-
-    # 格式化任务数据
-    for task in tasks:
-        task_list.append({
-            'id': task['project_id'],
-            'name': task['name'],
-            'progress': task['progress'],
-            'progressByWorklog': task['progress_by_worklog'],
-            'relevance': task['relevance'],
-            'type': task['type'],
-            'typeId': task['type_id'],
-            'description': task['description'],
-            'code': task['code'],
-            'level': task['level'],
-            'status': task['status'],
-            'depends': task['depends'],
-            'canWrite': task['can_write'],
-            'start': int(task['start'].timestamp() * 1000),
-            'duration': task['duration'],
-            'end': int(task['end'].timestamp() * 1000),
-            'startIsMilestone': task['start_is_milestone'],
-            'endIsMilestone': task['end_is_milestone'],
-            'collapsed': task['collapsed'],
-            'assigs': task['assigs'],
-            'hasChild': task['has_child']
-        })
-
-    response_data = {
-        "tasks": task_list,
-        "resources": [
-            {"id": "tmp_1", "name": "Resource 1"},
-            {"id": "tmp_2", "name": "Resource 2"},
-            {"id": "tmp_3", "name": "Resource 3"},
-            {"id": "tmp_4", "name": "Resource 4"}
-        ],
-        "roles": [
-            {"id": "tmp_1", "name": "Project Manager"},
-            {"id": "tmp_2", "name": "Worker"},
-            {"id": "tmp_3", "name": "Stakeholder"},
-            {"id": "tmp_4", "name": "Customer"}
-        ],
-        "canWrite": True,
-        "canDelete": True,
-        "canWriteOnParent": True,
-        "canAdd": True
-    }
+    """
+    获取甘特图数据。
+
+    响应带 ETag/Last-Modified，版本未变化时对 If-None-Match/If-Modified-Since 返回 304；
+    传入 since=版本号 时只返回该版本之后变化的任务。
+    """
+    version = get_gantt_version()
+    since = request.GET.get('since')
+    try:
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return JsonResponse({'status': 'fail', 'message': 'Invalid since parameter.'}, status=400)
+
+    etag = f'"gantt-{version}"' if since is None else f'"gantt-{version}-since-{since}"'
+    last_modified = get_gantt_last_modified(version)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if not_modified is not None:
+        response = not_modified
+    elif since is None:
+        response = HttpResponse(get_gantt_document(version), content_type='application/json')
+    else:
+        response = JsonResponse({'status': 'success', 'data': get_gantt_delta(since, version)})
 
-    return JsonResponse({"status": "success", "data": response_data})
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # 浏览器每次都带上 If-None-Match 重新验证，版本未变时只返回 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 @login_required
 def experiment_tasks_apply(request):
@@ -290,31 +283,39 @@ def experiment_tasks_apply(request):
             logger.error(f"保存任务申请失败: {str(e)}")
             return JsonResponse({'status': 'error', 'message': str(e)})
 
-    # 简化任务数据的组织方式，移除筛选相关代码
-    tasks = TaskApplication.objects.all().order_by('-task_number').values(
-        'task_number', 'project_code', 'test_content'
-    )
-    years_data = {}
-    
-    for task in tasks:
-        task_number = task['task_number']
-        year = task_number[:4]
-        month = task_number[4:6]
-        
-        if year not in years_data:
-            years_data[year] = {}
-        if month not in years_data[year]:
-            years_data[year][month] = []
-            
-        years_data[year][month].append(task)
-
+    # 任务树由页面通过 get_task_tree / get_task_tree_month 按需加载，页面大小与任务数量无关
     context = {
         'page_title': '任务委托',
         'can_edit': request.user.has_perm('comprehensive.change_department'),
-        'years_data': years_data
     }
     return render(request, 'experiment_tasks_apply.html', context)
 
+@login_required
+def get_task_tree(request):
+    """任务树的年、月两级节点及各节点的任务单数量，可按项目代号筛选"""
+    return JsonResponse({
+        'status': 'success',
+        'years': task_tree_counts(request.GET.get('project_code', '').strip()),
+    })
+
+@login_required
+def get_task_tree_month(request, year_month):
+    """展开月份节点时加载该月的任务单，offset 用于加载更多"""
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        tasks, has_more = month_tasks(year_month, request.GET.get('project_code', '').strip(), offset)
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'tasks': tasks,
+        'has_more': has_more,
+        'next_offset': offset + len(tasks),
+    })
+
 @login_required
 def get_task_details(request, task_number):
     try:
@@ -355,83 +356,18 @@ def experiment_progress(request):
     return render(request, 'experiment_progress.html', context)
 
 
-def extract_table_from_pdf(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        tables = page.extract_tables()
-        return tables
-
 @csrf_exempt
 @login_required
 def parse_task_pdf(request):
+    """
+    解析上传的任务单 PDF。
+
+    解析在后台进程池中执行，同一文件（按内容 SHA-256）的结果会被缓存；
+    短时间内未完成时返回 pending 和 job_id，前端再通过 get_pdf_parse_result 轮询。
+    """
     if request.method == 'POST' and request.FILES.get('pdf'):
         try:
-            pdf_file = request.FILES['pdf']
-            tables = extract_table_from_pdf(pdf_file)
-
-            if tables:
-                result_dict = {}
-                # 提取委托单位/部门、样品状态/阶段、试验时长、试后件保存期
-                result_dict['编号'] = tables[0][1][5]
-                result_dict['委托单位/部门'] = tables[0][2][1]
-                result_dict['委托人'] = tables[0][2][5]
-                result_dict['项目名称'] = tables[0][3][1]
-                
-                # 确保样品数量是数字
-                sample_quantity = tables[0][4][3]
-                try:
-                    # 尝试提取数字部分
-                    sample_quantity = ''.join(filter(str.isdigit, sample_quantity))
-                    sample_quantity = int(sample_quantity) if sample_quantity else 1
-                except ValueError:
-                    sample_quantity = 1  # 如果转换失败，设置默认值为1
-                
-                result_dict['样品数量'] = str(sample_quantity)
-                result_dict['样品状态/阶段'] = tables[0][4][5]
-                result_dict['样品编号'] = tables[0][5][1]
-                result_dict['是否需要报告'] = tables[0][6][1]
-                result_dict['是否分包'] = tables[0][7][1]
-                result_dict['试后件保存期'] = tables[0][8][1]
-                result_dict['任务来源'] = tables[0][9][1]
-                result_dict['业务类型'] = tables[0][10][1]
-
-                test_contents = tables[0][11][0].strip().replace('\n', '').replace('试验目的和要求：','*').replace('任务内容、目的与要求试验内容：','')
-                result_dict['试验内容'] = test_contents.split('*')[0]
-                result_dict['试验目的和要求'] = test_contents.split('*')[1]
-
-                result_dict['费用：'] = tables[0][12][1]
-                result_dict['试验时长'] = parse_chinese_duration(tables[0][12][5])
-                result_dict['试验依据：'] = tables[0][13][1]
-                result_dict['试验依据内容：'] = tables[0][14][1]
-
-                # 按照字段映射关系返回数据
-                task_data = {
-                    'status': 'success',
-                    'taskNumber': result_dict.get('编号', ''),
-                    'department': result_dict.get('委托单位/部门', ''),
-                    'entrustedPerson': result_dict.get('委托人', ''),
-                    'projectCode': result_dict.get('项目名称', ''),
-                    'sampleStage': result_dict.get('样品状态/阶段', ''),
-                    'sampleNumber': str(sample_quantity),
-                    'sampleCode': result_dict.get('样品编号', ''),
-                    'isSeparated': result_dict.get('是否分包', '否'),
-                    'isRequiredReport': result_dict.get('是否需要报告', '是'),
-                    'savePeriod': result_dict.get('试后件保存期', ''),
-                    'testContent': result_dict.get('试验内容', ''),
-                    'testContentExtra': result_dict.get('试验目的和要求', ''),
-                    'testSpecs': result_dict.get('试验依据内容：', ''),
-                    'run': result_dict.get('试验时长', ''),
-                    'cost': result_dict.get('费用：', ''),
-                    'confirmation': result_dict.get('任务来源', ''),
-                    'testtype': result_dict.get('业务类型', '')
-                }
-                return JsonResponse(task_data)
-            else:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': '未找到表格数据'
-                })
-
+            job_id, result = submit_pdf_parse(request.FILES['pdf'].read())
         except Exception as e:
             logger.error(f"解析PDF失败: {str(e)}")
             return JsonResponse({
@@ -439,30 +375,65 @@ def parse_task_pdf(request):
                 'message': str(e)
             })
 
+        if result is None:
+            return JsonResponse({'status': 'pending', 'job_id': job_id}, status=202)
+        return JsonResponse(result)
+
     return JsonResponse({'status': 'error', 'message': '无效的请求'})
 
-def parse_chinese_duration(time_str):
-    pattern = r'(\d+(?:\.\d+)?)\s*([天小时分钟]+)'
-    matches = re.findall(pattern, time_str)
+@csrf_exempt
+@login_required
+@permission_required('experiment.add_taskapplication', raise_exception=True)
+def import_task_pdfs(request):
+    """批量导入任务单：上传多个 PDF 或一个 zip 压缩包，返回每个文件的处理结果和吞吐统计"""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': '无效的请求'}, status=405)
+
+    uploads = request.FILES.getlist('files')
+    if not uploads:
+        return JsonResponse({'status': 'error', 'message': '请上传 PDF 文件或 zip 压缩包'}, status=400)
+
+    def sources():
+        for upload in uploads:
+            if upload.name.lower().endswith('.zip'):
+                yield from iter_zip_sources(upload)
+            elif upload.name.lower().endswith('.pdf'):
+                yield upload.name, upload.read()
 
-    total_hours = 0
-    unit_map = {
-        '月': 24 * 30,
-        '天': 24,
-        '小时': 1,
-        '分钟': 1 / 60
-    }
+    try:
+        # 解析在请求中同步完成，先检查文件数量（zip 只读取目录）
+        file_count = 0
+        for upload in uploads:
+            if upload.name.lower().endswith('.zip'):
+                file_count += count_zip_pdfs(upload)
+            elif upload.name.lower().endswith('.pdf'):
+                file_count += 1
+        if file_count > MAX_UPLOAD_FILES:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'一次最多导入 {MAX_UPLOAD_FILES} 个 PDF（本次 {file_count} 个），更多文件请使用 import_task_pdfs 命令导入'
+            }, status=400)
+        result = ingest_task_pdfs(sources(), get_pdf_executor(), pdf_parse_workers())
+    except TaskPdfImportError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"批量导入任务单失败: {str(e)}\n{traceback.format_exc()}")
+        return JsonResponse({'status': 'error', 'message': f'导入失败: {str(e)}'}, status=500)
 
-    for value, unit in matches:
-        value = float(value)
-        for chinese_unit, factor in unit_map.items():
-            if chinese_unit in unit:
-                total_hours += value * factor
-                break
-        else:
-            raise ValueError(f"无法识别的时间单位: {unit}")
+    return JsonResponse({'status': 'success', **result})
 
-    return total_hours
+@login_required
+def get_pdf_parse_result(request, job_id):
+    """轮询任务单 PDF 的解析结果"""
+    result = get_parse_result(job_id)
+    if result is not None:
+        return JsonResponse(result)
+    if is_parse_pending(job_id):
+        return JsonResponse({'status': 'pending', 'job_id': job_id}, status=202)
+    return JsonResponse({
+        'status': 'error',
+        'message': '解析任务不存在或已过期，请重新上传'
+    }, status=404)
 
 @login_required
 @permission_required('experiment.delete_taskapplication', raise_exception=True)
@@ -573,17 +544,34 @@ def update_task_application(request):
         'message': '不支持的请求方法'
     }, status=405)
 
+@login_required
+def task_suggestions(request):
+    """任务单号输入联想：按任务单号或项目代号匹配，从进程内索引返回，不查询数据库"""
+    try:
+        limit = int(request.GET.get('limit', SUGGESTION_LIMIT))
+    except ValueError:
+        limit = SUGGESTION_LIMIT
+    return JsonResponse({
+        'status': 'success',
+        'tasks': suggest_tasks(request.GET.get('q', ''), limit),
+    })
+
 @login_required
 def search_task_applications(request):
-    """搜索任务申请数据"""
-    query = request.GET.get('query', '')
+    """
+    搜索任务申请数据。
+
+    按任务单号、项目代号子串匹配（不区分大小写），按任务单号降序最多返回 MAX_SUGGESTION_LIMIT（50）条；
+    没有查询字符串时返回最近创建的 20 条。
+    """
+    query = request.GET.get('query', '').strip()
     
     if query:
-        # 搜索包含查询字符串的任务单号或项目代号
-        tasks = TaskApplication.objects.filter(
-            models.Q(task_number__icontains=query) | 
-            models.Q(project_code__icontains=query)
-        ).values('task_number', 'project_code', 'sample_code', 'test_content', 'test_specs')
+        # 先用联想索引找出匹配的任务单号（最多 MAX_SUGGESTION_LIMIT 条），再按任务单号取详细字段
+        task_numbers = search_task_numbers(query, MAX_SUGGESTION_LIMIT)
+        tasks = TaskApplication.objects.filter(task_number__in=task_numbers).order_by('-task_number').values(
+            'task_number', 'project_code', 'sample_code', 'test_content', 'test_specs'
+        )
     else:
         # 如果没有查询字符串，返回最近的20条记录
         tasks = TaskApplication.objects.all().order_by('-created_at')[:20].values(
@@ -600,11 +588,7 @@ def experiment_tasks_run(request):
         # 获取设备列表，按equipment_id升序排列
         equipment_list = Equipment.objects.all().order_by('equipment_id').values('equipment_id', 'name')
         
-        # 获取TaskApplication中的任务单号和详细信息
-        task_applications = list(TaskApplication.objects.all().values(
-            'task_number', 'project_code', 'test_content', 'sample_code', 'sample_name'
-        ).order_by('-task_number'))  # 按任务单号降序排序，转换为列表
-        
+        # 任务单号通过 task_suggestions 接口输入联想，页面不再加载全部任务委托
         # 处理选择的设备
         selected_device = request.GET.get('device_number', '')
         device_history = []
@@ -615,85 +599,14 @@ def experiment_tasks_run(request):
             'sample_fault_total': 0
         }
 
-        # 如果有选择设备，获取该设备的历史记录
+        # 如果有选择设备，获取该设备近一年的按月汇总（明细在展开月份时再加载）
         if selected_device:
             try:
-                # 计算一年前的日期
-                one_year_ago = datetime.now() - timedelta(days=365)
-
-                # 获取设备一年内的历史记录
-                device_records = Device_run.objects.filter(
-                    device_number=selected_device,
-                    date__gte=one_year_ago
-                ).order_by('-date')
-
-                # 按年月分组
-                history_data = {}
-
-                for record in device_records:
-                    year = record.date.year
-                    month = record.date.month
-
-                    # 创建年月键
-                    year_month_key = f"{year}年{month}月"
-
-                    if year_month_key not in history_data:
-                        history_data[year_month_key] = []
-
-                    # 添加记录到对应年月分组
-                    history_data[year_month_key].append({
-                        'id': record.id,
-                        'task_number': record.task_number,
-                        'sample_number': record.sample_number,
-                        'date': record.date.strftime('%Y-%m-%d'),
-                        'progress': record.progress,
-                        'bench_status': record.bench_status,
-                        'running': float(record.running),
-                        'debugging': float(record.debugging),
-                        'sample_fault': float(record.sample_fault)
-                    })
-
-                # 转换为有序列表格式
-                for year_month, records in sorted(history_data.items(), reverse=True):
-                    device_history.append({
-                        'year_month': year_month,
-                        'records': records
-                    })
-
-                # 计算第一个月的统计数据（如果有数据）
-                if device_history and device_history[0]['records']:
-                    first_month = device_history[0]
-                    total_progress = 0
-                    total_running = 0
-                    total_sample_fault = 0
-                    records_count = len(first_month['records'])
-
-                    for record in first_month['records']:
-                        # 提取进度数值
-                        progress = record.get('progress', '0%')
-                        if progress and isinstance(progress, str) and '%' in progress:
-                            progress = float(progress.replace('%', ''))
-                        else:
-                            progress = 0
-                        total_progress += progress
-
-                        # 累计运行时长
-                        total_running += float(record.get('running', 0))
-
-                        # 累计样件故障时长
-                        total_sample_fault += float(record.get('sample_fault', 0))
-
-                    # 计算统计数据
-                    device_stats = {
-                        'progress_avg': round(total_progress / records_count) if records_count > 0 else 0,
-                        'records_count': records_count,
-                        'running_total': round(total_running, 1),
-                        'sample_fault_total': round(total_sample_fault, 1)
-                    }
+                device_history = get_device_month_summary(selected_device)
+                if device_history:
+                    device_stats = device_history[0]
             except Exception as e:
-                import traceback
-                print(f"获取设备历史记录出错: {str(e)}")
-                print(traceback.format_exc())
+                logger.error(f"获取设备历史记录出错: {str(e)}\n{traceback.format_exc()}")
         
         # 获取Device_run中的任务信息，按日期降序排序
         context = {
@@ -722,6 +635,10 @@ def experiment_tasks_run(request):
     
 # 设备运行信息API视图函数
 #============================================================
+def generate_record_id(model, field, prefix, year_month):
+    """按 前缀 + 年月 + 4位序号 生成记录ID，例如 DR2025060001"""
+    return generate_record_ids(model, field, prefix, year_month)[0]
+
 @csrf_exempt
 @login_required
 def save_device_run(request):
@@ -745,53 +662,11 @@ def save_device_run(request):
                 sample_fault = float(request.POST.get('sample_fault', 0) or 0)
                 bench_fault = float(request.POST.get('bench_fault', 0) or 0)
                 
-                total_time = debugging + running + sample_fault + bench_fault
-                
-                if total_time == 0:
-                    message = '四个时长（调试、运行、样件故障、台架故障）的总和不能为零'
-                    logger.warning(f"保存失败: {message}")
-                    
-                    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                        return JsonResponse({
-                            'status': 'error',
-                            'message': message
-                        }, status=400)
-                    
-                    messages.error(request, message)
-                    return redirect('experiment:experiment_tasks_run')
-                
-                # 新增验证：检查台架状态与时长匹配
-                status_time_valid = True
-                status_time_message = ''
-                
-                if bench_status == '试验调试' and debugging <= 0:
-                    status_time_valid = False
-                    status_time_message = '台架状态为"试验调试"时，调试时长必须大于零'
-                elif bench_status == '试验运行' and running <= 0:
-                    status_time_valid = False
-                    status_time_message = '台架状态为"试验运行"时，运行时长必须大于零'
-                elif bench_status == '样件故障' and sample_fault <= 0:
-                    status_time_valid = False
-                    status_time_message = '台架状态为"样件故障"时，样件故障时长必须大于零'
-                elif bench_status == '设备故障' and bench_fault <= 0:
-                    status_time_valid = False
-                    status_time_message = '台架状态为"设备故障"时，台架故障时长必须大于零'
-                
-                if not status_time_valid:
-                    logger.warning(f"保存失败: {status_time_message}")
-                    
-                    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                        return JsonResponse({
-                            'status': 'error',
-                            'message': status_time_message
-                        }, status=400)
-                    
-                    messages.error(request, status_time_message)
-                    return redirect('experiment:experiment_tasks_run')
-                
-                # 新增验证：当有故障时长大于0时，备注不能为空
-                if (sample_fault > 0 or bench_fault > 0) and not remarks:
-                    message = '当"样件故障时长"或"台架故障时长"大于零时，备注不能为空'
+                # 时长总和、台架状态与时长匹配、故障备注等规则与批量导入共用
+                message = validate_device_run_hours(
+                    bench_status, debugging, running, sample_fault, bench_fault, remarks
+                )
+                if message:
                     logger.warning(f"保存失败: {message}")
                     
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -831,16 +706,7 @@ def save_device_run(request):
                 logger.warning("时长值转换失败，将继续进行其他验证")
             
             # 后端验证必填字段
-            required_fields = {
-                'task_number': '任务单号',
-                'task_status': '任务状态', 
-                'transmission_model': '样件型号',
-                'test_content': '试验内容',
-                'date': '日期',
-                'sample_number': '样品编号',
-                'device_number': '设备编号',
-                'bench_status': '台架状态'
-            }
+            required_fields = DEVICE_RUN_REQUIRED_FIELDS
             
             missing_fields = []
             for field, field_name in required_fields.items():
@@ -888,26 +754,8 @@ def save_device_run(request):
                 current_date = datetime.strptime(date_str, '%Y-%m-%d')
                 year_month = current_date.strftime('%Y%m')
                 
-                # 查找该年月下最大的序号
-                latest_records = Device_run.objects.filter(
-                    id__startswith=f"DR{year_month}"
-                ).order_by('-id')
-                
-                if latest_records.exists():
-                    # 如果存在记录，提取最后一个记录的序号并加1
-                    latest_id = latest_records[0].id
-                    try:
-                        # 假设格式为 DR2025060001, 提取最后的序号部分
-                        seq_number = int(latest_id[8:]) + 1
-                    except ValueError:
-                        # 如果提取失败，从1开始
-                        seq_number = 1
-                else:
-                    # 如果不存在记录，从1开始
-                    seq_number = 1
-                
                 # 生成新ID：DR + 年月 + 4位序号，例如DR2025060001
-                record_id = f"DR{year_month}{seq_number:04d}"
+                record_id = generate_record_id(Device_run, 'id', 'DR', year_month)
                 logger.debug(f"自动生成设备运行记录ID: {record_id}")
             
             # 准备设备运行数据
@@ -959,10 +807,13 @@ def save_device_run(request):
                 
             # 更新或创建记录
             try:
-                device_run, created = Device_run.objects.update_or_create(
-                    id=record_id,
-                    defaults=device_data
-                )
+                with transaction.atomic():
+                    device_run, created = Device_run.objects.update_or_create(
+                        id=record_id,
+                        defaults=device_data
+                    )
+                    # 同步更新设备日利用率汇总
+                    DeviceDailyUsage.refresh(device_number, device_data['date'].date())
                 
                 action = "创建" if created else "更新"
                 
@@ -1065,7 +916,11 @@ def delete_device_run(request):
                 }, status=400)
                 
             device_run = Device_run.objects.get(id=record_id)
-            device_run.delete()
+            usage_day = timezone.localtime(device_run.date).date()
+            with transaction.atomic():
+                device_run.delete()
+                # 同步更新设备日利用率汇总
+                DeviceDailyUsage.refresh(device_run.device_number, usage_day)
             
             return JsonResponse({
                 'status': 'success',
@@ -1087,6 +942,80 @@ def delete_device_run(request):
         'message': '不支持的请求方法'
     }, status=405)
 
+@csrf_exempt
+@login_required
+@permission_required('experiment.add_device_run', raise_exception=True)
+def import_device_runs(request):
+    """从上传的 CSV/XLSX 文件批量导入设备运行记录，返回成功条数和失败行"""
+    if request.method != 'POST':
+        return JsonResponse({
+            'status': 'error',
+            'message': '不支持的请求方法'
+        }, status=405)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return JsonResponse({
+            'status': 'error',
+            'message': '请上传导入文件'
+        }, status=400)
+
+    try:
+        batch_size = min(max(int(request.POST.get('batch_size', 500)), 1), 5000)
+    except ValueError:
+        batch_size = 500
+
+    try:
+        result = run_device_run_import(
+            iter_import_rows(upload, upload.name),
+            responsible_person=request.user.username,
+            batch_size=batch_size,
+        )
+    except DeviceRunImportError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error(f"批量导入设备运行记录失败: {str(e)}\n{traceback.format_exc()}")
+        return JsonResponse({
+            'status': 'error',
+            'message': f'导入失败: {str(e)}'
+        }, status=500)
+
+    return JsonResponse({
+        'status': 'success',
+        'message': f"成功导入 {result['created']} 条记录，失败 {len(result['errors'])} 行",
+        'created': result['created'],
+        'errors': result['errors']
+    })
+
+@login_required
+def export_records(request, kind):
+    """
+    流式导出设备运行记录、试验履历或任务委托为 CSV/XLSX。
+
+    支持与页面相同的筛选参数：device、start、end（YYYY-MM-DD）、task_number；
+    format 为 csv（默认）或 xlsx。
+    """
+    try:
+        permission = export_permission(kind)
+    except ExportError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=404)
+    if not request.user.has_perm(permission):
+        raise PermissionDenied
+
+    try:
+        return export_response(kind, request.GET, request.GET.get('format', 'csv'))
+    except ExportError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+
 # 设置试验履历表视图函数
 @login_required
 def experiment_tasks_log(request):
@@ -1103,49 +1032,43 @@ def experiment_tasks_log(request):
 # 获取所有试验履历表记录
 @login_required
 def get_experiment_logs(request):
-    """获取试验履历表记录，支持按时间筛选"""
+    """
+    获取试验履历表记录，支持按时间和设备编号（equipment_id）筛选。
+
+    按 (log_date, log_id) 游标分页：limit 每页条数（默认50，最大500），cursor 为上一页返回的 next_cursor；
+    fields 默认只返回列表需要的摘要字段（长文本截断为预览），fields=all 返回全部字段，
+    也可以传入逗号分隔的字段列表。
+    """
     try:
         filter_type = request.GET.get('filter', 'all')
+        try:
+            fields, preview = parse_fields(request.GET.get('fields'))
+            limit = min(max(int(request.GET.get('limit', 50)), 1), 500)
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
         
         # 根据筛选类型确定查询范围
-        if filter_type == 'week':
-            # 最近一周的记录
-            start_date = datetime.now() - timedelta(days=7)
-            logs = ExperimentLog.objects.filter(log_date__gte=start_date)
-        elif filter_type == 'month':
-            # 最近一个月的记录
-            start_date = datetime.now() - timedelta(days=30)
-            logs = ExperimentLog.objects.filter(log_date__gte=start_date)
-        elif filter_type == 'year':
-            # 最近一年的记录
-            start_date = datetime.now() - timedelta(days=365)
-            logs = ExperimentLog.objects.filter(log_date__gte=start_date)
-        else:
-            # 所有记录，限制50条，避免数据量过大
-            logs = ExperimentLog.objects.all()[:50]
+        days = {'week': 7, 'month': 30, 'year': 365}.get(filter_type)
+        logs = ExperimentLog.objects.all()
+        if days:
+            logs = logs.filter(log_date__gte=timezone.now() - timedelta(days=days))
+        equipment_id = request.GET.get('equipment_id', '').strip()
+        if equipment_id:
+            logs = logs.filter(equipment_id=equipment_id)
         
-        # 将记录转换为JSON格式
-        logs_data = []
-        for log in logs:
-            logs_data.append({
-                'log_id': log.log_id,
-                'task_number': log.task_number,
-                'project_code': log.project_code,
-                'sample_number': log.sample_number,
-                'test_content': log.test_content,
-                'equipment_id': log.equipment_id,  # 添加设备编号
-                'stop_duration': float(log.stop_duration),
-                'log_date': log.log_date.strftime('%Y-%m-%dT%H:%M:%S'),
-                'alarm_phenomenon': log.alarm_phenomenon,
-                'alarm_reason': log.alarm_reason,
-                'solution': log.solution,
-                'solver': log.solver,
-                'data_path': log.data_path,
-                'analysis_report': log.analysis_report,  # 添加分析报告字段
-                'remarks': log.remarks
-            })
+        try:
+            logs_data, next_cursor = keyset_page(
+                logs, fields, preview, cursor=request.GET.get('cursor'), limit=limit
+            )
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
         
-        return JsonResponse({'status': 'success', 'logs': logs_data})
+        return JsonResponse({
+            'status': 'success',
+            'logs': logs_data,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        })
     except Exception as e:
         logger.error(f"获取试验履历表记录失败: {str(e)}")
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -1155,25 +1078,10 @@ def get_experiment_logs(request):
 def get_experiment_log(request, log_id):
     """获取单条试验履历表记录"""
     try:
-        log = ExperimentLog.objects.get(log_id=log_id)
-        
-        log_data = {
-            'log_id': log.log_id,
-            'task_number': log.task_number,
-            'project_code': log.project_code,
-            'sample_number': log.sample_number,
-            'test_content': log.test_content,
-            'equipment_id': log.equipment_id,  # 添加设备编号
-            'stop_duration': float(log.stop_duration),
-            'log_date': log.log_date.strftime('%Y-%m-%dT%H:%M:%S'),
-            'alarm_phenomenon': log.alarm_phenomenon,
-            'alarm_reason': log.alarm_reason,
-            'solution': log.solution,
-            'solver': log.solver,
-            'data_path': log.data_path,
-            'analysis_report': log.analysis_report,  # 添加分析报告字段
-            'remarks': log.remarks
-        }
+        logs = serialize_logs(ExperimentLog.objects.filter(log_id=log_id))
+        if not logs:
+            raise ExperimentLog.DoesNotExist
+        log_data = logs[0]
         
         return JsonResponse({'status': 'success', 'data': log_data})
     except ExperimentLog.DoesNotExist:
@@ -1315,24 +1223,8 @@ def save_experiment_log(request):
                 # 获取当前年月
                 year_month = log_date.strftime('%Y%m')
                 
-                # 查找该年月下最大的序号
-                latest_logs = ExperimentLog.objects.filter(
-                    log_id__startswith=f"EL{year_month}"
-                ).order_by('-log_id')
-                
-                if latest_logs.exists():
-                    # 提取最后一个记录的序号并加1
-                    latest_id = latest_logs[0].log_id
-                    try:
-                        # 假设格式为 EL2025060001
-                        seq_number = int(latest_id[8:]) + 1
-                    except ValueError:
-                        seq_number = 1
-                else:
-                    seq_number = 1
-                
                 # 生成新ID：EL + 年月 + 4位序号
-                log_id = f"EL{year_month}{seq_number:04d}"
+                log_id = generate_record_id(ExperimentLog, 'log_id', 'EL', year_month)
                 logger.info(f"生成新记录ID: {log_id}")
                 
             # 处理数据路径和分析报告文件
@@ -1494,43 +1386,67 @@ def delete_experiment_log(request):
 # 搜索履历表记录
 @login_required
 def search_experiment_logs(request):
-    """搜索试验履历表记录"""
+    """搜索试验履历表记录：编号类字段模糊匹配，报警现象、原因、解决办法等走全文索引"""
     query = request.GET.get('query', '')
     
     if query:
         # 搜索包含查询字符串的记录
+        _, matched_ids = search_log_ids(query, limit=200)
         logs = ExperimentLog.objects.filter(
             models.Q(task_number__icontains=query) | 
             models.Q(project_code__icontains=query) |
-            models.Q(sample_number__icontains=query)
+            models.Q(sample_number__icontains=query) |
+            models.Q(log_id__in=matched_ids)
         )
     else:
         # 如果没有查询字符串，返回最近的20条记录
         logs = ExperimentLog.objects.all().order_by('-log_date')[:20]
     
     # 将记录转换为JSON格式
-    logs_data = []
-    for log in logs:
-        logs_data.append({
-            'log_id': log.log_id,
-            'task_number': log.task_number,
-            'project_code': log.project_code,
-            'sample_number': log.sample_number,
-            'test_content': log.test_content,
-            'equipment_id': log.equipment_id,  # 添加设备编号
-            'stop_duration': float(log.stop_duration),
-            'log_date': log.log_date.strftime('%Y-%m-%dT%H:%M:%S'),
-            'alarm_phenomenon': log.alarm_phenomenon,
-            'alarm_reason': log.alarm_reason,
-            'solution': log.solution,
-            'solver': log.solver,
-            'data_path': log.data_path,
-            'analysis_report': log.analysis_report,  # 添加分析报告字段
-            'remarks': log.remarks
-        })
+    logs_data = serialize_logs(logs)
     
     return JsonResponse({'status': 'success', 'logs': logs_data})
 
+@login_required
+def fulltext_search_experiment_logs(request):
+    """
+    试验履历全文检索：按相关度排序并分页，返回高亮片段。
+
+    参数：q 查询词（空格分隔多个词，需同时命中），page 页码，page_size 每页条数（最大100）。
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'status': 'error', 'message': '查询词不能为空'}, status=400)
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '分页参数无效'}, status=400)
+
+    total, log_ids = search_log_ids(query, offset=(page - 1) * page_size, limit=page_size)
+    logs = {log['log_id']: log for log in serialize_logs(ExperimentLog.objects.filter(log_id__in=log_ids))}
+
+    results = []
+    for log_id in log_ids:
+        item = logs.get(log_id)
+        if item is None:
+            continue  # 索引与数据短暂不一致时跳过
+        item['highlight'] = {
+            field: highlight(item[field], query)
+            for field in ('alarm_phenomenon', 'alarm_reason', 'solution', 'remarks')
+        }
+        results.append(item)
+
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'has_next': page * page_size < total,
+        'logs': results
+    })
+
 # 设置按设备统计视图函数
 def experiment_statistics_device(request):
     context = {
@@ -1538,6 +1454,51 @@ def experiment_statistics_device(request):
     }
     return render(request, 'experiment_statistics_device.html', context)
 
+# 设备利用率统计API，数据来自设备日利用率汇总表
+@login_required
+def get_device_utilization(request):
+    """按年或按月统计设备利用率，返回各设备合计以及按月（按年统计时）或按日（按月统计时）的趋势"""
+    try:
+        year = int(request.GET.get('year', datetime.now().year))
+        month = int(request.GET['month']) if request.GET.get('month') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '年份或月份格式无效'}, status=400)
+
+    usages = DeviceDailyUsage.objects.filter(day__year=year)
+    if month:
+        usages = usages.filter(day__month=month)
+    device_number = request.GET.get('device_number', '')
+    if device_number:
+        usages = usages.filter(device_number=device_number)
+
+    hour_sums = {
+        'debugging': Sum('debugging'),
+        'running': Sum('running'),
+        'sample_fault': Sum('sample_fault'),
+        'bench_fault': Sum('bench_fault'),
+        'idle': Sum('idle'),
+    }
+
+    def usage_data(row):
+        hours = {field: float(row[field] or 0) for field in hour_sums}
+        total = sum(hours.values())
+        hours['utilization'] = round((hours['debugging'] + hours['running']) / total * 100, 1) if total else 0
+        return hours
+
+    devices = []
+    for row in usages.values('device_number').annotate(**hour_sums).order_by('device_number'):
+        devices.append({'device_number': row['device_number'], **usage_data(row)})
+
+    if month:
+        trend_rows = usages.values(period=F('day')).annotate(**hour_sums).order_by('period')
+        period_format = '%Y-%m-%d'
+    else:
+        trend_rows = usages.annotate(period=TruncMonth('day')).values('period').annotate(**hour_sums).order_by('period')
+        period_format = '%Y-%m'
+    trend = [{'period': row['period'].strftime(period_format), **usage_data(row)} for row in trend_rows]
+
+    return JsonResponse({'status': 'success', 'devices': devices, 'trend': trend})
+
 # 设置按项目统计视图函数
 def experiment_statistics_project(request):
     context = {
@@ -1545,10 +1506,64 @@ def experiment_statistics_project(request):
     }
     return render(request, 'experiment_statistics_project.html', context)
 
+# 可以转换为数值的试验进度，如 "45"、"45%"、"12.5 %"
+PROGRESS_NUMBER_REGEX = r'^\s*[0-9]+(\.[0-9]+)?\s*%?\s*$'
+
+
+def progress_value():
+    """
+    将 '45%' 形式的试验进度转换为数值，供数据库聚合使用。
+
+    不是数值的进度按 0 计算；PostgreSQL 直接 CAST 这类文本会报错，因此先用正则判断。
+    """
+    return Case(
+        When(
+            progress__regex=PROGRESS_NUMBER_REGEX,
+            then=Cast(Replace('progress', Value('%'), Value('')), models.FloatField()),
+        ),
+        default=Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+
+def get_device_month_summary(device_number, days=365):
+    """在数据库中按月汇总设备近一段时间的运行记录，返回按月份倒序的列表"""
+    start_date = datetime.now() - timedelta(days=days)
+    months = Device_run.objects.filter(
+        device_number=device_number,
+        date__gte=start_date
+    ).annotate(
+        month=TruncMonth('date')
+    ).values('month').annotate(
+        records_count=Count('id'),
+        debugging_total=Sum('debugging'),
+        running_total=Sum('running'),
+        sample_fault_total=Sum('sample_fault'),
+        bench_fault_total=Sum('bench_fault'),
+        idle_total=Sum('idle'),
+        progress_avg=Avg(progress_value()),
+    ).order_by('-month')
+
+    summary = []
+    for month in months:
+        summary.append({
+            'month': month['month'].strftime('%Y-%m'),
+            'year_month': f"{month['month'].year}年{month['month'].month}月",
+            'records_count': month['records_count'],
+            'debugging_total': round(float(month['debugging_total'] or 0), 1),
+            'running_total': round(float(month['running_total'] or 0), 1),
+            'sample_fault_total': round(float(month['sample_fault_total'] or 0), 1),
+            'bench_fault_total': round(float(month['bench_fault_total'] or 0), 1),
+            'idle_total': round(float(month['idle_total'] or 0), 1),
+            'progress_avg': round(month['progress_avg'] or 0),
+        })
+    return summary
+
+
 # 新增API：获取设备历史记录
 @login_required
 def get_device_history(request):
-    """获取特定设备的历史运行记录，按年月分组"""
+    """获取特定设备的历史运行记录，按年月汇总，明细通过 get_device_history_records 按月分页获取"""
     device_number = request.GET.get('device_number', '')
     
     if not device_number:
@@ -1558,52 +1573,9 @@ def get_device_history(request):
         }, status=400)
     
     try:
-        # 计算一年前的日期
-        one_year_ago = datetime.now() - timedelta(days=365)
-        
-        # 获取设备一年内的历史记录
-        device_records = Device_run.objects.filter(
-            device_number=device_number,
-            date__gte=one_year_ago
-        ).order_by('-date')
-        print(device_records)
-        # 按年月分组
-        history_data = {}
-        
-        for record in device_records:
-            year = record.date.year
-            month = record.date.month
-            
-            # 创建年月键
-            year_month_key = f"{year}年{month}月"
-            
-            if year_month_key not in history_data:
-                history_data[year_month_key] = []
-            
-            # 添加记录到对应年月分组
-            history_data[year_month_key].append({
-                'id': record.id,
-                'task_number': record.task_number,
-                'sample_number': record.sample_number,
-                'date': record.date.strftime('%Y-%m-%d'),
-                'progress': record.progress,
-                'bench_status': record.bench_status,
-                'running': float(record.running),  # 添加运行时长
-                'debugging': float(record.debugging),  # 添加调试时长
-                'sample_fault': float(record.sample_fault)  # 添加样件故障时长
-            })
-        
-        # 转换为有序列表格式，以便前端展示
-        history_list = []
-        for year_month, records in sorted(history_data.items(), reverse=True):
-            history_list.append({
-                'year_month': year_month,
-                'records': records
-            })
-        print(history_list)
         return JsonResponse({
             'status': 'success',
-            'data': history_list,
+            'data': get_device_month_summary(device_number),
             'device_number': device_number  # 返回设备编号
         })
     except Exception as e:
@@ -1613,3 +1585,60 @@ def get_device_history(request):
         }, status=500)
 
 
+@login_required
+def get_device_history_records(request):
+    """分页获取设备某个月份的运行记录明细，用于展开历史记录树中的月份"""
+    device_number = request.GET.get('device_number', '')
+    month = request.GET.get('month', '')
+
+    try:
+        month_start = datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return JsonResponse({
+            'status': 'error',
+            'message': '月份格式必须为 "YYYY-MM"'
+        }, status=400)
+
+    if not device_number:
+        return JsonResponse({
+            'status': 'error',
+            'message': '设备编号不能为空'
+        }, status=400)
+
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+    except ValueError:
+        page_size = 20
+
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    records = Device_run.objects.filter(
+        device_number=device_number,
+        date__gte=month_start,
+        date__lt=next_month
+    ).order_by('-date', '-id').values(
+        'id', 'task_number', 'sample_number', 'date', 'progress', 'bench_status',
+        'running', 'debugging', 'sample_fault'
+    )
+
+    page = Paginator(records, page_size).get_page(request.GET.get('page', 1))
+    records_data = []
+    for record in page:
+        records_data.append({
+            'id': record['id'],
+            'task_number': record['task_number'],
+            'sample_number': record['sample_number'],
+            'date': record['date'].strftime('%Y-%m-%d'),
+            'progress': record['progress'],
+            'bench_status': record['bench_status'],
+            'running': float(record['running']),
+            'debugging': float(record['debugging']),
+            'sample_fault': float(record['sample_fault'])
+        })
+
+    return JsonResponse({
+        'status': 'success',
+        'data': records_data,
+        'page': page.number,
+        'has_next': page.has_next(),
+        'total': page.paginator.count
+    })
@@ -0,0 +1,115 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from lab_manage_sys_v1.database import SQLITE_ALIAS
+
+
+class Command(BaseCommand):
+    help = '将源数据库（默认为原 SQLite 数据库）中所有数据表分批复制到目标数据库，目标数据库需要先执行 migrate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=SQLITE_ALIAS, help='源数据库别名，默认 sqlite')
+        parser.add_argument('--target', default=DEFAULT_DB_ALIAS, help='目标数据库别名，默认 default')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批读取和写入的行数')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='不提示确认，直接清空目标数据库中的数据',
+        )
+
+    def handle(self, *args, **options):
+        source, target = options['source'], options['target']
+        batch_size = options['batch_size']
+        if source == target:
+            raise CommandError('源数据库和目标数据库不能相同')
+        for alias in (source, target):
+            if alias not in connections:
+                raise CommandError(f'未配置数据库 "{alias}"，使用 PostgreSQL 时请设置 DB_ENGINE=postgresql')
+        if batch_size < 1:
+            raise CommandError('--batch-size 必须大于零')
+
+        source_tables = set(connections[source].introspection.table_names())
+        target_connection = connections[target]
+        target_tables = set(target_connection.introspection.table_names())
+
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+        ]
+        missing = sorted(model._meta.db_table for model in models if model._meta.db_table not in target_tables)
+        if missing:
+            raise CommandError(f'目标数据库缺少数据表 {", ".join(missing)}，请先执行 migrate --database {target}')
+        skipped = [model for model in models if model._meta.db_table not in source_tables]
+        models = [model for model in models if model._meta.db_table in source_tables]
+        for model in skipped:
+            self.stdout.write(self.style.WARNING(f'源数据库中没有数据表 {model._meta.db_table}，跳过'))
+
+        if options['interactive']:
+            confirm = input(
+                f'将清空数据库 "{target}" 中的 {len(models)} 张数据表，再从 "{source}" 复制数据。\n'
+                '确认继续请输入 "yes"：'
+            )
+            if confirm != 'yes':
+                raise CommandError('已取消')
+
+        started = time.perf_counter()
+        total = 0
+        table_names = [model._meta.db_table for model in models]
+        with transaction.atomic(using=target):
+            # migrate 时写入的内容类型、权限等与源数据库的主键冲突，复制前先清空
+            target_connection.ops.execute_sql_flush(
+                target_connection.ops.sql_flush(no_style(), table_names, allow_cascade=True)
+            )
+            # 与 loaddata 相同：复制期间不检查外键，全部写入后再统一检查
+            with target_connection.constraint_checks_disabled():
+                for model in models:
+                    table_started = time.perf_counter()
+                    copied = self.copy_table(model, source, target, batch_size)
+                    total += copied
+                    self.stdout.write(
+                        f'{model._meta.db_table}: {copied} 行，{time.perf_counter() - table_started:.2f} 秒'
+                    )
+            target_connection.check_constraints(table_names=table_names)
+
+            # 复制时保留了原主键，需要把自增序列调整到最大主键之后
+            with target_connection.cursor() as cursor:
+                for sql in target_connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已复制 {len(models)} 张数据表共 {total} 行，用时 {time.perf_counter() - started:.1f} 秒'
+        ))
+        if target_connection.vendor == 'sqlite':
+            self.stdout.write('目标为 SQLite 时请执行 rebuild_experiment_log_index 重建试验履历全文索引')
+
+    def copy_table(self, model, source, target, batch_size):
+        """按主键顺序流式读取源数据表，每 batch_size 行执行一次批量插入，返回复制的行数"""
+        connection = connections[target]
+        quote_name = connection.ops.quote_name
+        fields = model._meta.concrete_fields
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote_name(model._meta.db_table),
+            ', '.join(quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        # 直接读取字段值而不是模型实例，避免 auto_now 等字段在写入时被重新赋值
+        rows = model._base_manager.using(source).order_by('pk').values_list(
+            *[field.attname for field in fields]
+        ).iterator(chunk_size=batch_size)
+
+        copied = 0
+        batch = []
+        with connection.cursor() as cursor:
+            for row in rows:
+                batch.append([field.get_db_prep_save(value, connection) for field, value in zip(fields, row)])
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    copied += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                copied += len(batch)
+        return copied
@@ -0,0 +1,41 @@
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA 语句不支持参数绑定，名称和值只允许字母、数字和下划线
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def sqlite_pragma_statements(pragmas):
+    """将 SQLITE_PRAGMAS 转换为 PRAGMA 语句，配置无效时抛出 ImproperlyConfigured"""
+    statements = []
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(str(value)):
+            raise ImproperlyConfigured(f'SQLITE_PRAGMAS 配置无效: {name}={value!r}')
+        statements.append((name, f'PRAGMA {name} = {value}'))
+    return statements
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """每个新建的 SQLite 连接执行 SQLITE_PRAGMAS（busy_timeout、mmap 等，设置 SQLITE_WAL=1 时还有 WAL）"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    cursor = connection.connection.cursor()
+    try:
+        for name, statement in sqlite_pragma_statements(pragmas):
+            row = cursor.execute(statement).fetchone()
+            # 网络文件系统等不支持 WAL 时 SQLite 会保留原来的日志模式，不报错
+            if (name == 'journal_mode' and row and row[0].lower() != str(pragmas[name]).lower()
+                    and not connection.is_in_memory_db()):
+                logger.warning('SQLite 日志模式设置为 %s 失败，当前为 %s', pragmas[name], row[0])
+    finally:
+        cursor.close()
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import tempfile
+import threading
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from equipment.models import Equipment, MaintenanceRecord
+from experiment.models import Device_run, DeviceDailyUsage
+from experiment.task_pdf_import import task_application_from_result
+from lab_manage_sys_v1.database import sqlite_pragmas
+
+COPY_TARGET = 'copy_target'
+
+
+def sqlite_settings(path):
+    """在默认数据库配置的基础上改为使用 path 处的 SQLite 文件，默认数据库为 PostgreSQL 时同样适用"""
+    return {**connection.settings_dict, 'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'OPTIONS': {}}
+
+
+# copy_database 测试的目标数据库，在测试框架建立测试数据库之前注册，由测试框架创建、迁移和删除
+COPY_TARGET_PATH = Path(tempfile.gettempdir()) / 'test_lab_manage_copy_target.sqlite3'
+connections.settings.setdefault(COPY_TARGET, {
+    **sqlite_settings(COPY_TARGET_PATH), 'TEST': {**connection.settings_dict['TEST'], 'NAME': COPY_TARGET_PATH},
+})
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class SqlitePragmasTests(SimpleTestCase):
+    def test_wal_is_opt_in(self):
+        self.assertNotIn('journal_mode', sqlite_pragmas({}))
+        self.assertNotIn('journal_mode', sqlite_pragmas({'SQLITE_WAL': '0'}))
+        self.assertEqual(sqlite_pragmas({'SQLITE_WAL': '1'})['journal_mode'], 'WAL')
+        self.assertEqual(sqlite_pragmas({'SQLITE_WAL': '1'})['synchronous'], 'NORMAL')
+
+    def new_connection_pragmas(self, pragmas):
+        # 使用临时数据库文件，不改动测试数据库的日志模式
+        with tempfile.TemporaryDirectory() as directory, override_settings(SQLITE_PRAGMAS=pragmas):
+            wrapper = DatabaseWrapper(sqlite_settings(Path(directory) / 'pragmas.sqlite3'), alias='pragmas')
+            try:
+                return pragma(wrapper, 'journal_mode'), pragma(wrapper, 'busy_timeout'), pragma(wrapper, 'temp_store')
+            finally:
+                wrapper.close()
+
+    def test_pragmas_applied_on_connection_created(self):
+        self.assertEqual(self.new_connection_pragmas(sqlite_pragmas({})), ('delete', 5000, 2))
+        self.assertEqual(self.new_connection_pragmas(sqlite_pragmas({'SQLITE_WAL': '1'})), ('wal', 5000, 2))
+
+
+@skipUnless(connection.vendor == 'sqlite', '默认数据库不是 SQLite')
+class DefaultConnectionPragmasTests(TestCase):
+    def test_default_connection_is_configured(self):
+        self.assertEqual(pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(pragma(connection, 'temp_store'), 2)  # 2 即 MEMORY
+
+
+class ConcurrentDeviceRunWritesTests(TransactionTestCase):
+    """多个线程各用一个数据库连接，同时通过 save_device_run 写入并读取履历列表，不应出现 "database is locked" """
+    WRITERS = 4
+    READERS = 2
+    PER_THREAD = 15
+
+    def setUp(self):
+        User.objects.create_superuser('admin', password='password')
+
+    def client_for_thread(self):
+        client = Client()
+        client.force_login(User.objects.get(username='admin'))
+        return client
+
+    def write(self, index):
+        client = self.client_for_thread()
+        for serial in range(self.PER_THREAD):
+            response = client.post(reverse('experiment:save_device_run'), {
+                'task_number': f'T{index}-{serial}', 'task_status': '样件运行', 'transmission_model': 'M1',
+                'test_content': '耐久', 'date': '2025-01-02', 'sample_number': 'S1', 'device_number': f'E{index % 2}',
+                'bench_status': '试验运行', 'debugging': 1, 'running': 2, 'sample_fault': 0, 'bench_fault': 0,
+                'progress': 10, 'remarks': '',
+            }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            if response.status_code != 200 or response.json().get('status') != 'success':
+                raise AssertionError(response.content.decode())
+
+    def read(self, index):
+        client = self.client_for_thread()
+        for _ in range(self.PER_THREAD):
+            response = client.get(reverse('experiment:get_experiment_logs'), {'limit': 20})
+            if response.status_code != 200:
+                raise AssertionError(response.content.decode())
+
+    def test_mixed_reads_and_writes(self):
+        errors = []
+
+        def run(target, index):
+            try:
+                target(index)
+            except Exception as exc:  # 在主线程中断言
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(self.write, index)) for index in range(self.WRITERS)]
+        threads += [threading.Thread(target=run, args=(self.read, index)) for index in range(self.READERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Device_run.objects.count(), self.WRITERS * self.PER_THREAD)
+        self.assertEqual(
+            sorted(DeviceDailyUsage.objects.values_list('device_number', 'running')),
+            [('E0', 2 * self.PER_THREAD * 2), ('E1', 2 * self.PER_THREAD * 2)],
+        )
+
+
+class CopyDatabaseTests(TransactionTestCase):
+    """从默认数据库复制到一个 SQLite 测试数据库，逐表比较行数"""
+    databases = {'default', COPY_TARGET}
+
+    def test_copy_preserves_row_counts(self):
+        User.objects.create_superuser('admin', password='password')
+        equipment = Equipment.objects.create(
+            equipment_id='A-01', name='台架', type='耐久台架', equipment_status='正常', usage_frequency='高',
+            responsible_person='张三', waiting_cost=0, debugging_cost=0, operating_cost=0,
+        )
+        for day in range(1, 6):
+            MaintenanceRecord.objects.create(equipment=equipment, maintenance_date=date(2025, 1, day), description='保养')
+            task_application_from_result({'taskNumber': f'2025010{day}-01', 'projectCode': 'ABC'}).save()
+
+        out = StringIO()
+        call_command('copy_database', source='default', target=COPY_TARGET, batch_size=2, interactive=False, stdout=out)
+
+        for model in apps.get_models(include_auto_created=True):
+            if not model._meta.managed or model._meta.proxy:
+                continue
+            with self.subTest(table=model._meta.db_table):
+                self.assertEqual(
+                    model._base_manager.using(COPY_TARGET).count(), model._base_manager.using('default').count()
+                )
+        self.assertEqual(
+            list(MaintenanceRecord.objects.using(COPY_TARGET).values_list('equipment_id', 'maintenance_date')),
+            list(MaintenanceRecord.objects.values_list('equipment_id', 'maintenance_date')),
+        )
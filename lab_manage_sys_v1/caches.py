@@ -0,0 +1,51 @@
+"""
+缓存配置，通过环境变量选择后端：
+
+CACHE_BACKEND=locmem（默认）
+    进程内缓存，各进程互不共享，适合开发和测试；多进程部署时缓存失效（版本号递增）只在当前进程生效
+CACHE_BACKEND=file
+    CACHE_LOCATION    缓存目录，默认为项目目录下的 .django_cache，同一台服务器上的进程共享
+CACHE_BACKEND=redis
+    CACHE_LOCATION    redis:// 地址，兼容 Redis 协议的服务均可，需要安装 redis
+
+CACHE_KEY_PREFIX      多个部署共用同一个缓存服务时用于区分
+CACHE_TIMEOUT         默认过期秒数，默认 300
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def cache_settings(base_dir, environ=os.environ):
+    """根据环境变量生成 CACHES 配置"""
+    backend = environ.get('CACHE_BACKEND', 'locmem').strip().lower()
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(f'不支持的 CACHE_BACKEND: {backend!r}，可选 {", ".join(CACHE_BACKENDS)}')
+
+    timeout = environ.get('CACHE_TIMEOUT', '300')
+    try:
+        timeout = int(timeout)
+    except ValueError:
+        raise ImproperlyConfigured(f'环境变量 CACHE_TIMEOUT 必须为整数: {timeout!r}')
+
+    config = {
+        'BACKEND': CACHE_BACKENDS[backend],
+        'KEY_PREFIX': environ.get('CACHE_KEY_PREFIX', 'lab_manage'),
+        'TIMEOUT': timeout,
+    }
+    location = environ.get('CACHE_LOCATION', '')
+    if backend == 'locmem':
+        config['LOCATION'] = location or 'lab_manage'
+    elif backend == 'file':
+        config['LOCATION'] = location or str(base_dir / '.django_cache')
+    else:
+        if not location:
+            raise ImproperlyConfigured('CACHE_BACKEND=redis 时必须设置 CACHE_LOCATION，例如 redis://127.0.0.1:6379/1')
+        config['LOCATION'] = location
+    return {'default': config}
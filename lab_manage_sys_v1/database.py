@@ -0,0 +1,115 @@
+"""
+数据库配置，通过环境变量选择后端：
+
+DB_ENGINE=sqlite（默认）
+    SQLITE_PATH           数据库文件，默认为项目目录下的 db2.sqlite3
+    SQLITE_WAL            设为 1 时启用 WAL 日志模式，读写互不阻塞；WAL 模式会写入数据库文件并一直保留，
+                          默认不启用，避免执行任何 manage.py 命令都改写版本库中的 db2.sqlite3
+
+DB_ENGINE=postgresql
+    POSTGRES_DB / POSTGRES_USER / POSTGRES_PASSWORD / POSTGRES_HOST / POSTGRES_PORT
+    DB_CONN_MAX_AGE       持久连接保持的秒数，默认 60，每次复用前做健康检查
+    DB_POOL               设为 1 时改用 psycopg 连接池（需要 Django 5.1+ 和 psycopg[pool]），不再使用持久连接
+    DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT
+                          连接池的最小、最大连接数和获取连接的超时秒数
+
+使用 PostgreSQL 时原来的 SQLite 文件注册为 "sqlite" 数据库，供 copy_database 命令迁移数据。
+"""
+import os
+from pathlib import Path
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_ALIAS = 'sqlite'
+
+
+def _env_bool(environ, name, default=False):
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'环境变量 {name} 必须为整数: {value!r}')
+
+
+def sqlite_database(path):
+    path = Path(path)
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        # 测试数据库使用文件而不是内存数据库，使 busy_timeout 生效，测试中可以多线程并发写入
+        'TEST': {'NAME': path.with_name(f'test_{path.name}')},
+    }
+    # 事务以 BEGIN IMMEDIATE 开始，在事务开头获取写锁并按 busy_timeout 等待；
+    # 默认的 DEFERRED 事务先读后写，中途升级写锁失败时不会等待，直接报 "database is locked"（Django 5.1+ 支持）
+    if django.VERSION >= (5, 1):
+        config['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+    return config
+
+
+def sqlite_pragmas(environ=os.environ):
+    """
+    SQLite 连接参数，由 index.signals 在每个新建的数据库连接上执行。
+
+    busy_timeout（毫秒）为写锁被占用时的等待时间，超时后才报 "database is locked"。
+    """
+    pragmas = {
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,  # 负数单位为 KiB，约 64MB
+        'temp_store': 'MEMORY',
+    }
+    if _env_bool(environ, 'SQLITE_WAL'):
+        pragmas['journal_mode'] = 'WAL'
+        # WAL 模式下 NORMAL 不会损坏数据库，断电时最多丢失最后几个事务
+        pragmas['synchronous'] = 'NORMAL'
+    return pragmas
+
+
+def postgresql_database(environ):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('POSTGRES_DB', 'lab_manage'),
+        'USER': environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': environ.get('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'CONN_MAX_AGE': _env_int(environ, 'DB_CONN_MAX_AGE', 60),
+    }
+    if _env_bool(environ, 'DB_POOL'):
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured('DB_POOL 需要 Django 5.1 及以上版本')
+        # 连接池与持久连接不能同时使用，连接由连接池复用
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {
+            'pool': {
+                'min_size': _env_int(environ, 'DB_POOL_MIN_SIZE', 2),
+                'max_size': _env_int(environ, 'DB_POOL_MAX_SIZE', 10),
+                'timeout': _env_int(environ, 'DB_POOL_TIMEOUT', 10),
+            },
+        }
+    return config
+
+
+def database_settings(base_dir, environ=os.environ):
+    """根据环境变量生成 DATABASES 配置"""
+    engine = environ.get('DB_ENGINE', 'sqlite').strip().lower()
+    sqlite_path = environ.get('SQLITE_PATH') or base_dir / 'db2.sqlite3'
+    if engine in ('sqlite', 'sqlite3'):
+        return {'default': sqlite_database(sqlite_path)}
+    if engine in ('postgresql', 'postgres'):
+        return {
+            'default': postgresql_database(environ),
+            SQLITE_ALIAS: sqlite_database(sqlite_path),
+        }
+    raise ImproperlyConfigured(f'不支持的 DB_ENGINE: {engine!r}，可选 sqlite 或 postgresql')
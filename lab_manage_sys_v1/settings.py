@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 
+from .caches import cache_settings
+from .database import database_settings, sqlite_pragmas
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -85,12 +88,14 @@ WSGI_APPLICATION = "lab_manage_sys_v1.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db2.sqlite3",
-    }
-}
+# 通过环境变量 DB_ENGINE 选择 SQLite（默认）或 PostgreSQL，各项参数见 lab_manage_sys_v1/database.py
+DATABASES = database_settings(BASE_DIR)
+
+# SQLite 连接参数，由 index.signals 在每个新建的数据库连接上执行；设置环境变量 SQLITE_WAL=1 启用 WAL 模式
+SQLITE_PRAGMAS = sqlite_pragmas()
+
+# 通过环境变量 CACHE_BACKEND 选择进程内缓存（默认）、文件缓存或 Redis，各项参数见 lab_manage_sys_v1/caches.py
+CACHES = cache_settings(BASE_DIR)
 
 
 # Password validation
@@ -1,6 +1,8 @@
 from django.db import models
 from django.db.models import Max
 
+from comprehensive.sequences import next_sequence, latest_serial
+
 class Person(models.Model):
     employee_id = models.CharField(max_length=10)
     name = models.CharField(max_length=100)
@@ -85,23 +87,16 @@ class OvertimeApplication(models.Model):
             date_str = self.application_date.strftime('%Y%m%d')
             prefix = f'JBSQ-{date_str}-'
 
-            # 获取当天已有的最大序号
-            existing_numbers = OvertimeApplication.objects.filter(
-                application_date=self.application_date
-            ).values_list('application_number', flat=True)
-
-            max_serial = 0
-            for number in existing_numbers:
-                # 提取编号中的序号部分
-                serial_part = number.split('-')[-1]
-                try:
-                    serial_number = int(serial_part)
-                    if serial_number > max_serial:
-                        max_serial = serial_number
-                except ValueError:
-                    continue  # 忽略无法解析的编号
-
-            new_serial = max_serial + 1
+            # 通过编号序列计数器原子地分配当天序号，计数器不存在时以当天已有的最大序号为起点
+            new_serial = next_sequence(
+                'JBSQ', date_str,
+                seed=lambda: latest_serial(
+                    OvertimeApplication.objects.filter(
+                        application_date=self.application_date
+                    ).values_list('application_number', flat=True),
+                    separator='-'
+                )
+            )
             serial_number = f'{new_serial:02d}'
             self.application_number = prefix + serial_number
 
@@ -0,0 +1,159 @@
+import hashlib
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import OvertimeApplication
+
+OVERTIME_PAGE_SIZE = 50
+# 已结束年份/月份的汇总缓存，加班申请新增、修改或删除时通过版本号整体失效
+OVERTIME_ANALYSIS_VERSION_KEY = 'overtime_analysis:version'
+OVERTIME_ANALYSIS_TIMEOUT = 24 * 60 * 60
+OVERTIME_DETAIL_FIELDS = (
+    'application_number', 'overtime_employee_name', 'employee_id', 'reason', 'duration',
+    'line_leader_approval', 'line_leader_rejection_reason',
+    'department_leader_approval', 'department_leader_rejection_reason',
+    'general_management_approval', 'general_management_rejection_reason',
+)
+
+
+def _month_range(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def parse_period(year=None, month=None):
+    """
+    将年份 "YYYY" 或月份 "YYYY-MM" 转换为日期区间 (开始, 结束)，结束日期不包含在内；
+    月份优先，都为空时返回 None，格式错误时抛出 ValueError。
+    """
+    if month:
+        try:
+            year_part, month_part = month.split('-')
+            return _month_range(int(year_part), int(month_part))
+        except ValueError:
+            raise ValueError('月份格式必须为 "YYYY-MM"')
+    if year:
+        try:
+            year = int(year)
+            return date(year, 1, 1), date(year + 1, 1, 1)
+        except ValueError:
+            raise ValueError('年份格式必须为 "YYYY"')
+    return None
+
+
+def filter_applications(person='All', period=None, application_number=None):
+    applications = OvertimeApplication.objects.all()
+    if person and person != 'All':
+        applications = applications.filter(overtime_employee_name=person)
+    if period:
+        # 使用日期区间而不是 __year/__month，可以利用 application_date 上的索引
+        applications = applications.filter(application_date__gte=period[0], application_date__lt=period[1])
+    if application_number:
+        applications = applications.filter(application_number=application_number)
+    return applications
+
+
+def _duration_sum(condition=None):
+    return Coalesce(
+        Sum('duration', filter=condition), Value(0),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def employee_summary(applications):
+    """一次 GROUP BY 查询按人员汇总申请、通过、驳回时长（以部门领导审批结果为准）"""
+    rows = applications.values('employee_id', 'overtime_employee_name').annotate(
+        total_duration=_duration_sum(),
+        approved_duration=_duration_sum(Q(department_leader_approval=True)),
+        rejected_duration=_duration_sum(Q(department_leader_approval=False)),
+    ).order_by('employee_id', 'overtime_employee_name')
+    return [
+        {
+            'employee_id': row['employee_id'],
+            'name': row['overtime_employee_name'],
+            'total_duration': float(row['total_duration']),
+            'approved_duration': float(row['approved_duration']),
+            'rejected_duration': float(row['rejected_duration']),
+        }
+        for row in rows
+    ]
+
+
+def month_tree(applications):
+    """按月份 GROUP BY 统计申请数量和时长，返回 {"YYYY-MM": {"count", "total_duration"}}"""
+    rows = applications.annotate(month=TruncMonth('application_date')).values('month').annotate(
+        count=Count('id'), total_duration=_duration_sum(),
+    ).order_by('-month')
+    return {
+        row['month'].strftime('%Y-%m'): {'count': row['count'], 'total_duration': float(row['total_duration'])}
+        for row in rows
+    }
+
+
+def application_page(applications, page=1, page_size=OVERTIME_PAGE_SIZE):
+    """分页返回申请明细，只查询列表需要的字段"""
+    paginator = Paginator(
+        applications.order_by('-application_date', '-application_number').values(*OVERTIME_DETAIL_FIELDS),
+        page_size,
+    )
+    page_obj = paginator.get_page(page)
+    rows = []
+    for row in page_obj:
+        row['duration'] = float(row['duration'])
+        rows.append(row)
+    return rows, {
+        'page': page_obj.number,
+        'num_pages': paginator.num_pages,
+        'count': paginator.count,
+        'page_size': page_size,
+    }
+
+
+def is_closed_period(period, today=None):
+    """区间已经完全结束（不包含今天）时返回 True"""
+    today = today or timezone.localdate()
+    return period is not None and period[1] <= today
+
+
+def _get_version():
+    version = cache.get(OVERTIME_ANALYSIS_VERSION_KEY)
+    if version is None:
+        # 版本号丢失时使用时间戳，避免命中旧版本遗留的缓存
+        cache.add(OVERTIME_ANALYSIS_VERSION_KEY, int(time.time()), None)
+        version = cache.get(OVERTIME_ANALYSIS_VERSION_KEY)
+    return version
+
+
+def overtime_aggregates(person='All', period=None, application_number=None):
+    """
+    返回 {'tree_data', 'summary'}。
+
+    已结束的年份或月份缓存汇总结果，当前及未来的区间每次查询数据库。
+    """
+    applications = filter_applications(person, period, application_number)
+    if not is_closed_period(period):
+        return {'tree_data': month_tree(applications), 'summary': employee_summary(applications)}
+
+    # 人员姓名可能包含中文和空格，取摘要作为缓存键
+    digest = hashlib.md5(f'{person}|{period[0]}|{period[1]}|{application_number or ""}'.encode()).hexdigest()
+    key = f'overtime_analysis:{_get_version()}:{digest}'
+    result = cache.get(key)
+    if result is None:
+        result = {'tree_data': month_tree(applications), 'summary': employee_summary(applications)}
+        cache.set(key, result, OVERTIME_ANALYSIS_TIMEOUT)
+    return result
+
+
+def invalidate_overtime_analysis():
+    """加班申请变化（包括对历史月份申请的补审批）后调用"""
+    try:
+        cache.incr(OVERTIME_ANALYSIS_VERSION_KEY)
+    except ValueError:
+        cache.set(OVERTIME_ANALYSIS_VERSION_KEY, int(time.time()), None)
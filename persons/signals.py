@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from comprehensive.page_cache import PERSONS_LIST_PAGE, invalidate_page_cache
+from experiment.models import Tasks
+
+from .models import OvertimeApplication, Performance, Person, Skill
+from .overtime_analysis import invalidate_overtime_analysis
+from .skill_radar import invalidate_performance_maxima, invalidate_skill_maxima
+from .workload import invalidate_task_years
+
+
+@receiver(post_save, sender=OvertimeApplication)
+@receiver(post_delete, sender=OvertimeApplication)
+def update_overtime_analysis(sender, **kwargs):
+    """加班申请保存或删除后使加班汇总缓存失效"""
+    invalidate_overtime_analysis()
+
+
+@receiver(post_save, sender=Tasks)
+@receiver(post_delete, sender=Tasks)
+def update_task_years(sender, **kwargs):
+    """任务保存或删除后使任务负荷页面的年份列表缓存失效"""
+    invalidate_task_years()
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def update_persons_list_page(sender, **kwargs):
+    """人员信息保存或删除后使人员清单页面的表格缓存失效"""
+    invalidate_page_cache(PERSONS_LIST_PAGE)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def update_skill_maxima(sender, **kwargs):
+    """素质分保存或删除后使雷达图的素质分最大值缓存失效"""
+    invalidate_skill_maxima()
+
+
+@receiver(post_save, sender=Performance)
+@receiver(post_delete, sender=Performance)
+def update_performance_maxima(sender, instance, **kwargs):
+    """技能分保存或删除后使该产品类型的技能分最大值缓存失效"""
+    invalidate_performance_maxima(instance.set_name)
@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Performance, Person, Skill
+
+SKILL_FIELDS = ('skill1', 'skill2', 'skill3', 'skill4', 'skill5')
+PERFORMANCE_FIELDS = ('performance1', 'performance2', 'performance3', 'performance4', 'performance5', 'performance6')
+
+# 各产品类型的专业技能维度名称
+PROFESSIONAL_CONTENT = {
+    'MT': ['总成耐久', '总成润滑', '总成换档', '总成性能', '零部件', '静扭'],
+    'DCT': ['总成耐久', '总成润滑', '总成换档', 'HCU', '零部件', '静扭/驻车'],
+    'AT': ['总成耐久', '总成润滑', '发动机拖动', 'HCU', '零部件', '静扭/驻车'],
+    '电驱': ['总成耐久', '总成润滑', '环境试验', 'MCU', '零部件', '静扭/驻车'],
+    '混动': ['总成耐久', '总成润滑', '环境试验', 'MCU', '零部件', '静扭/驻车'],
+}
+DEFAULT_PROFESSIONAL_CONTENT = PROFESSIONAL_CONTENT['MT']
+
+# 最大值缓存，素质分或技能分保存、删除时由信号删除；兜底过期时间防止绕过信号的批量更新长期不生效
+SKILL_MAX_KEY = 'skill_radar:skill_max'
+PERFORMANCE_MAX_KEY = 'skill_radar:performance_max:{set_name}'
+RADAR_MAX_TIMEOUT = 60 * 60
+
+# 团队雷达图数据一次最多返回的人数
+TEAM_RADAR_LIMIT = 200
+
+
+def skill_maxima():
+    """所有人员各项素质分的最大值，一次聚合查询并缓存"""
+    maxima = cache.get(SKILL_MAX_KEY)
+    if maxima is None:
+        row = Skill.objects.aggregate(**{field: Max(field) for field in SKILL_FIELDS})
+        maxima = [row[field] or 0 for field in SKILL_FIELDS]
+        cache.set(SKILL_MAX_KEY, maxima, RADAR_MAX_TIMEOUT)
+    return maxima
+
+
+def performance_maxima(set_name):
+    """指定产品类型下各项技能分的最大值，一次聚合查询并按 set_name 缓存"""
+    key = PERFORMANCE_MAX_KEY.format(set_name=set_name)
+    maxima = cache.get(key)
+    if maxima is None:
+        row = Performance.objects.filter(set_name=set_name).aggregate(
+            **{field: Max(field) for field in PERFORMANCE_FIELDS}
+        )
+        maxima = [row[field] or 0 for field in PERFORMANCE_FIELDS]
+        cache.set(key, maxima, RADAR_MAX_TIMEOUT)
+    return maxima
+
+
+def invalidate_skill_maxima():
+    cache.delete(SKILL_MAX_KEY)
+
+
+def invalidate_performance_maxima(set_name):
+    cache.delete(PERFORMANCE_MAX_KEY.format(set_name=set_name))
+
+
+def _values(instance, fields):
+    return [getattr(instance, field) if instance else 0 for field in fields]
+
+
+def _person_values(skill, performance):
+    professional_values = _values(skill, SKILL_FIELDS)
+    test_ability_values = _values(performance, PERFORMANCE_FIELDS)
+    # 没有数据时平均值为零
+    professional_values_avg = int(sum(professional_values) / len(SKILL_FIELDS)) if skill else 0
+    test_ability_values_avg = int(sum(test_ability_values) / len(PERFORMANCE_FIELDS)) if performance else 0
+    return {
+        'professional_values': professional_values,
+        'professional_values_avg': professional_values_avg,
+        'test_ability_values': test_ability_values,
+        'test_ability_values_avg': test_ability_values_avg,
+        # 综合值：素质分占 40%，技能分占 60%
+        'compress_value': int(professional_values_avg * 0.4 + test_ability_values_avg * 0.6),
+    }
+
+
+def person_radar_data(person, set_name):
+    """单个人员的雷达图和仪表盘数据"""
+    skill = Skill.objects.filter(person=person).first()
+    performance = Performance.objects.filter(person=person, set_name=set_name).first()
+    data = _person_values(skill, performance)
+    data.update({
+        'professional_values_max': skill_maxima(),
+        'test_ability_values_max': performance_maxima(set_name),
+        'professional_content': PROFESSIONAL_CONTENT.get(set_name, DEFAULT_PROFESSIONAL_CONTENT),
+    })
+    return data
+
+
+def team_radar_data(person_ids, set_name):
+    """
+    多个人员的雷达图数据，用于对比。
+
+    人员、素质分、技能分各一次查询，最大值只计算一次，与人数无关。
+    """
+    persons = Person.objects.filter(id__in=person_ids).order_by('name').values('id', 'employee_id', 'name')
+    skills = {skill.person_id: skill for skill in Skill.objects.filter(person_id__in=person_ids)}
+    performances = {}
+    for performance in Performance.objects.filter(person_id__in=person_ids, set_name=set_name).order_by('id'):
+        performances.setdefault(performance.person_id, performance)
+
+    members = []
+    for person in persons:
+        data = _person_values(skills.get(person['id']), performances.get(person['id']))
+        data.update({'person_id': person['id'], 'employee_id': person['employee_id'], 'name': person['name']})
+        members.append(data)
+    return {
+        'set_name': set_name,
+        'professional_content': PROFESSIONAL_CONTENT.get(set_name, DEFAULT_PROFESSIONAL_CONTENT),
+        'professional_values_max': skill_maxima(),
+        'test_ability_values_max': performance_maxima(set_name),
+        'persons': members,
+    }
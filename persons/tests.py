@@ -1,3 +1,238 @@
+import random
+from collections import Counter, defaultdict
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from comprehensive.permission_index import invalidate_permission_index
+from experiment.models import Tasks
+
+from .models import OvertimeApplication, Performance, Person, Skill
+from .overtime_analysis import filter_applications, overtime_aggregates, parse_period
+from .skill_radar import TEAM_RADAR_LIMIT
+from .workload import TASKS_PAGE_SIZE, WORKLOAD_BUCKETS
+from .views import get_user_role
+
+
+def approval_permission(codename):
+    return Permission.objects.get(content_type__app_label='persons', codename=codename)
+
+
+def create_application(**fields):
+    fields = {
+        'employee_id': '1001', 'submitter_name': '张三', 'overtime_employee_name': '张三',
+        'application_date': date(2025, 3, 3), 'duration': 2, **fields,
+    }
+    return OvertimeApplication.objects.create(start_time=time(18), end_time=time(20), reason='台架试验', **fields)
+
+
+def create_person(employee_id, name):
+    return Person.objects.create(
+        employee_id=employee_id, name=name, email=f'{employee_id}@example.com', phone='13800000000',
+        birth_date=date(1990, 1, 1), address='上海', entry_date=date(2020, 1, 1), department='试验部',
+        role='试验员', potential='高', skill='高',
+    )
+
+
+class OvertimeApprovalRoleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_permission_index()
+        self.line_leader = User.objects.create_user('2001', password='password')
+        group = Group.objects.create(name='条线领导')
+        group.permissions.add(approval_permission('can_approve_line_leader'))
+        self.line_leader.groups.add(group)
+        self.department_leader = User.objects.create_user('2002', password='password')
+        self.department_leader.user_permissions.add(approval_permission('can_approve_department_leader'))
+
+    def review(self, user, **data):
+        self.client.force_login(user)
+        return self.client.post(reverse('persons:save_overtime_application'), data)
+
+    def test_roles_follow_permission_index(self):
+        operator = User.objects.create_user('1001')
+        self.assertEqual(get_user_role(self.line_leader), 'line_leader')
+        self.assertEqual(get_user_role(self.department_leader), 'department_leader')
+        self.assertEqual(get_user_role(operator), 'operator')
+        with self.assertNumQueries(0):
+            get_user_role(User(username='2002', is_active=True))
+
+        self.department_leader.user_permissions.clear()
+        self.assertEqual(get_user_role(self.department_leader), 'operator')
+
+    def test_department_leader_reviews_after_line_leader(self):
+        application = create_application()
+
+        self.review(self.department_leader, application_number=application.application_number,
+                    department_leader_approval='agree')
+        application.refresh_from_db()
+        self.assertIsNone(application.department_leader_approval)
+
+        self.review(self.line_leader, application_number=application.application_number,
+                    line_leader_approval='agree')
+        self.review(self.department_leader, application_number=application.application_number,
+                    department_leader_approval='reject', department_leader_rejection_reason='时长有误')
+        application.refresh_from_db()
+        self.assertIs(application.line_leader_approval, True)
+        self.assertIs(application.department_leader_approval, False)
+        self.assertEqual(application.department_leader_rejection_reason, '时长有误')
+
+
+class OvertimeAggregatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = random.Random(18)
+        people = [('1001', '张三'), ('1002', '李四'), ('1003', '王 五')]
+        for _ in range(120):
+            employee_id, name = rng.choice(people)
+            create_application(
+                employee_id=employee_id, overtime_employee_name=name,
+                application_date=date(rng.choice([2024, 2025]), rng.randint(1, 12), rng.randint(1, 28)),
+                duration=Decimal(rng.randint(1, 16)) / 2,
+                department_leader_approval=rng.choice([True, False, None]),
+            )
+
+    @staticmethod
+    def python_totals(applications):
+        """原来逐条累加的计算方式"""
+        summary = defaultdict(lambda: {'total_duration': 0, 'approved_duration': 0, 'rejected_duration': 0})
+        months = defaultdict(lambda: {'count': 0, 'total_duration': 0})
+        for app in applications:
+            durations = summary[(app.employee_id, app.overtime_employee_name)]
+            durations['total_duration'] += app.duration
+            if app.department_leader_approval == True:
+                durations['approved_duration'] += app.duration
+            elif app.department_leader_approval == False:
+                durations['rejected_duration'] += app.duration
+            month = months[app.application_date.strftime('%Y-%m')]
+            month['count'] += 1
+            month['total_duration'] += app.duration
+        return summary, months
+
+    def test_sql_aggregates_equal_python_totals(self):
+        periods = (('All', None, None), ('All', '2024', None), ('All', None, '2025-03'), ('王 五', '2025', None))
+        for person, year, month in periods:
+            period = parse_period(year, month)
+            with self.subTest(person=person, period=period):
+                result = overtime_aggregates(person, period)
+                summary, months = self.python_totals(filter_applications(person, period))
+                self.assertTrue(summary)
+                self.assertEqual(
+                    {(row['employee_id'], row['name']): {
+                        key: row[key] for key in ('total_duration', 'approved_duration', 'rejected_duration')
+                    } for row in result['summary']},
+                    {key: {name: float(value) for name, value in durations.items()}
+                     for key, durations in summary.items()},
+                )
+                self.assertEqual(result['tree_data'], {
+                    month: {'count': totals['count'], 'total_duration': float(totals['total_duration'])}
+                    for month, totals in months.items()
+                })
+
+    def test_closed_period_reuses_cache_until_application_changes(self):
+        period = parse_period('2024')
+        first = overtime_aggregates('All', period)
+        with self.assertNumQueries(0):
+            self.assertEqual(overtime_aggregates('All', period), first)
+
+        create_application(application_date=date(2024, 6, 1), duration=Decimal('3.5'))
+        total = sum(row['total_duration'] for row in overtime_aggregates('All', period)['summary'])
+        self.assertEqual(total, sum(row['total_duration'] for row in first['summary']) + 3.5)
+
+    def test_open_period_is_not_cached(self):
+        period = parse_period(month=timezone.localdate().strftime('%Y-%m'))
+        overtime_aggregates('All', period)
+        with self.assertNumQueries(2):
+            overtime_aggregates('All', period)
+
+
+class TeamSkillDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('1001', password='password'))
+        self.zhang = create_person('1001', '张三')
+        self.li = create_person('1002', '李四')
+        Skill.objects.create(person=self.zhang, skill1=60, skill2=70)
+        Skill.objects.create(person=self.li, skill1=80, skill2=50)
+        Performance.objects.create(person=self.zhang, set_name='DCT', performance1=90)
+
+    def get(self, person_ids, set_name='DCT'):
+        return self.client.get(reverse('persons:get_team_skill_data', args=[set_name]), {'person_ids': person_ids})
+
+    def test_team_data_uses_shared_maxima(self):
+        data = self.get(f'{self.zhang.id},{self.li.id}').json()
+        self.assertEqual([person['name'] for person in data['persons']], ['张三', '李四'])
+        self.assertEqual(data['professional_values_max'][:2], [80, 70])
+        self.assertEqual(data['test_ability_values_max'][0], 90)
+
+    def test_invalid_requests_return_400(self):
+        too_many = ','.join(str(index) for index in range(TEAM_RADAR_LIMIT + 1))
+        for person_ids in ('', 'a,b', too_many):
+            with self.subTest(person_ids=person_ids[:20]):
+                self.assertEqual(self.get(person_ids).status_code, 400)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.get(str(self.zhang.id)).status_code, 302)
+
+    def test_score_changes_invalidate_cached_maxima(self):
+        self.get(str(self.zhang.id))
+        Skill.objects.get(person=self.li).delete()
+        Performance.objects.create(person=self.li, set_name='DCT', performance1=95)
+
+        data = self.get(str(self.zhang.id)).json()
+        self.assertEqual(data['professional_values_max'][:2], [60, 70])
+        self.assertEqual(data['test_ability_values_max'][0], 95)
+
+
+class TaskWorkloadTests(TestCase):
+    STATUSES = ('样件装调', '样件运行', '样件排查', '设备排查', '任务暂停', '已完成', '待排产')
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('1001', password='password'))
+        rng = random.Random(20)
+        Tasks.objects.bulk_create([
+            Tasks(
+                task_id=f'T{index}', task_status=rng.choice(self.STATUSES), project='P1', sample_id='S1',
+                test_content='耐久', outline='大纲', equipment_id='E1', client='张三', schedule='1/1',
+                task_date=date(rng.choice([2024, 2025]), rng.randint(1, 12), rng.randint(1, 28)),
+                experimenter=rng.choice(['张三', '李四', '王五']),
+            )
+            for index in range(TASKS_PAGE_SIZE * 3 + 30)
+        ])
+
+    def test_bucket_counts_match_task_statuses(self):
+        data = self.client.get(reverse('persons:persons_tasks_workload'), {'year': '2025'}).json()
+        tasks = list(Tasks.objects.filter(task_date__year=2025).exclude(task_status='已完成'))
+        counts = Counter((task.experimenter, task.task_status) for task in tasks)
+
+        self.assertEqual(data['total_tasks'], len(tasks))
+        self.assertEqual(data['chart_data']['experimenters'], ['张三', '李四', '王五'])
+        for bucket, statuses in WORKLOAD_BUCKETS.items():
+            self.assertEqual(data['chart_data'][bucket], [
+                sum(counts[(name, status)] for status in statuses)
+                for name in data['chart_data']['experimenters']
+            ])
+
+    def test_empty_filter_returns_placeholder(self):
+        data = self.client.get(reverse('persons:persons_tasks_workload'), {'year': '2030'}).json()
+        self.assertEqual(data['total_tasks'], 0)
+        self.assertEqual(data['chart_data']['experimenters'], ['无数据'])
 
-# Create your tests here.
+    def test_pagination_bounds(self):
+        count = Tasks.objects.exclude(task_status='已完成').count()
+        num_pages = -(-count // TASKS_PAGE_SIZE)
+        self.assertGreater(num_pages, 2)
+        for page, expected in (('1', 1), ('2', 2), ('999', num_pages), ('abc', 1), ('-1', num_pages)):
+            with self.subTest(page=page):
+                response = self.client.get(
+                    reverse('persons:persons_tasks'), {'page': page}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+                )
+                self.assertEqual(
+                    response.json()['pagination'], {'page': expected, 'num_pages': num_pages, 'count': count}
+                )
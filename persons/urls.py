@@ -13,10 +13,12 @@ urlpatterns = [
     path('persons_skills/', persons_skills, name='persons_skills'),
     path('get_person_details/<int:person_id>/', get_person_details, name='get_person_details'),
     path('get_person_skill_data/<int:person_id>/<str:set_name>/', get_person_skill_data, name='get_person_skill_data'),
+    path('get_team_skill_data/<str:set_name>/', get_team_skill_data, name='get_team_skill_data'),
     path('update_skill/', update_skill, name='update_skill'),
     path('update_performance/', update_performance, name='update_performance'),
     # 设置任务负荷路由地址
     path('persons_tasks/', persons_tasks, name='persons_tasks'),
+    path('persons_tasks_workload/', persons_tasks_workload, name='persons_tasks_workload'),
     path('save_task/', save_task, name='save_task'),
     path('delete_task/',delete_task, name='delete_task'),
     # 设置人员加班路由地址
@@ -1,4 +1,5 @@
 from django.contrib.auth.decorators import login_required, permission_required
+from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from django.utils.dateparse import parse_date
 
@@ -23,6 +24,12 @@ from django.contrib import messages
 from decimal import Decimal
 from django.http import JsonResponse
 
+from comprehensive.page_cache import PERSONS_LIST_PAGE, page_cache_context
+from comprehensive.permission_index import users_with_permission, usernames_with_permission
+from .overtime_analysis import application_page, filter_applications, overtime_aggregates, parse_period
+from .skill_radar import TEAM_RADAR_LIMIT, person_radar_data, team_radar_data
+from .workload import TASKS_PAGE_SIZE, filter_tasks, task_years, workload_chart_data
+
 # Create your views here.
 @login_required
 def persons_list(request):
@@ -36,6 +43,7 @@ def persons_list(request):
             'page_title': '人员清单',
             'persons': persons,
             'user_has_permission': user_has_permission,
+            **page_cache_context(PERSONS_LIST_PAGE),
         }
         return render(request, 'persons_list.html', context)
     except PermissionDenied:
@@ -131,89 +139,24 @@ def get_person_details(request, person_id):
 
 def get_person_skill_data(request, person_id, set_name):
     person = get_object_or_404(Person, id=person_id)
+    # 最大值按 set_name 缓存，每次只需查询该人员自己的素质分和技能分
+    return JsonResponse(person_radar_data(person, set_name))
 
-    # 尝试获取技能数据，如果不存在则初始化为零
-    try:
-        skill_data = Skill.objects.get(person=person)
-    except Skill.DoesNotExist:
-        skill_data = None
 
-    # 尝试获取性能数据，如果不存在则初始化为零
+@login_required
+def get_team_skill_data(request, set_name):
+    """一次返回多个人员（person_ids 逗号分隔）的雷达图数据，用于团队对比"""
     try:
-        performance_data = Performance.objects.get(person=person, set_name=set_name)
-    except Performance.DoesNotExist:
-        performance_data = None
-
-    # 计算 professional_values 和 test_ability_values 的最大值，若无数据则为零
-    professional_values_max = [
-        Skill.objects.aggregate(Max('skill1'))['skill1__max'] or 0,
-        Skill.objects.aggregate(Max('skill2'))['skill2__max'] or 0,
-        Skill.objects.aggregate(Max('skill3'))['skill3__max'] or 0,
-        Skill.objects.aggregate(Max('skill4'))['skill4__max'] or 0,
-        Skill.objects.aggregate(Max('skill5'))['skill5__max'] or 0
-    ]
-
-    test_ability_values_max = [
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance1'))['performance1__max'] or 0,
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance2'))['performance2__max'] or 0,
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance3'))['performance3__max'] or 0,
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance4'))['performance4__max'] or 0,
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance5'))['performance5__max'] or 0,
-        Performance.objects.filter(set_name=set_name).aggregate(Max('performance6'))['performance6__max'] or 0
-    ]
-
-    # 计算 professional_values 的平均值，如果 skill_data 不存在则返回0
-    professional_values_avg = 0
-    if skill_data:
-        professional_values_avg = int((skill_data.skill1 + skill_data.skill2 + skill_data.skill3 + skill_data.skill4 + skill_data.skill5) / 5)
-
-    # 计算 test_ability_values 的平均值，如果 performance_data 不存在则返回0
-    test_ability_values_avg = 0
-    if performance_data:
-        test_ability_values_avg = int((performance_data.performance1 + performance_data.performance2 +
-                                    performance_data.performance3 + performance_data.performance4 +
-                                    performance_data.performance5 + performance_data.performance6) / 6)
-
-    # 计算综合值
-    compress_value = int(professional_values_avg * 0.4 + test_ability_values_avg * 0.6)
-
-    # 根据 set_name 确定 professional_content 的内容
-    if set_name == 'MT':
-        professional_content = ['总成耐久', '总成润滑', '总成换档', '总成性能', '零部件', '静扭']
-    elif set_name == 'DCT':
-        professional_content = ['总成耐久', '总成润滑', '总成换档', 'HCU', '零部件', '静扭/驻车']
-    elif set_name == 'AT':
-        professional_content = ['总成耐久', '总成润滑', '发动机拖动', 'HCU', '零部件', '静扭/驻车']
-    elif set_name == '电驱':
-        professional_content = ['总成耐久', '总成润滑', '环境试验', 'MCU', '零部件', '静扭/驻车']
-    elif set_name == '混动':
-        professional_content = ['总成耐久', '总成润滑', '环境试验', 'MCU', '零部件', '静扭/驻车']
-    else:
-        professional_content = ['总成耐久', '总成润滑', '总成换档', '总成性能', '零部件', '静扭']
-
-    data = {
-        'professional_values': [
-            skill_data.skill1 if skill_data else 0,
-            skill_data.skill2 if skill_data else 0,
-            skill_data.skill3 if skill_data else 0,
-            skill_data.skill4 if skill_data else 0,
-            skill_data.skill5 if skill_data else 0
-        ],
-        'professional_values_max': professional_values_max,
-        'professional_values_avg': professional_values_avg,
-        'test_ability_values': [
-            performance_data.performance1 if performance_data else 0,
-            performance_data.performance2 if performance_data else 0,
-            performance_data.performance3 if performance_data else 0,
-            performance_data.performance4 if performance_data else 0,
-            performance_data.performance5 if performance_data else 0,
-            performance_data.performance6 if performance_data else 0
-        ],
-        'test_ability_values_max': test_ability_values_max,
-        'test_ability_values_avg': test_ability_values_avg,
-        'compress_value': compress_value,
-        'professional_content': professional_content  # 将 professional_content 添加到返回的数据中
-    }
+        person_ids = [int(value) for value in request.GET.get('person_ids', '').split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '人员ID必须为整数'}, status=400)
+    if not person_ids:
+        return JsonResponse({'status': 'error', 'message': '请至少选择一名人员'}, status=400)
+    if len(person_ids) > TEAM_RADAR_LIMIT:
+        return JsonResponse({'status': 'error', 'message': f'一次最多对比 {TEAM_RADAR_LIMIT} 人'}, status=400)
+
+    data = team_radar_data(person_ids, set_name)
+    data['status'] = 'success'
     return JsonResponse(data)
 
 
@@ -235,96 +178,38 @@ def persons_tasks(request):
     selected_week = request.GET.get('week', current_week if 'week' in request.GET else '')
     selected_date = request.GET.get('date', '')
 
-    tasks = Tasks.objects.exclude(task_status='已完成').order_by('experimenter', 'task_date')
+    tasks = filter_tasks(request.GET).order_by('experimenter', 'task_date')
+    # 表格分页，翻页时只渲染表格行
+    paginator = Paginator(tasks, TASKS_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    pagination = {
+        'page': page_obj.number,
+        'num_pages': paginator.num_pages,
+        'count': paginator.count,
+    }
+    user_has_permission = request.user.has_perm('persons.change_tasks')
 
-    if 'year' in request.GET:
-        tasks = tasks.filter(task_date__year=selected_year)
-    if 'month' in request.GET:
-        tasks = tasks.filter(task_date__month=selected_month)
-    if 'week' in request.GET:
-        # 修改周筛选逻辑
-        try:
-            selected_year = int(selected_year)
-            selected_week = int(selected_week)
-            # 计算该周的起始日期和结束日期
-            first_day = datetime.strptime(f'{selected_year}-W{selected_week - 1}-1', '%Y-W%W-%w')  # 修正周数
-            last_day = first_day + timedelta(days=6)
-            tasks = tasks.filter(
-                task_date__gte=first_day.date(),
-                task_date__lte=last_day.date()
-            )
-        except ValueError as e:
-            print(f"Week calculation error: {e}")
-    if 'date' in request.GET:
-        tasks = tasks.filter(task_date=selected_date)
+    # 判断是否为AJAX请求
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        html_task_table = render_to_string('persons_tasks_table.html', {
+            'page_obj': page_obj,
+            'user_has_permission': user_has_permission,
+        })
+        return JsonResponse({'html_task_table': html_task_table, 'pagination': pagination})
 
-    persons = Person.objects.all()
-    # 计算任务总和
-    total_tasks = tasks.count()
-    # 提取任务日期的年份部分并去重
-    task_years = Tasks.objects.exclude(task_status='已完成').annotate(year=ExtractYear('task_date')).values_list('year', flat=True).distinct().order_by('-year')
-    task_months = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
-    task_weeks = get_weeks_of_current_year()
-
-    # 获取筛选后的任务数据，用于生成图表
-    tasks_data = tasks.values('experimenter', 'task_status').annotate(task_count=Count('task_status'))
-    
-    # 获取不重复的试验人员作为横坐标
-    experimenters = tasks.values_list('experimenter', flat=True).distinct().order_by('experimenter')
-    
-    # 初始化任务状态数据，使用新的统计逻辑
-    task_status_data = {}
-    for task in tasks_data:
-        experimenter = task['experimenter']
-        if experimenter not in task_status_data:
-            task_status_data[experimenter] = {
-                '装调': 0,  # 对应"样件装调"
-                '运行': 0,  # 对应"样件运行"
-                '排查': 0,  # 对应"样件排查"和"设备排查"
-                '暂停': 0,  # 对应"任务暂停"
-            }
-        
-        # 根据任务状态累加数量
-        status = task['task_status']
-        count = task['task_count']
-        
-        if status == '样件装调':
-            task_status_data[experimenter]['装调'] += count
-        elif status == '样件运行':
-            task_status_data[experimenter]['运行'] += count
-        elif status in ['样件排查', '设备排查']:
-            task_status_data[experimenter]['排查'] += count
-        elif status == '任务暂停':
-            task_status_data[experimenter]['暂停'] += count
-
-    # 更新图表数据
-    if experimenters:
-        chart_data = {
-            'experimenters': list(experimenters),
-            '装调': [task_status_data[e]['装调'] for e in experimenters],
-            '运行': [task_status_data[e]['运行'] for e in experimenters],
-            '排查': [task_status_data[e]['排查'] for e in experimenters],
-            '暂停': [task_status_data[e]['暂停'] for e in experimenters],
-        }
-    else:
-        chart_data = {
-            'experimenters': ['无数据'],
-            '装调': [0],
-            '运行': [0],
-            '排查': [0],
-            '暂停': [0],
-        }
+    chart_data, total_tasks = workload_chart_data(tasks)
 
     # 将数据传递给模板
     context = {
-        'tasks': tasks,
+        'page_obj': page_obj,
+        'pagination': pagination,
         'total_tasks': total_tasks,  # 任务总和
-        'task_years': task_years,
-        'task_months': task_months,
-        'task_weeks': task_weeks,
-        'persons': persons,
+        'task_years': task_years(),
+        'task_months': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
+        'task_weeks': get_weeks_of_current_year(),
+        'persons': Person.objects.all(),
         'page_title': '任务管理',
-        'user_has_permission': request.user.has_perm('persons.change_tasks'),
+        'user_has_permission': user_has_permission,
         'csrf_token': get_token(request),
         'chart_data': json.dumps(chart_data),  # 将图表数据传递到模板
         'selected_year': selected_year,
@@ -332,20 +217,15 @@ def persons_tasks(request):
         'selected_week': selected_week,
         'selected_date': selected_date,
     }
-    # 判断是否为AJAX请求
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        html_task_table = render_to_string('persons_tasks.html', {
-            'tasks': tasks,
-            'user_has_permission': request.user.has_perm('persons.change_tasks')})
-        response_data = {
-            'html_task_table': html_task_table,
-            'chart_data': chart_data,
-            'total_tasks': total_tasks  # 将任务总数传递回前端
-        }
-        return JsonResponse(response_data)
-
     return render(request, 'persons_tasks.html', context)
 
+
+@login_required
+def persons_tasks_workload(request):
+    """按筛选条件返回人员负荷图表数据，不渲染模板"""
+    chart_data, total_tasks = workload_chart_data(filter_tasks(request.GET))
+    return JsonResponse({'chart_data': chart_data, 'total_tasks': total_tasks})
+
 @require_POST
 @csrf_exempt
 @permission_required('experiment.change_tasks', raise_exception=True)
@@ -410,18 +290,30 @@ def delete_task(request):
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 
-# 假设有一个函数可以获取用户的角色
+# 加班审批角色：(角色, 名称, 权限)，顺序即审批流程顺序
+OVERTIME_APPROVAL_ROLES = (
+    ('line_leader', '条线领导', 'persons.can_approve_line_leader'),
+    ('department_leader', '部门领导', 'persons.can_approve_department_leader'),
+    ('general_management', '综合管理', 'persons.can_approve_general_management'),
+)
+
+
 def get_user_role(user):
-    # 在实际应用中，应该从数据库或用户属性中获取用户角色
-    # 这里为了示例，简单地使用用户名来判断角色
-    if user.username.startswith('operator'):
-        return 'operator'
-    elif user.username.startswith('line_leader'):
-        return 'line_leader'
-    elif user.username.startswith('department_leader'):
-        return 'department_leader'
-    else:
-        return 'operator'  # 默认角色为运行人员
+    # 按审批流程顺序返回用户的第一个审批角色，没有审批权限的为运行人员
+    # 从权限索引判断，不查询用户权限表；与 has_perm 一致，停用用户没有权限，超级用户拥有全部权限
+    if user.is_active:
+        for role, _, permission in OVERTIME_APPROVAL_ROLES:
+            if user.is_superuser or user.username in usernames_with_permission(permission):
+                return role
+    return 'operator'  # 默认角色为运行人员
+
+
+def get_overtime_approvers():
+    """返回各审批环节的审批人 [(名称, [姓名, ...]), ...]，从权限索引读取，不逐个查询用户"""
+    return [
+        (label, [person['name'] or person['employee_id'] for person in users_with_permission(permission)])
+        for _, label, permission in OVERTIME_APPROVAL_ROLES
+    ]
 
 @login_required
 def persons_overtime_apply(request):
@@ -462,9 +354,10 @@ def persons_overtime_apply(request):
     # 获取用户权限
     user_permissions = user.get_all_permissions()
     context['user_permissions'] = list(user_permissions)  # 转换为列表
+    context['overtime_approvers'] = get_overtime_approvers()
 
     # 根据用户角色获取申请数据
-    if user.has_perm('persons.can_approve_line_leader') or user.has_perm('persons.can_approve_department_leader'):
+    if get_user_role(user) in ('line_leader', 'department_leader'):
         # 条线领导或部门领导，显示所有数据
         applications = OvertimeApplication.objects.all()
     else:
@@ -534,8 +427,9 @@ def save_overtime_application(request):
         overtime_employee_name = request.POST.get('overtime_employee_name')
         reason = request.POST.get('reason')
 
-        # 检查用户的权限
-        if user.has_perm('persons.can_approve_line_leader'):
+        # 检查用户的审批角色
+        role = get_user_role(user)
+        if role == 'line_leader':
             # 条线领导审批
             line_leader_approval = request.POST.get('line_leader_approval')  # 'agree' or 'reject'
             line_leader_rejection_reason = request.POST.get('line_leader_rejection_reason')
@@ -554,7 +448,7 @@ def save_overtime_application(request):
                 messages.error(request, '申请不存在！')
             return redirect('persons:persons_overtime_apply')
 
-        elif user.has_perm('persons.can_approve_department_leader'):
+        elif role == 'department_leader':
             # 部门领导审批
             department_leader_approval = request.POST.get('department_leader_approval')  # 'agree' or 'reject'
             department_leader_rejection_reason = request.POST.get('department_leader_rejection_reason')
@@ -576,7 +470,7 @@ def save_overtime_application(request):
                 messages.error(request, '申请不存在！')
             return redirect('persons:persons_overtime_apply')
 
-        elif user.has_perm('persons.can_approve_general_management'):
+        elif role == 'general_management':
             # 综合管理审批
             general_management_approval = request.POST.get('general_management_approval')
             general_management_rejection_reason = request.POST.get('general_management_rejection_reason')
@@ -711,71 +605,17 @@ def persons_overtime_analysis(request):
 
     # 如果是 AJAX 请求，返回 JSON 数据
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        # 过滤OvertimeApplication对象
-        applications = OvertimeApplication.objects.all()
-        if selected_person != 'All':
-            applications = applications.filter(overtime_employee_name=selected_person)
-        if selected_year:
-            applications = applications.filter(application_date__year=selected_year)
-        if selected_month:
-            # selected_month 格式为 'YYYY-MM'
-            year, month = selected_month.split('-')
-            applications = applications.filter(application_date__year=year, application_date__month=month)
-        if application_number:
-            applications = applications.filter(application_number=application_number)
-
-        # 构建树形数据结构
-        tree_data = defaultdict(list)
-        for app in applications:
-            month = app.application_date.strftime('%Y-%m')
-            tree_data[month].append(app.application_number)
-
-        # 将tree_data转换为普通字典
-        tree_data = dict(tree_data)
-
-        # 准备表格数据
-        applications_list = []
-        for app in applications:
-            applications_list.append({
-                'application_number': app.application_number,
-                'overtime_employee_name': app.overtime_employee_name,
-                'employee_id': app.employee_id,  # 添加工号
-                'reason': app.reason,
-                'duration': app.duration,
-                'line_leader_approval': app.line_leader_approval,
-                'line_leader_rejection_reason': app.line_leader_rejection_reason,
-                'department_leader_approval': app.department_leader_approval,
-                'department_leader_rejection_reason': app.department_leader_rejection_reason,
-            })
-
-        # 准备汇总数据
-        summary_data = []
-        employee_dict = {}
-        for app in applications:
-            key = (app.employee_id, app.overtime_employee_name)
-            if key not in employee_dict:
-                employee_dict[key] = {
-                    'total_duration': 0,
-                    'approved_duration': 0,
-                    'rejected_duration': 0,
-                }
-            employee_dict[key]['total_duration'] += app.duration
-            # 修正通过时长的计算逻辑，只有部门领导批准才计入
-            if app.department_leader_approval == True:
-                employee_dict[key]['approved_duration'] += app.duration
-            elif app.department_leader_approval == False:
-                employee_dict[key]['rejected_duration'] += app.duration
-
-        for (employee_id, name), durations in employee_dict.items():
-            summary_data.append({
-                'employee_id': employee_id,
-                'name': name,
-                'total_duration': durations['total_duration'],
-                'approved_duration': durations['approved_duration'],
-                'rejected_duration': durations['rejected_duration'],
-            })
-
-        return JsonResponse({'tree_data': tree_data, 'applications': applications_list, 'summary': summary_data})
+        try:
+            period = parse_period(selected_year, selected_month)
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+        # 月份树和人员汇总各一次 GROUP BY 查询，已结束的年份/月份直接读缓存
+        data = overtime_aggregates(selected_person, period, application_number)
+        # 明细分页返回
+        applications = filter_applications(selected_person, period, application_number)
+        data['applications'], data['pagination'] = application_page(applications, request.GET.get('page', 1))
+        return JsonResponse(data)
 
     # 非 AJAX 请求，渲染模板
     context = {
@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+from experiment.models import Tasks
+
+logger = logging.getLogger(__name__)
+
+TASKS_PAGE_SIZE = 100
+# 负荷统计的状态分组：分组 -> 任务状态
+WORKLOAD_BUCKETS = {
+    '装调': ('样件装调',),
+    '运行': ('样件运行',),
+    '排查': ('样件排查', '设备排查'),
+    '暂停': ('任务暂停',),
+}
+# 任务年份列表的缓存，任务保存或删除时删除
+TASK_YEARS_KEY = 'persons_tasks:years'
+TASK_YEARS_TIMEOUT = 60 * 60
+
+
+def filter_tasks(params):
+    """按年、月、周、日期筛选未完成的任务，参数与页面上的筛选控件一致"""
+    tasks = Tasks.objects.exclude(task_status='已完成')
+    if 'year' in params:
+        tasks = tasks.filter(task_date__year=params['year'])
+    if 'month' in params:
+        tasks = tasks.filter(task_date__month=params['month'])
+    if 'week' in params:
+        try:
+            year = int(params.get('year', datetime.now().year))
+            week = int(params['week'])
+            # 计算该周的起始日期和结束日期
+            first_day = datetime.strptime(f'{year}-W{week - 1}-1', '%Y-W%W-%w')
+            last_day = first_day + timedelta(days=6)
+            tasks = tasks.filter(task_date__gte=first_day.date(), task_date__lte=last_day.date())
+        except ValueError as e:
+            logger.warning('周筛选参数无效: %s', e)
+    if 'date' in params:
+        tasks = tasks.filter(task_date=params['date'])
+    return tasks
+
+
+def workload_chart_data(tasks):
+    """
+    按试验人员统计各状态分组的任务数，返回 (图表数据, 任务总数)。
+
+    状态分组在数据库中用 Case/When 完成，每个试验人员一行，一次查询。
+    """
+    buckets = {
+        bucket: Sum(Case(
+            When(task_status__in=statuses, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        for bucket, statuses in WORKLOAD_BUCKETS.items()
+    }
+    rows = list(
+        tasks.order_by().values('experimenter').annotate(total=Count('id'), **buckets).order_by('experimenter')
+    )
+    total_tasks = sum(row['total'] for row in rows)
+
+    if not rows:
+        chart_data = {'experimenters': ['无数据']}
+        chart_data.update({bucket: [0] for bucket in WORKLOAD_BUCKETS})
+        return chart_data, total_tasks
+
+    chart_data = {'experimenters': [row['experimenter'] for row in rows]}
+    chart_data.update({bucket: [row[bucket] for row in rows] for bucket in WORKLOAD_BUCKETS})
+    return chart_data, total_tasks
+
+
+def task_years():
+    """有未完成任务的年份（降序），结果缓存"""
+    years = cache.get(TASK_YEARS_KEY)
+    if years is None:
+        years = list(
+            Tasks.objects.exclude(task_status='已完成').annotate(year=ExtractYear('task_date'))
+            .values_list('year', flat=True).distinct().order_by('-year')
+        )
+        cache.set(TASK_YEARS_KEY, years, TASK_YEARS_TIMEOUT)
+    return years
+
+
+def invalidate_task_years():
+    cache.delete(TASK_YEARS_KEY)
@@ -0,0 +1,139 @@
+/**
+ * 任务单号输入联想
+ *
+ * 输入任务单号或项目代号时，从 task_suggestions 接口获取匹配的任务委托（最多 limit 条），
+ * 选中后回填任务单号以及 fill 中配置的字段。页面不再需要一次性加载全部任务委托。
+ */
+(function() {
+  "use strict";
+
+  const DEFAULTS = {
+    url: '/api/task-suggestions/',
+    input: '#taskNumber',
+    list: '#taskNumberSuggestions',
+    limit: 10,
+    delay: 150,
+    // 目标输入框 -> 任务委托字段
+    fill: {
+      '#sampleModel': 'project_code',
+      '#testContent': 'test_content',
+      '#sampleNumber': 'sample_code'
+    }
+  };
+
+  function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML;
+  }
+
+  function setupTaskNumberSuggestions(options) {
+    const settings = Object.assign({}, DEFAULTS, options || {});
+    const input = document.querySelector(settings.input);
+    const list = document.querySelector(settings.list);
+    // 重复调用时不再绑定事件
+    if (!input || !list || input.dataset.suggestionsReady) return;
+    input.dataset.suggestionsReady = '1';
+
+    let tasks = [];
+    let active = -1;
+    let timer = null;
+    let controller = null;
+
+    function hide() {
+      list.classList.add('d-none');
+      list.innerHTML = '';
+      tasks = [];
+      active = -1;
+    }
+
+    function render() {
+      if (!tasks.length) {
+        hide();
+        return;
+      }
+      list.innerHTML = tasks.map(function(task, index) {
+        return '<div class="suggestion-item' + (index === active ? ' active' : '') + '" data-index="' + index + '">' +
+          '<span class="task-number">' + escapeHtml(task.task_number) + '</span>' +
+          '<span class="project-code">' + escapeHtml(task.project_code) + '</span>' +
+          '</div>';
+      }).join('');
+      list.classList.remove('d-none');
+    }
+
+    function select(index) {
+      const task = tasks[index];
+      if (!task) return;
+      input.value = task.task_number;
+      Object.keys(settings.fill).forEach(function(selector) {
+        const field = document.querySelector(selector);
+        if (field) {
+          field.value = task[settings.fill[selector]] || '';
+          field.classList.remove('is-invalid');
+        }
+      });
+      hide();
+      input.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    function fetchSuggestions() {
+      // 只保留最后一次输入的请求
+      if (controller) controller.abort();
+      controller = new AbortController();
+      const params = new URLSearchParams({ q: input.value.trim(), limit: settings.limit });
+      fetch(settings.url + '?' + params.toString(), {
+        signal: controller.signal,
+        headers: { 'X-Requested-With': 'XMLHttpRequest' }
+      })
+        .then(function(response) { return response.json(); })
+        .then(function(data) {
+          if (data.status !== 'success' || document.activeElement !== input) return;
+          tasks = data.tasks;
+          active = -1;
+          render();
+        })
+        .catch(function(error) {
+          if (error.name !== 'AbortError') console.error('获取任务单号联想失败:', error);
+        });
+    }
+
+    input.setAttribute('autocomplete', 'off');
+    input.addEventListener('input', function() {
+      clearTimeout(timer);
+      timer = setTimeout(fetchSuggestions, settings.delay);
+    });
+    input.addEventListener('focus', function() {
+      if (!tasks.length) fetchSuggestions();
+    });
+    input.addEventListener('keydown', function(event) {
+      if (list.classList.contains('d-none')) return;
+      if (event.key === 'ArrowDown') {
+        event.preventDefault();
+        active = (active + 1) % tasks.length;
+        render();
+      } else if (event.key === 'ArrowUp') {
+        event.preventDefault();
+        active = (active - 1 + tasks.length) % tasks.length;
+        render();
+      } else if (event.key === 'Enter' && active >= 0) {
+        event.preventDefault();
+        select(active);
+      } else if (event.key === 'Escape') {
+        hide();
+      }
+    });
+    // 用 mousedown 选中，避免输入框先失去焦点把列表隐藏
+    list.addEventListener('mousedown', function(event) {
+      const item = event.target.closest('.suggestion-item');
+      if (item) {
+        event.preventDefault();
+        select(Number(item.dataset.index));
+      }
+    });
+    input.addEventListener('blur', function() {
+      setTimeout(hide, 100);
+    });
+  }
+
+  window.setupTaskNumberSuggestions = setupTaskNumberSuggestions;
+})();